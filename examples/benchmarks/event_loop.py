@@ -0,0 +1,122 @@
+"""
+Measures the throughput of the tick/random/print pipeline on the asyncio event loop and on uvloop. Each event loop
+runs in a fresh process, the ticks are published as fast as possible, and all messages go through Redis, as between
+node processes.
+
+Needs a Redis server at `redis://localhost:6379/0`. Run with `uv run python examples/benchmarks/event_loop.py`.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from typing import Any, AsyncIterator
+
+from aact.messages import Message, Tick, Zero
+from aact.nodes import Node, NodeFactory, PrintNode
+from aact.utils import EventLoop, new_event_loop
+from aact.utils.event_loop import UVLOOP_AVAILABLE
+
+REDIS_URL = "redis://localhost:6379/0"
+NUMBER = 20_000
+TIMEOUT = 60.0
+
+
+class FloodNode(Node[Zero, Tick]):
+    def __init__(self, number: int) -> None:
+        super().__init__(
+            input_channel_types=[],
+            output_channel_types=[("tick", Tick)],
+            node_name="flood",
+            redis_url=REDIS_URL,
+        )
+        self.number = number
+
+    async def event_loop(self) -> None:
+        for tick in range(self.number):
+            await self.publish("tick", Message[Tick](data=Tick(tick=tick)))
+
+    async def event_handler(
+        self, _: str, __: Message[Zero]
+    ) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        raise NotImplementedError("FloodNode does not have an event handler.")
+        yield "", Message[Tick](data=Tick(tick=0))
+
+
+class CountingPrintNode(PrintNode):
+    def __init__(self) -> None:
+        super().__init__(
+            print_channel_types={"random": "float"},
+            node_name="print",
+            redis_url=REDIS_URL,
+        )
+        self.received = 0
+        self.done = asyncio.Event()
+
+    async def write_to_screen(self) -> None:
+        # Counts the lines instead of writing them.
+        while True:
+            await self.write_queue.get()
+            self.received += 1
+            if self.received == NUMBER:
+                self.done.set()
+
+
+async def pipeline() -> tuple[int, float]:
+    flood = FloodNode(NUMBER)
+    random = NodeFactory.make(
+        "random",
+        input_channel="tick",
+        output_channel="random",
+        node_name="random",
+        redis_url=REDIS_URL,
+    )
+    printer = CountingPrintNode()
+    nodes: list[Node[Any, Any]] = [flood, random, printer]
+    for node in nodes:
+        node.use_local_bus = False
+    for node in nodes:
+        await node.__aenter__()
+    consumers = [asyncio.create_task(node.event_loop()) for node in nodes[1:]]
+    await asyncio.sleep(0.5)  # lets the subscriptions settle
+    start = time.perf_counter()
+    await flood.event_loop()
+    try:
+        await asyncio.wait_for(printer.done.wait(), TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+    for task in consumers:
+        task.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    for node in reversed(nodes):
+        await node.__aexit__(None, None, None)
+    return printer.received, elapsed
+
+
+def run(event_loop: EventLoop) -> None:
+    loop = new_event_loop(event_loop)
+    asyncio.set_event_loop(loop)
+    try:
+        received, elapsed = loop.run_until_complete(pipeline())
+    finally:
+        loop.close()
+    print(
+        f"{event_loop:<10} {received:>6}/{NUMBER} messages {received / elapsed:10.0f} messages/s"
+    )
+
+
+def main() -> None:
+    event_loops: list[EventLoop] = ["asyncio"]
+    if UVLOOP_AVAILABLE:
+        event_loops.append("uvloop")
+    else:
+        print("uvloop is not installed, only the asyncio event loop is measured.")
+    for event_loop in event_loops:
+        # A fresh process per event loop, so that neither warms up the other.
+        process = multiprocessing.Process(target=run, args=(event_loop,))
+        process.start()
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Measures the time to start a node process: importing aact, importing the CLI (as `aact run-node` does), and making a
+built-in node, each in a fresh interpreter, minus the startup time of the interpreter itself. The modules of
+optional dependencies imported along the way are listed, as they should only be imported by the nodes needing them.
+
+Run with `uv run python examples/benchmarks/import_time.py`.
+"""
+
+import subprocess
+import sys
+import time
+
+REPEAT = 10
+
+HEAVY_MODULES = ["aiohttp", "requests", "rq", "pyaudio", "google.cloud"]
+
+STATEMENTS = {
+    "import aact": "import aact",
+    "import aact.cli": "import aact.cli",
+    "make a print node": (
+        "from aact.nodes import NodeFactory; "
+        'NodeFactory.make("print", print_channel_types={"tick": "tick"}, '
+        'node_name="print", redis_url="redis://localhost:6379/0")'
+    ),
+}
+
+
+def measure(statement: str) -> float:
+    # The minimum over several runs is the least disturbed by other processes.
+    durations = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def imported_heavy_modules(statement: str) -> list[str]:
+    check = f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"
+    modules = subprocess.run(
+        [sys.executable, "-c", check], check=True, capture_output=True, text=True
+    ).stdout.split()
+    return [module for module in HEAVY_MODULES if module in modules]
+
+
+def main() -> None:
+    baseline = measure("pass")
+    print(f"{'interpreter startup':<25} {baseline * 1000:8.1f} ms")
+    for name, statement in STATEMENTS.items():
+        seconds = measure(statement) - baseline
+        heavy = ", ".join(imported_heavy_modules(statement)) or "none"
+        print(f"{name:<25} {seconds * 1000:8.1f} ms   optional dependencies: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
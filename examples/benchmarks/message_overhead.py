@@ -0,0 +1,88 @@
+"""
+Measures the per-message overhead of decoding input messages and building record entries, with the message
+classes parametrized for every message (as nodes used to do), with the classes cached per channel, and with raw
+messages, which are not decoded at all.
+
+Run with `uv run python examples/benchmarks/message_overhead.py`.
+"""
+
+import timeit
+from typing import Callable
+
+from aact.messages import Image, Message, Tick
+from aact.messages.codecs import decode_message
+from aact.messages.commons import DataEntry, dump_data_entry
+from aact.nodes import NodeFactory, PrintNode
+from aact.nodes.transports import ReceivedPayload
+
+NUMBER = 20_000
+REPEAT = 5
+
+
+def report(name: str, function: Callable[[], object], number: int = NUMBER) -> None:
+    # The minimum over several runs is the least disturbed by other processes.
+    seconds = min(timeit.repeat(function, number=number, repeat=REPEAT))
+    print(f"{name:<45} {seconds / number * 1e6:8.2f} us/message")
+
+
+def main() -> None:
+    node: PrintNode = NodeFactory.make(  # type: ignore[assignment]
+        "print",
+        print_channel_types={"tick": "tick", "image": "image"},
+        node_name="print",
+        redis_url="redis://localhost:6379/0",  # not connected to
+    )
+    tick_payload = Message[Tick](data=Tick(tick=42)).model_dump_json().encode()
+    tick = ReceivedPayload("tick", tick_payload, None, None)
+    image_payload = (
+        Message[Image](data=Image(image=bytes(640 * 480 * 3)))
+        .model_dump_json()
+        .encode()
+    )
+    image = ReceivedPayload("image", image_payload, None, None)
+    tick_type = node.input_channel_types["tick"]
+    entry_type = node.data_entry_types["tick"]
+
+    node.raw_input = False
+    message = node._decode(tick)
+    report(
+        "tick: decode, parametrized per message",
+        lambda: decode_message(tick_payload, Message[tick_type]),  # type: ignore[valid-type]
+    )
+    report("tick: decode, cached per channel", lambda: node._decode(tick))
+    report(
+        "tick: data entry, parametrized per message",
+        lambda: DataEntry[tick_type](channel="tick", data=message.data),  # type: ignore[valid-type]
+    )
+    report(
+        "tick: data entry, cached per channel",
+        lambda: entry_type(channel="tick", data=message.data),
+    )
+    report(
+        "tick: decode and dump data entry",
+        lambda: dump_data_entry("tick", node._decode(tick), entry_type),
+    )
+    report(
+        "image: decode and dump data entry",
+        lambda: dump_data_entry(
+            "image", node._decode(image), node.data_entry_types["image"]
+        ),
+        number=20,
+    )
+
+    node.raw_input = True
+    report(
+        "tick: raw message to data entry",
+        lambda: dump_data_entry("tick", node._decode(tick), entry_type),
+    )
+    report(
+        "image: raw message to data entry",
+        lambda: dump_data_entry(
+            "image", node._decode(image), node.data_entry_types["image"]
+        ),
+        number=20,
+    )
+
+
+if __name__ == "__main__":
+    main()
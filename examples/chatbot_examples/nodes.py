@@ -1,6 +1,7 @@
-from typing import AsyncIterator
+from typing import Iterator
 from aact import Node, NodeFactory
 from aact.messages import Message, Text
+from aact.nodes.offload import offload
 
 from openai import OpenAI
 
@@ -20,9 +21,10 @@ class GPT4TextChatbotNode(Node[Text, Text]):
         self.output_channel = output_channel
         self.client = OpenAI()
 
-    async def event_handler(
+    @offload("thread")  # the OpenAI client is synchronous
+    def event_handler(
         self, channel: str, message: Message[Text]
-    ) -> AsyncIterator[tuple[str, Message[Text]]]:
+    ) -> Iterator[tuple[str, Message[Text]]]:
         match channel:
             case self.input_channel:
                 response = self.client.chat.completions.create(
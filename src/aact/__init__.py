@@ -191,6 +191,47 @@ node_class = "node_class_2"
 # ...
 ```
 
+### Process groups
+
+`aact run-dataflow` starts one process per node. Nodes sharing a `process_group` run in one process instead, on one
+event loop and with one pool of Redis connections, which saves the memory of an interpreter per node. Each node still
+runs in its own task: a failing node stops without stopping the other nodes of its group. Nodes of a group exchange
+Pub/Sub messages through the local bus (see `aact.nodes.transports.LocalBus`), and they must use the same
+`event_loop`.
+
+```toml
+[[nodes]]
+node_name = "tick"
+node_class = "tick"
+process_group = "sensors"
+
+[[nodes]]
+node_name = "random"
+node_class = "random"
+process_group = "sensors"
+```
+
+### Restarting nodes
+
+By default, a node whose process exits stays stopped. With a `restart` policy, `aact run-dataflow` restarts the
+process of the node instead, after a delay growing exponentially with each restart, up to `max_restarts` restarts
+within `window_ms`. The policy can be set for the whole dataflow and overridden per node; the nodes of a process group
+must share one policy. A failed node of a process group is restarted within the process of the group, without
+stopping the other nodes, and the process itself is restarted once all of its nodes have stopped. See
+`aact.cli.reader.RestartConfig` for all the settings.
+
+```toml
+[restart]
+policy = "on-failure" # or "always", or "never" (the default)
+max_restarts = 5
+backoff_initial_ms = 100
+
+[[nodes]]
+node_name = "tick"
+node_class = "tick"
+restart = { policy = "always", max_restarts = 0 } # 0 means unlimited
+```
+
 
 """
 
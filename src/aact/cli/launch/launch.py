@@ -1,23 +1,26 @@
 import asyncio
 import logging
 import time
-from typing import Annotated, Optional, TypeVar
+from collections import deque
+from typing import Annotated, Any, Coroutine, Optional, TypeVar
 from ..app import app
-from ..reader import get_dataflow_config, draw_dataflow_mermaid, NodeConfig, Config
+from ..reader import (
+    get_dataflow_config,
+    draw_dataflow_mermaid,
+    NodeConfig,
+    Config,
+    RestartConfig,
+)
 import typer
 
-from ...nodes import NodeFactory
+from ...messages import DataModel
+from ...nodes import Node, NodeFactory
 
 
-from ...utils import tomllib
+from ...utils import EventLoop, new_event_loop, tomllib
 
-from rq import Queue
-from rq.exceptions import InvalidJobOperation
-from rq.job import Job
-from rq.command import send_stop_job_command
 from redis import Redis
-
-from ...manager import NodeManager
+from redis.asyncio import ConnectionPool
 
 InputType = TypeVar("InputType")
 OutputType = TypeVar("OutputType")
@@ -25,15 +28,54 @@ OutputType = TypeVar("OutputType")
 logger = logging.getLogger(__name__)
 
 
-async def _run_node(node_config: NodeConfig, redis_url: str) -> None:
+def _configure_node(node: Node[DataModel, DataModel], node_config: NodeConfig) -> None:
+    node.set_codecs(node_config.codec or "json", node_config.channel_codecs)
+    node.set_compression(node_config.channel_compression)
+    node.set_transports(node_config.channel_transports, node_config.transport_options)
+    node.publish_max_batch_size = node_config.publish_max_batch_size
+    node.publish_max_delay_ms = node_config.publish_max_delay_ms
+    node.input_queues = node_config.input_queues
+    node.max_concurrency = node_config.max_concurrency
+    node.ordering = node_config.ordering
+    node.max_batch_size = node_config.max_batch_size
+    node.max_batch_wait_ms = node_config.max_batch_wait_ms
+    node.claim_check_threshold = node_config.claim_check_threshold
+    node.claim_check_ttl_ms = node_config.claim_check_ttl_ms
+    node.metrics_port = node_config.metrics_port
+    node.metrics_host = node_config.metrics_host
+    node.metrics_snapshots = node_config.metrics_snapshots
+    node.tracing = node_config.tracing
+    node.sequence_numbers = node_config.sequence_numbers
+    node.sequence_warning_interval_ms = node_config.sequence_warning_interval_ms
+    node.offload_workers = node_config.offload_workers
+    node.error_policy = node_config.error_policy
+    node.health_namespace = node_config.health_namespace
+    if node_config.replica_index is not None:
+        node.set_replicas(
+            node_config.replicas,
+            node_config.replica_index,
+            node_config.partition_key,
+            node_config.replica_of,
+        )
+
+
+async def _run_node(
+    node_config: NodeConfig,
+    redis_url: str,
+    connection_pool: ConnectionPool | None = None,
+) -> None:
     logger.info(f"Starting node {node_config}")
     try:
-        async with NodeFactory.make(
+        node = NodeFactory.make(
             node_config.node_class,
             **node_config.node_args.model_dump(),
             node_name=node_config.node_name,
             redis_url=redis_url,
-        ) as node:
+        )
+        if connection_pool is not None:
+            node.set_connection_pool(connection_pool)
+        _configure_node(node, node_config)
+        async with node:
             logger.info(f"Starting eventloop {node_config.node_name}")
             await node.event_loop()
     except Exception as e:
@@ -41,23 +83,95 @@ async def _run_node(node_config: NodeConfig, redis_url: str) -> None:
         raise Exception(e)
 
 
-def _sync_run_node(node_config: NodeConfig, redis_url: str) -> None:
-    loop = asyncio.get_event_loop()
+async def _run_node_with_restarts(
+    node_config: NodeConfig, redis_url: str, connection_pool: ConnectionPool
+) -> None:
+    """
+    Run a node of a process group, and restart it in place as long as its restart policy allows.
+    """
+    restart = node_config.restart or RestartConfig()
+    restarts: deque[float] = deque()  # the times of the restarts within the window
+    while True:
+        error: Exception | None = None
+        try:
+            await _run_node(node_config, redis_url, connection_pool)
+        except Exception as e:
+            error = e
+        while restarts and time.monotonic() - restarts[0] > restart.window_ms / 1000:
+            restarts.popleft()
+        delay = restart.delay(error is not None, len(restarts))
+        if delay is None:
+            if error is not None:
+                raise error
+            return
+        logger.warning(
+            f"Restarting node {node_config.node_name} in {delay:.3f} seconds"
+        )
+        await asyncio.sleep(delay)
+        restarts.append(time.monotonic())
+
+
+async def _run_process_group(node_configs: list[NodeConfig], redis_url: str) -> None:
+    # The nodes share one connection pool, and each runs in its own task: a failing node does not stop the others, and
+    # is restarted on its own.
+    connection_pool = ConnectionPool.from_url(redis_url)
+    try:
+        results = await asyncio.gather(
+            *(
+                _run_node_with_restarts(node_config, redis_url, connection_pool)
+                for node_config in node_configs
+            ),
+            return_exceptions=True,
+        )
+    finally:
+        await connection_pool.aclose()
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+def _run_until_complete(
+    coroutine: Coroutine[Any, Any, None], event_loop: EventLoop | None, name: str
+) -> None:
+    loop = new_event_loop(event_loop or "asyncio")
+    asyncio.set_event_loop(loop)
 
     try:
-        loop.run_until_complete(_run_node(node_config, redis_url))
+        loop.run_until_complete(coroutine)
     except asyncio.CancelledError:
         logger = logging.getLogger(__name__)
-        logger.info(f"Node {node_config.node_name} shutdown gracefully.")
+        logger.info(f"{name} shutdown gracefully.")
     finally:
         loop.close()
 
 
+def _sync_run_node(node_config: NodeConfig, redis_url: str) -> None:
+    _run_until_complete(
+        _run_node(node_config, redis_url),
+        node_config.event_loop,
+        f"Node {node_config.node_name}",
+    )
+
+
+def _sync_run_process_group(node_configs: list[NodeConfig], redis_url: str) -> None:
+    _run_until_complete(
+        _run_process_group(node_configs, redis_url),
+        node_configs[0].event_loop,
+        f"Process group {node_configs[0].process_group}",
+    )
+
+
 @app.command()
 def run_node(
     dataflow_toml: str = typer.Option(),
-    node_name: str = typer.Option(),
+    node_name: Optional[str] = typer.Option(None),
     redis_url: str = typer.Option(),
+    process_group: Optional[str] = typer.Option(
+        None, help="Run all nodes of the process group instead of a single node."
+    ),
+    health_namespace: Optional[str] = typer.Option(
+        None, help="The namespace of the nodes in the health registry."
+    ),
 ) -> None:
     logger = logging.getLogger(__name__)
     config = Config.model_validate(tomllib.load(open(dataflow_toml, "rb")))
@@ -65,6 +179,16 @@ def run_node(
     # dynamically import extra modules
     for module in config.extra_modules:
         __import__(module)
+    for node in config.nodes:
+        node.health_namespace = health_namespace
+
+    if process_group is not None:
+        node_configs = [
+            node for node in config.nodes if node.process_group == process_group
+        ]
+        if node_configs:
+            _sync_run_process_group(node_configs, redis_url)
+        return
 
     for nodes in config.nodes:
         if nodes.node_name == node_name:
@@ -77,6 +201,21 @@ def _import_extra_modules(extra_modules: list[str]) -> None:
         __import__(module)
 
 
+def run_forked(
+    node_configs: list[NodeConfig], redis_url: str, extra_modules: list[str]
+) -> None:
+    """
+    @private
+    Run a node, or the nodes of a process group, in a process forked by the fork server of the `NodeManager`.
+    """
+    # Imported by the fork server already, unless the import failed there.
+    _import_extra_modules(extra_modules)
+    if node_configs[0].process_group is None:
+        _sync_run_node(node_configs[0], redis_url)
+    else:
+        _sync_run_process_group(node_configs, redis_url)
+
+
 @app.command()
 def run_dataflow(
     dataflow_toml: Annotated[
@@ -88,6 +227,10 @@ def run_dataflow(
     verbose: Optional[bool] = typer.Option(
         False, help="Print verbose logging for debugging."
     ),
+    fork_server: Optional[bool] = typer.Option(
+        False,
+        help="Fork the node processes from a process with the modules of the dataflow imported, to start faster.",
+    ),
 ) -> None:
     if verbose:
         logging.basicConfig(level=logging.DEBUG)
@@ -96,6 +239,12 @@ def run_dataflow(
     logger.info(f"Starting dataflow with config {config}")
 
     if with_rq:
+        # rq is only imported here: every node process imports this module.
+        from rq import Queue
+        from rq.exceptions import InvalidJobOperation
+        from rq.job import Job
+        from rq.command import send_stop_job_command
+
         redis = Redis.from_url(config.redis_url)
         queue = Queue(connection=redis)
         job_ids: list[str] = []
@@ -128,7 +277,12 @@ def run_dataflow(
         finally:
             return
 
-    with NodeManager(dataflow_toml, False, config.redis_url) as node_manager:
+    # The manager is only imported here: node processes do not need it.
+    from ...manager import NodeManager
+
+    with NodeManager(
+        dataflow_toml, False, config.redis_url, fork_server=bool(fork_server)
+    ) as node_manager:
         node_manager.wait()
 
 
@@ -3,6 +3,13 @@ from .dataflow_reader import (
     draw_dataflow_mermaid,
     NodeConfig,
     Config,
+    RestartConfig,
 )
 
-__all__ = ["get_dataflow_config", "draw_dataflow_mermaid", "NodeConfig", "Config"]
+__all__ = [
+    "get_dataflow_config",
+    "draw_dataflow_mermaid",
+    "NodeConfig",
+    "Config",
+    "RestartConfig",
+]
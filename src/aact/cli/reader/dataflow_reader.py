@@ -1,34 +1,210 @@
 import base64
+import random
 from collections import defaultdict
 import logging
 import sys
+from typing import Any, Literal
 
 if sys.version_info >= (3, 11):
     import tomllib
 else:
     import tomlkit as tomllib
-from pydantic import BaseModel, ConfigDict, Field
-
-import requests
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
+from ...messages.compression import CompressionConfig
+from ...nodes.base import ErrorPolicy, Ordering
+from ...nodes.queues import InputQueueConfig
 from ...nodes.registry import NodeFactory
+from ...utils import EventLoop
 
 
 class NodeArgs(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
+RestartPolicy = Literal["never", "on-failure", "always"]
+
+
+class RestartConfig(BaseModel):
+    policy: RestartPolicy = Field(default="never")
+    """
+    When a stopped node is restarted: `"never"`, `"on-failure"` (the node raised an error, or its process exited with
+    a non-zero code or was killed by a signal), or `"always"`. The `NodeManager` restarts node processes, and the
+    process of a process group restarts its failed nodes itself.
+    """
+    max_restarts: int = Field(default=5, ge=0)
+    """
+    The maximum number of restarts within `window_ms`, after which the node is left stopped. `0` means unlimited.
+    """
+    window_ms: float = Field(default=60000.0, gt=0)
+    """
+    The sliding window in which restarts are counted.
+    """
+    backoff_initial_ms: float = Field(default=100.0, ge=0)
+    """
+    The delay before the first restart. Each restart within `window_ms` multiplies it by `backoff_multiplier`.
+    """
+    backoff_multiplier: float = Field(default=2.0, ge=1)
+    backoff_max_ms: float = Field(default=30000.0, ge=0)
+    """
+    The maximum delay before a restart.
+    """
+    jitter: float = Field(default=0.1, ge=0, le=1)
+    """
+    The delays are randomly scaled by up to this fraction, so that nodes failing together do not restart together.
+    """
+
+    def delay(self, failed: bool, restarts: int) -> float | None:
+        """
+        The delay in seconds before restarting a stopped node, after `restarts` restarts within the window. `None` if
+        the node must not be restarted.
+        """
+        if self.policy == "never" or (self.policy == "on-failure" and not failed):
+            return None
+        if self.max_restarts and restarts >= self.max_restarts:
+            return None
+        # The exponent is capped, as the delay is capped anyway and unlimited restarts would overflow it.
+        delay_ms = min(
+            self.backoff_initial_ms * self.backoff_multiplier ** min(restarts, 64),
+            self.backoff_max_ms,
+        )
+        return delay_ms * random.uniform(1 - self.jitter, 1 + self.jitter) / 1000
+
+
 class NodeConfig(BaseModel):
     node_name: str
     node_class: str
     node_args: NodeArgs = Field(default_factory=NodeArgs)
+    codec: str | None = Field(default=None)
+    event_loop: EventLoop | None = Field(default=None)
+    channel_codecs: dict[str, str] = Field(default_factory=dict)
+    channel_compression: dict[str, CompressionConfig] = Field(default_factory=dict)
+    channel_transports: dict[str, str] = Field(default_factory=dict)
+    transport_options: dict[str, dict[str, Any]] = Field(default_factory=dict)
+    publish_max_batch_size: int = Field(default=64, ge=1)
+    publish_max_delay_ms: float = Field(default=0.0, ge=0)
+    input_queues: dict[str, InputQueueConfig] = Field(default_factory=dict)
+    max_concurrency: int = Field(default=1, ge=1)
+    ordering: Ordering = Field(default="ordered-global")
+    max_batch_size: int = Field(default=1, ge=1)
+    max_batch_wait_ms: float = Field(default=10.0, ge=0)
+    claim_check_threshold: int = Field(default=0, ge=0)
+    claim_check_ttl_ms: int = Field(default=60000, ge=1)
+    metrics_port: int | None = Field(default=None)
+    metrics_host: str = Field(default="127.0.0.1")
+    metrics_snapshots: bool = Field(default=False)
+    tracing: bool = Field(default=False)
+    sequence_numbers: bool = Field(default=False)
+    sequence_warning_interval_ms: float = Field(default=10000.0, ge=0)
+    offload_workers: int = Field(default=4, ge=1)
+    error_policy: ErrorPolicy = Field(default="raise")
+    process_group: str | None = Field(default=None)
+    """
+    Nodes of the same process group run in one process, on one event loop.
+    """
+    restart: RestartConfig | None = Field(default=None)
+    replicas: int = Field(default=1, ge=1)
+    partition_key: dict[str, str] = Field(default_factory=dict)
+    replica_of: str | None = Field(default=None)
+    """
+    @private
+    The name of the replicated node, set on each of its replicas.
+    """
+    replica_index: int | None = Field(default=None)
+    """
+    @private
+    """
+    health_namespace: str | None = Field(default=None)
+    """
+    @private
+    The namespace of the node in the health registry, set by the `NodeManager`.
+    """
 
 
 class Config(BaseModel):
     redis_url: str = Field()
     extra_modules: list[str] = Field(default_factory=lambda: list())
+    codec: str = Field(default="json")
+    event_loop: EventLoop = Field(default="asyncio")
+    restart: RestartConfig = Field(default_factory=RestartConfig)
+    channel_codecs: dict[str, str] = Field(default_factory=dict)
+    channel_compression: dict[str, CompressionConfig] = Field(default_factory=dict)
+    channel_transports: dict[str, str] = Field(default_factory=dict)
+    transport_options: dict[str, dict[str, Any]] = Field(default_factory=dict)
     nodes: list[NodeConfig]
 
+    @model_validator(mode="after")
+    def _propagate_dataflow_settings(self) -> "Config":
+        # Node-level settings take precedence over dataflow-level ones.
+        for node in self.nodes:
+            node.codec = node.codec or self.codec
+            node.event_loop = node.event_loop or self.event_loop
+            node.restart = node.restart or self.restart
+            node.channel_codecs = {**self.channel_codecs, **node.channel_codecs}
+            node.channel_compression = {
+                **self.channel_compression,
+                **node.channel_compression,
+            }
+            node.channel_transports = {
+                **self.channel_transports,
+                **node.channel_transports,
+            }
+            node.transport_options = {
+                transport: {
+                    **self.transport_options.get(transport, {}),
+                    **node.transport_options.get(transport, {}),
+                }
+                for transport in self.transport_options.keys()
+                | node.transport_options.keys()
+            }
+        self.nodes = [
+            replica for node in self.nodes for replica in _expand_replicas(node)
+        ]
+        process_groups: dict[str, NodeConfig] = {}
+        for node in self.nodes:
+            if node.process_group is None:
+                continue
+            first_node = process_groups.setdefault(node.process_group, node)
+            if node.event_loop != first_node.event_loop:
+                raise ValueError(
+                    f"The nodes of process group {node.process_group} must use the same event loop"
+                )
+            if node.restart != first_node.restart:
+                raise ValueError(
+                    f"The nodes of process group {node.process_group} must use the same restart policy"
+                )
+        return self
+
+
+def _expand_replicas(node: NodeConfig) -> list[NodeConfig]:
+    if node.replicas == 1 or node.replica_index is not None:
+        return [node]
+    return [
+        node.model_copy(
+            update={
+                "node_name": f"{node.node_name}-{index}",
+                "replica_of": node.node_name,
+                "replica_index": index,
+                # Replicas on one host cannot share the metrics port, nor one consumer of a consumer group.
+                "metrics_port": None
+                if node.metrics_port is None
+                else node.metrics_port + index,
+                "transport_options": {
+                    transport: {
+                        **options,
+                        **(
+                            {"consumer_name": f"{options['consumer_name']}-{index}"}
+                            if "consumer_name" in options
+                            else {}
+                        ),
+                    }
+                    for transport, options in node.transport_options.items()
+                },
+            }
+        )
+        for index in range(node.replicas)
+    ]
+
 
 def get_dataflow_config(dataflow_toml: str) -> Config:
     """Get the dataflow configuration from a TOML file.
@@ -152,6 +328,8 @@ def draw_dataflow_mermaid(
     print(graph_str)
 
     if svg_path:
+        import requests
+
         graph_bytes = graph_str.encode("utf8")
         base64_bytes = base64.b64encode(graph_bytes)
         base64_string = base64_bytes.decode("ascii")
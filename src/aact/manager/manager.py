@@ -1,148 +1,511 @@
 import asyncio
-import datetime
+from collections import deque
+import io
 from logging import Logger
+import multiprocessing
+from multiprocessing import forkserver, popen_forkserver, reduction, spawn, util
+from multiprocessing.context import set_spawning_popen
+from multiprocessing.process import BaseProcess
 import os
 import signal
-from subprocess import Popen
-import threading
+import sys
+import time
 from ..utils import tomllib
 from typing import Any, Literal
 from uuid import uuid4
 
 from redis.asyncio import Redis
-from redis import Redis as SyncRedis
+from redis.exceptions import RedisError
 
-from ..cli.reader import Config
+from ..cli.reader import Config, NodeConfig, RestartConfig
+from ..nodes.health import HEARTBEAT_INTERVAL, HealthRegistry, NodeStats
+from ..nodes.registry import NodeFactory
 
 from ..utils import Self
 
 logger = Logger("NodeManager")
 
-Health = Literal["Started", "Running", "No Response", "Stopped"]
+DEDICATED_FORK_SERVERS = (3, 10) <= sys.version_info < (3, 14)
+"""
+@private
+Whether each `NodeManager` gets a fork server of its own. This relies on private internals of `multiprocessing`,
+checked to be the same from Python 3.10 to 3.13 (see `_ForkServerPopen`). On other versions, the managers of a process
+share its fork server.
+"""
 
+Health = Literal["Started", "Running", "No Response", "Restarting", "Stopped"]
 
-def run_event_loop_in_thread() -> None:
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_forever()
+NodeProcess = asyncio.subprocess.Process | BaseProcess
 
 
 class NodeManager(object):
+    """
+    Runs the nodes of a dataflow in subprocesses and supervises them on one event loop: it watches the node processes
+    exit, reads the heartbeats of the nodes into `node_health` and `node_stats`, and listens to the shutdown channels
+    of the nodes (`shutdown:{node_name}`), all concurrently.
+
+    ```python
+    async with NodeManager("dataflow.toml") as node_manager:
+        await node_manager.wait_until_shutdown()
+    ```
+
+    The manager can also be used synchronously, e.g., `with NodeManager("dataflow.toml") as node_manager:` and
+    `node_manager.wait()`, which run the supervisor on an event loop of its own.
+
+    By default, each node process is a new `aact run-node` interpreter, which imports aact, parses the dataflow toml
+    and imports the `extra_modules` again. With `fork_server` set, a fork server process imports all of them once, and
+    each node process is forked from it with its `NodeConfig` already parsed, which makes starting a dataflow much
+    faster. Each manager has a fork server of its own, which only imports the modules of its dataflow, and stops with
+    the manager. On Python versions other than 3.10 to 3.13, the managers of a process share one fork server, with the
+    preloads of the first manager starting it.
+
+    Exited node processes are restarted according to the `restart` policy of their nodes (see `RestartConfig`), after
+    an exponential backoff. Their nodes are `"Restarting"` in `node_health` meanwhile, and `node_restarts` counts the
+    restarts of the process of each node. The failed nodes of a process group are restarted by the process of the
+    group, which is itself only restarted once all of its nodes have stopped.
+    """
+
     def __init__(
         self,
         dataflow_toml: str,
         with_rq: bool = False,
         redis_url: str = "redis://localhost:6379/0",
+        fork_server: bool = False,
     ):
         self.id = f"manager-{str(uuid4())}"
         self.dataflow_toml = dataflow_toml
         self.with_rq = with_rq
-        self.subprocesses: dict[str, Popen[bytes]] = {}
-        self.pubsub = Redis.from_url(redis_url).pubsub()
-        self.shutdown_pubsub = SyncRedis.from_url(redis_url).pubsub()  # type: ignore[no-untyped-call]
+        self.fork_server = fork_server
+        self.subprocesses: dict[str, NodeProcess] = {}
+        self.r = Redis.from_url(redis_url)
+        self.health_registry = HealthRegistry(self.r, namespace=self.id)
         self.background_tasks: list[asyncio.Task[None]] = []
         self.node_health: dict[str, Health] = {}
         self.last_heartbeat: dict[str, float] = {}
+        self.node_stats: dict[str, NodeStats] = {}
+        self.node_restarts: dict[str, int] = {}
+        """
+        The number of times the process of each node was restarted.
+        """
         self.loop: asyncio.AbstractEventLoop | None = None
+        """
+        The event loop of the supervisor when the manager is used synchronously.
+        """
         self.shutdown_signal: bool = False
+        """
+        Whether a node requested the shutdown of the dataflow.
+        """
+        self.stop_timeout: float = 10.0
+        """
+        How long the node processes have to exit after `SIGTERM` before they are killed.
+        """
+        self._shutdown = asyncio.Event()
+        self._fork_server: forkserver.ForkServer | None = None
 
-    def __enter__(
-        self,
-    ) -> Self:
+    async def __aenter__(self) -> Self:
         config = Config.model_validate(tomllib.load(open(self.dataflow_toml, "rb")))
+        for node in config.nodes:
+            node.health_namespace = self.id
 
-        # Nodes that run w/ subprocess
+        # Nodes that run w/ subprocess, one per node or per process group
+        process_groups: dict[str, list[NodeConfig]] = {}
         for node in config.nodes:
+            assert (
+                node.node_name not in self.node_health
+            ), f"Node {node.node_name} is duplicated."
+            self.node_health[node.node_name] = "Started"
+            self.node_restarts[node.node_name] = 0
+            if node.process_group is not None:
+                process_groups.setdefault(node.process_group, []).append(node)
+        processes = [
+            (["--node-name", node.node_name], [node])
+            for node in config.nodes
+            if node.process_group is None
+        ] + [
+            (["--process-group", process_group], nodes)
+            for process_group, nodes in process_groups.items()
+        ]
+        self._fork_server = (
+            self._start_fork_server(config) if self.fork_server else None
+        )
+        for options, nodes in processes:
+            node_names = [node.node_name for node in nodes]
             try:
-                command = f"aact run-node --dataflow-toml {self.dataflow_toml} --node-name {node.node_name} --redis-url {config.redis_url}"
-                node_process = Popen(
-                    [command],
-                    shell=True,
-                    preexec_fn=os.setsid,  # Start the subprocess in a new process group
-                )
-                logger.info(
-                    f"Starting subprocess {node_process} for node {node.node_name}"
-                )
-                assert (
-                    node.node_name not in self.subprocesses
-                ), f"Node {node.node_name} is duplicated."
-                self.subprocesses[node.node_name] = node_process
-                self.node_health[node.node_name] = "Started"
+                node_process = await self._start_process(config, options, nodes)
             except Exception as e:
                 logger.error(
-                    f"Error starting subprocess {node.node_name}: {e}. Stopping other nodes as well."
+                    f"Error starting subprocess for {', '.join(node_names)}: {e}. Stopping other nodes as well."
                 )
-                for node_name, node_process in self.subprocesses.items():
-                    logger.info(
-                        f"Terminating Node {node_name}. Process: {node_process}"
-                    )
+                for node_process in self.processes():
+                    logger.info(f"Terminating process: {node_process}")
                     try:
-                        os.killpg(os.getpgid(node_process.pid), signal.SIGTERM)
+                        _terminate(node_process)
                     except ProcessLookupError:
                         logger.info(f"Process group {node_process.pid} not found.")
                 self.subprocesses = {}
+                self._stop_fork_server()
                 raise e
 
-        thread = threading.Thread(target=run_event_loop_in_thread, daemon=True)
-        thread.start()
-        self.loop = asyncio.get_event_loop()
+        for options, nodes in processes:
+            self.background_tasks.append(
+                asyncio.create_task(self._watch_process(config, options, nodes))
+            )
+        self.background_tasks.append(asyncio.create_task(self.update_health_status()))
+        self.background_tasks.append(asyncio.create_task(self._listen_for_shutdown()))
+        return self
 
-        self.background_tasks.append(self.loop.create_task(self.wait_for_heartbeat()))
-        self.background_tasks.append(self.loop.create_task(self.update_health_status()))
+    async def _start_process(
+        self, config: Config, options: list[str], nodes: list[NodeConfig]
+    ) -> NodeProcess:
+        node_process: NodeProcess
+        if self.fork_server:
+            node_process = _ForkedProcess(
+                self._fork_server,
+                target=_run_forked,
+                args=(nodes, config.redis_url, config.extra_modules),
+                name=options[-1],
+            )
+            node_process.start()
+        else:
+            node_process = await asyncio.create_subprocess_exec(
+                "aact",
+                "run-node",
+                "--dataflow-toml",
+                self.dataflow_toml,
+                *options,
+                "--redis-url",
+                config.redis_url,
+                "--health-namespace",
+                self.id,
+                start_new_session=True,  # Start the subprocess in a new process group
+            )
+        node_names = [node.node_name for node in nodes]
+        logger.info(
+            f"Starting subprocess {node_process} for nodes {', '.join(node_names)}"
+        )
+        for node_name in node_names:
+            self.subprocesses[node_name] = node_process
+        return node_process
 
-        return self
+    def _start_fork_server(self, config: Config) -> forkserver.ForkServer | None:
+        """
+        Create the fork server of the manager, preloaded with the modules every node needs, the `extra_modules`, and
+        the modules of the built-in nodes of the dataflow. The fork server starts with the first node process.
 
-    async def wait_for_heartbeat(
-        self,
+        Unlike `multiprocessing.get_context("forkserver")`, whose fork server is shared by the whole process and keeps
+        the preloads of the first dataflow started, this fork server only serves the nodes of this manager. Without
+        `DEDICATED_FORK_SERVERS`, the shared fork server is used instead, and `None` is returned.
+        """
+        preload = [
+            "aact.cli.launch.launch",
+            "aact.manager.manager",
+            *config.extra_modules,
+            *{
+                NodeFactory.lazy_registry[node.node_class]
+                for node in config.nodes
+                if node.node_class in NodeFactory.lazy_registry
+            },
+        ]
+        if not DEDICATED_FORK_SERVERS:
+            multiprocessing.get_context("forkserver").set_forkserver_preload(preload)
+            return None
+        fork_server = forkserver.ForkServer()
+        fork_server.set_forkserver_preload(preload)
+        return fork_server
+
+    def _stop_fork_server(self) -> None:
+        if self._fork_server is not None:
+            # Closes the connection keeping the fork server alive, and waits for it to exit. Private, like the rest of
+            # `ForkServer`, see `DEDICATED_FORK_SERVERS`.
+            self._fork_server._stop()  # type: ignore[attr-defined]
+            self._fork_server = None
+
+    def processes(self) -> list[NodeProcess]:
+        """
+        The node processes. Nodes of a process group share one process.
+        """
+        return list(
+            {id(process): process for process in self.subprocesses.values()}.values()
+        )
+
+    async def _watch_process(
+        self, config: Config, options: list[str], nodes: list[NodeConfig]
     ) -> None:
-        for node_name in self.subprocesses.keys():
-            await self.pubsub.subscribe(f"heartbeat:{node_name}")
+        """
+        Wait for the process of the nodes to exit, and restart it as long as their restart policy allows.
+        """
+        node_names = [node.node_name for node in nodes]
+        restart = nodes[0].restart or RestartConfig()
+        restarts: deque[float] = deque()  # the times of the restarts within the window
+        while True:
+            node_process = self.subprocesses[node_names[0]]
+            returncode = await _wait_for_exit(node_process)
+            logger.warning(
+                f"Process {node_process.pid} of nodes {', '.join(node_names)} exited with code {returncode}"
+            )
+            while (
+                restarts and time.monotonic() - restarts[0] > restart.window_ms / 1000
+            ):
+                restarts.popleft()
+            delay = restart.delay(returncode != 0, len(restarts))
+            if delay is None or self._shutdown.is_set():
+                break
+            for node_name in node_names:
+                self.node_health[node_name] = "Restarting"
+            logger.info(
+                f"Restarting nodes {', '.join(node_names)} in {delay:.3f} seconds"
+            )
+            await asyncio.sleep(delay)
+            try:
+                await self._start_process(config, options, nodes)
+            except Exception as e:
+                logger.error(
+                    f"Error restarting subprocess for {', '.join(node_names)}: {e}"
+                )
+                break
+            restarts.append(time.monotonic())
+            for node_name in node_names:
+                self.node_health[node_name] = "Started"
+                self.node_restarts[node_name] += 1
 
-        async for message in self.pubsub.listen():
-            node_name = ":".join(message["channel"].decode("utf-8").split(":")[1:])
-            self.last_heartbeat[node_name] = datetime.datetime.now().timestamp()
+        for node_name in node_names:
+            self.node_health[node_name] = "Stopped"
+        if all(health == "Stopped" for health in self.node_health.values()):
+            self._shutdown.set()
 
     async def update_health_status(
         self,
     ) -> None:
         while True:
-            for node_name, last_heartbeat in self.last_heartbeat.items():
-                if datetime.datetime.now().timestamp() - last_heartbeat > 10:
-                    self.node_health[node_name] = "No Response"
-                else:
+            node_names = [
+                node_name
+                for node_name, health in self.node_health.items()
+                if health not in ("Restarting", "Stopped")
+            ]
+            try:
+                health = await self.health_registry.read(node_names)
+            except RedisError as e:
+                logger.warning(f"Failed to read the health of the nodes: {e}")
+                health = {}
+            for node_name, node_health in health.items():
+                if self.node_health[node_name] in ("Restarting", "Stopped"):
+                    continue  # exited while reading
+                self.last_heartbeat[node_name] = node_health.last_heartbeat
+                if node_health.stats is not None:
+                    self.node_stats[node_name] = node_health.stats
+                if node_health.responding:
                     self.node_health[node_name] = "Running"
-            await asyncio.sleep(1)
+                else:
+                    self.node_health[node_name] = "No Response"
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def _listen_for_shutdown(self) -> None:
+        channels = [f"shutdown:{node_name}" for node_name in self.subprocesses]
+        while True:
+            pubsub = self.r.pubsub()
+            try:
+                await pubsub.subscribe(*channels)
+                async for message in pubsub.listen():
+                    if message["type"] != "message" or message["data"] != b"shutdown":
+                        continue
+                    node_name = ":".join(
+                        message["channel"].decode("utf-8").split(":")[1:]
+                    )
+                    logger.info(f"Received shutdown signal for node {node_name}")
+                    self.shutdown_signal = True
+                    self._shutdown.set()
+                    return
+            except RedisError as e:
+                logger.warning(f"Failed to listen to the shutdown channels: {e}")
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+            finally:
+                await pubsub.aclose()  # type: ignore[no-untyped-call]
+
+    async def wait_until_shutdown(self) -> None:
+        """
+        Wait until a node requests the shutdown of the dataflow, or all node processes have exited.
+        """
+        await self._shutdown.wait()
+
+    async def __aexit__(
+        self, exc_type: Any = None, exc_value: Any = None, traceback: Any = None
+    ) -> None:
+        # Stops the background tasks first, so that no node process is restarted while stopping.
+        for task in self.background_tasks:
+            task.cancel()
+        await asyncio.gather(*self.background_tasks, return_exceptions=True)
+        self.background_tasks = []
+
+        processes = self.processes()
+        for node_process in processes:
+            try:
+                _terminate(node_process)
+                logger.info(f"Terminating process group {node_process.pid}")
+            except ProcessLookupError:
+                logger.warning(f"Process group {node_process.pid} not found.")
+        exits = [
+            asyncio.ensure_future(_wait_for_exit(node_process))
+            for node_process in processes
+        ]
+        if exits:
+            _, running = await asyncio.wait(exits, timeout=self.stop_timeout)
+            for node_process, exit in zip(processes, exits):
+                if exit in running:
+                    logger.warning(f"Killing process group {node_process.pid}")
+                    try:
+                        _terminate(node_process, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+            await asyncio.gather(*exits, return_exceptions=True)
+        self._stop_fork_server()
+
+        try:
+            await self.health_registry.clear()
+        except RedisError as e:
+            logger.warning(f"Failed to remove the nodes from the health registry: {e}")
+        await self.r.aclose()
+
+    def __enter__(
+        self,
+    ) -> Self:
+        self.loop = asyncio.new_event_loop()
+        return self.loop.run_until_complete(self.__aenter__())
 
     def wait(
         self,
     ) -> None:
-        for node_name in self.subprocesses.keys():
-            self.shutdown_pubsub.subscribe(f"shutdown:{node_name}")
-        for message in self.shutdown_pubsub.listen():
-            node_name = ":".join(message["channel"].decode("utf-8").split(":")[1:])
-            if message["data"] == b"shutdown":
-                logger.info(f"Received shutdown signal for node {node_name}")
-                self.shutdown_signal = True
-                break
-        self.shutdown_pubsub.unsubscribe()
-        self.shutdown_pubsub.close()
+        """
+        Supervise the nodes until a node requests the shutdown of the dataflow, or all node processes have exited.
+        """
+        assert self.loop is not None, "The manager must be entered first."
+        self.loop.run_until_complete(self.wait_until_shutdown())
 
     def __exit__(
         self,
-        signum: int | None = None,
-        frame: Any | None = None,
-        traceback: Any | None = None,
+        exc_type: Any = None,
+        exc_value: Any = None,
+        traceback: Any = None,
     ) -> None:
-        for _, node_process in self.subprocesses.items():
-            try:
-                os.killpg(os.getpgid(node_process.pid), signal.SIGTERM)
-                logger.info(f"Terminating process group {node_process.pid}")
-            except ProcessLookupError:
-                logger.warning(f"Process group {node_process.pid} not found.")
-        for task in self.background_tasks:
-            task.cancel()
+        if self.loop is None:
+            return
+        try:
+            self.loop.run_until_complete(self.__aexit__(exc_type, exc_value, traceback))
+        finally:
+            self.loop.close()
+            self.loop = None
+
+
+async def _wait_for_exit(node_process: NodeProcess) -> int | None:
+    """
+    Wait for a node process to exit. Returns its exit code.
+    """
+    if isinstance(node_process, asyncio.subprocess.Process):
+        return await node_process.wait()
+    # The sentinel of a forked process becomes readable when the process exits.
+    loop = asyncio.get_running_loop()
+    exited: asyncio.Future[None] = loop.create_future()
+
+    def on_exit() -> None:
+        if not exited.done():
+            exited.set_result(None)
+
+    loop.add_reader(node_process.sentinel, on_exit)
+    try:
+        await exited
+    finally:
+        loop.remove_reader(node_process.sentinel)
+    node_process.join()
+    return node_process.exitcode
+
+
+def _exit_code(node_process: NodeProcess) -> int | None:
+    if isinstance(node_process, asyncio.subprocess.Process):
+        return node_process.returncode
+    return node_process.exitcode
+
+
+def _terminate(node_process: NodeProcess, sig: int = signal.SIGTERM) -> None:
+    if _exit_code(node_process) is not None:
+        return  # already exited, its pid may be reused
+    assert node_process.pid is not None
+    # A forked node process is in the process group of the manager until it starts its own.
+    if os.getpgid(node_process.pid) == node_process.pid:
+        os.killpg(node_process.pid, sig)
+    else:
+        os.kill(node_process.pid, sig)
+
+
+class _ForkServerPopen(popen_forkserver.Popen):
+    """
+    Starts a process from the given fork server, instead of the fork server shared by the whole process.
+
+    `multiprocessing` has no public API for a fork server of one's own: `popen_forkserver.Popen._launch` always connects
+    to the module-level fork server. `_launch` is therefore a copy of the private method of CPython 3.10 to 3.13, with
+    the fork server replaced, and relies on the private `ForkServer` class, `read_signed` and `set_spawning_popen`.
+    `tests/cli/test_node_manager.py` checks that the copy still matches the method of the running interpreter.
+    """
+
+    _fds: list[int]
+
+    def __init__(
+        self, process_obj: BaseProcess, fork_server: forkserver.ForkServer
+    ) -> None:
+        self._fork_server = fork_server
+        super().__init__(process_obj)
+
+    def _launch(self, process_obj: BaseProcess) -> None:
+        prep_data = spawn.get_preparation_data(process_obj.name)
+        buf = io.BytesIO()
+        set_spawning_popen(self)
+        try:
+            reduction.dump(prep_data, buf)
+            reduction.dump(process_obj, buf)
+        finally:
+            set_spawning_popen(None)
+
+        self.sentinel, w = self._fork_server.connect_to_new_process(self._fds)
+        # Keep a duplicate of the data pipe's write end as a sentinel of the parent process used by the child process.
+        _parent_w = os.dup(w)
+        self.finalizer = util.Finalize(self, _close_fds, (_parent_w, self.sentinel))
+        with open(w, "wb", closefd=True) as f:
+            f.write(buf.getbuffer())
+        self.pid = forkserver.read_signed(self.sentinel)
+
+
+def _close_fds(*fds: int) -> None:
+    for fd in fds:
+        os.close(fd)
+
+
+class _ForkedProcess(BaseProcess):
+    """
+    A node process forked by the fork server of its `NodeManager`, or the fork server shared by the whole process if
+    there is none.
+    """
+
+    _start_method = "forkserver"
+
+    def __init__(
+        self, fork_server: forkserver.ForkServer | None, **kwargs: Any
+    ) -> None:
+        super().__init__(**kwargs)
+        self._fork_server = fork_server
+
+    def _Popen(self, process_obj: BaseProcess) -> popen_forkserver.Popen:
+        if self._fork_server is None:
+            return popen_forkserver.Popen(process_obj)
+        return _ForkServerPopen(process_obj, self._fork_server)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The fork server stays with the manager, the node process only needs its target.
+        return {**self.__dict__, "_fork_server": None}
+
+
+def _run_forked(
+    node_configs: list[NodeConfig], redis_url: str, extra_modules: list[str]
+) -> None:
+    # Like `aact run-node`, the node process leads its own process group, to be stopped with its children.
+    os.setsid()
+    from ..cli.launch.launch import run_forked
 
-        if self.loop:
-            self.loop.run_until_complete(self.pubsub.unsubscribe())
-            self.loop.run_until_complete(self.pubsub.close())
-            self.loop.stop()
+    run_forked(node_configs, redis_url, extra_modules)
@@ -7,12 +7,24 @@ from .commons import (
     Float,
     Audio,
     Text,
+    DeadLetter,
     RestRequest,
     RestResponse,
     get_rest_request_class,
     get_rest_response_class,
 )
 from .registry import DataModelFactory
+from .codecs import (
+    Codec,
+    CodecFactory,
+    JSONCodec,
+    BinaryCodec,
+    encode_message,
+    decode_message,
+    RawMessage,
+)
+from .compression import Compressor, CompressorFactory, CompressionConfig
+from .tracing import TraceContext, TraceCollector
 
 __all__ = [
     "Zero",
@@ -25,8 +37,21 @@ __all__ = [
     "DataModel",
     "Audio",
     "Text",
+    "DeadLetter",
     "RestRequest",
     "RestResponse",
     "get_rest_request_class",
     "get_rest_response_class",
+    "Codec",
+    "CodecFactory",
+    "JSONCodec",
+    "BinaryCodec",
+    "encode_message",
+    "decode_message",
+    "RawMessage",
+    "Compressor",
+    "CompressorFactory",
+    "CompressionConfig",
+    "TraceContext",
+    "TraceCollector",
 ]
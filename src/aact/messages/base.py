@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, SerializerFunctionWrapHandler, model_serializer
 
-from typing import Generic, Literal, TypeVar
+from typing import Any, Generic, Literal, TypeVar
+
+from .tracing import TraceContext
 
 
 class DataModel(BaseModel):
@@ -79,9 +81,34 @@ class Message(BaseModel, Generic[T]):
     assert isinstance(possible_image_or_tick_message.data, Tick)
     ```
     </details>
+
+    ## Tracing
+
+    A message can carry a `aact.messages.tracing.TraceContext` in its `trace` field, which nodes propagate from their
+    input to their output messages (see `aact.messages.tracing`). The `trace` field is left out of the serialized
+    message when it is `None`, so untraced messages are serialized as before.
     """
 
     data: T = Field(discriminator="data_type")
     """
     @private
     """
+    trace: TraceContext | None = Field(default=None)
+    """
+    @private
+    """
+
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler: SerializerFunctionWrapHandler) -> dict[str, Any]:
+        return drop_empty_trace(self.trace, handler(self))
+
+
+def drop_empty_trace(
+    trace: TraceContext | None, serialized: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    @private
+    """
+    if trace is None:
+        serialized.pop("trace", None)
+    return serialized
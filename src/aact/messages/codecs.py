@@ -0,0 +1,456 @@
+"""
+Wire codecs for messages.
+
+A codec turns a `Message` into the bytes that are published to a channel and back. Every payload
+on the wire is either
+
+1. a legacy JSON document (starts with `{`), which is what `aact` always used to send, or
+2. a framed payload whose first byte is a header: the low nibble is the codec id and the high
+   nibble holds flags. Codec id `0x0B` is reserved, as it would make the header `{` with all flags
+   but `FLAG_CLAIM_CHECK`. Flags announce optional fields between the header byte and the body:
+   - `FLAG_ORIGIN`: an 8-byte id of the process which published the message.
+   - `FLAG_SEQUENCE`: a `SequenceTag`, i.e., an 8-byte id of the publishing node and the 8-byte sequence number of
+     the message on its channel.
+
+   With `FLAG_COMPRESSED`, the body is compressed and prefixed with the id of its compressor (see
+   `aact.messages.compression`).
+
+   With `FLAG_CLAIM_CHECK` and codec id `0`, the body is not a message but the Redis key under which
+   the payload is stored (see `aact.nodes.claim_check`).
+
+Receivers sniff the first byte, so nodes with different codec settings can share a dataflow:
+a node only decides how it *sends* messages, and it can always read every codec it knows.
+"""
+
+import logging
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Generic, NamedTuple, TypeVar
+
+from pydantic import BaseModel
+
+from .compression import CompressionConfig, CompressorFactory
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+C = TypeVar("C", bound="Codec")
+
+CODEC_ID_MASK = 0x0F
+"""
+@private
+"""
+FLAG_COMPRESSED = 0x10
+"""
+@private
+"""
+FLAG_SEQUENCE = 0x20
+"""
+@private
+"""
+FLAG_ORIGIN = 0x40
+"""
+@private
+"""
+FLAG_CLAIM_CHECK = 0x80
+"""
+@private
+"""
+ORIGIN_SIZE = 8
+"""
+@private
+"""
+SEQUENCE_SIZE = 16
+"""
+@private
+"""
+
+BLOBS_CONTEXT_KEY = "aact_blobs"
+"""
+@private
+The key in the pydantic (de)serialization context holding out-of-band bytes fields.
+"""
+
+_LEGACY_JSON_PREFIX = b"{"[0]
+_RESERVED_CODEC_ID = _LEGACY_JSON_PREFIX & CODEC_ID_MASK
+_LENGTH = struct.Struct(">I")
+_SEQUENCE_NUMBER = struct.Struct(">Q")
+_TAG_FLAGS = FLAG_ORIGIN | FLAG_SEQUENCE
+
+
+class SequenceTag(NamedTuple):
+    """
+    The sequence number of a message among the messages of its producer on its channel.
+    """
+
+    producer: bytes
+    """
+    The 8-byte id of the publishing node, random for each node instance.
+    """
+    number: int
+
+
+class Codec(ABC):
+    """
+    The base class of all codecs. A codec encodes the body of a message; the header byte is
+    handled by `encode_message` and `decode_message`.
+    """
+
+    codec_id: int = 0
+    """
+    The id written into the header byte. It must be unique among the registered codecs and fit in
+    the low nibble of the header byte.
+    """
+    name: str = ""
+    """
+    The name used in the dataflow toml files. Set by `CodecFactory.register`.
+    """
+
+    @abstractmethod
+    def encode(self, message: BaseModel) -> bytes:
+        raise NotImplementedError("encode must be implemented in a subclass.")
+
+    @abstractmethod
+    def decode(self, body: bytes | memoryview, message_type: type[M]) -> M:
+        raise NotImplementedError("decode must be implemented in a subclass.")
+
+
+class CodecFactory:
+    """
+    To use a codec in the dataflow, it needs to be registered with `@CodecFactory.register`.
+
+    Example:
+    ```python
+    from aact.messages.codecs import Codec, CodecFactory
+
+    @CodecFactory.register("my_codec")
+    class MyCodec(Codec):
+        codec_id = 7
+        ...
+    ```
+    """
+
+    registry: dict[str, Codec] = {}
+    """
+    @private
+    """
+    id_registry: dict[int, Codec] = {}
+    """
+    @private
+    """
+
+    @classmethod
+    def register(cls, name: str) -> Callable[[type[C]], type[C]]:
+        def inner_wrapper(wrapped_class: type[C]) -> type[C]:
+            if not 0 < wrapped_class.codec_id <= CODEC_ID_MASK:
+                raise ValueError(
+                    f"Codec id of {name} must be in [1, {CODEC_ID_MASK}], got {wrapped_class.codec_id}"
+                )
+            if wrapped_class.codec_id == _RESERVED_CODEC_ID:
+                raise ValueError(
+                    f"Codec id {_RESERVED_CODEC_ID} of {name} is reserved: its headers could not be told apart "
+                    "from legacy JSON payloads"
+                )
+            if name in cls.registry:
+                logger.warning("Codec %s already exists. Will replace it", name)
+            elif wrapped_class.codec_id in cls.id_registry:
+                raise ValueError(
+                    f"Codec id {wrapped_class.codec_id} of {name} is already used by "
+                    f"{cls.id_registry[wrapped_class.codec_id].name}"
+                )
+            wrapped_class.name = name
+            instance = wrapped_class()
+            cls.registry[name] = instance
+            cls.id_registry[wrapped_class.codec_id] = instance
+            return wrapped_class
+
+        return inner_wrapper
+
+    @classmethod
+    def make(cls, name: str) -> Codec:
+        if name not in cls.registry:
+            raise ValueError(f"Codec {name} not found in registry")
+        return cls.registry[name]
+
+    @classmethod
+    def from_id(cls, codec_id: int) -> Codec:
+        if codec_id not in cls.id_registry:
+            raise ValueError(f"Codec id {codec_id} not found in registry")
+        return cls.id_registry[codec_id]
+
+
+@CodecFactory.register("json")
+class JSONCodec(Codec):
+    """
+    The default codec. Messages are sent as JSON documents, bytes fields are hex encoded.
+    """
+
+    codec_id = 1
+
+    def encode(self, message: BaseModel) -> bytes:
+        return message.model_dump_json().encode()
+
+    def decode(self, body: bytes | memoryview, message_type: type[M]) -> M:
+        return message_type.model_validate_json(
+            body if isinstance(body, bytes) else bytes(body)
+        )
+
+
+@CodecFactory.register("binary")
+class BinaryCodec(Codec):
+    """
+    A compact codec for messages carrying large bytes fields (e.g., `aact.messages.Image` and
+    `aact.messages.Audio`).
+
+    The body is a length-prefixed JSON document for the structure of the message, where every
+    bytes field is replaced by an index, followed by the raw bytes fields, each prefixed with its
+    length. Compared with the JSON codec this avoids hex encoding, which halves the payload size and
+    skips the encode/decode cost of the bytes fields.
+    """
+
+    codec_id = 2
+
+    def encode(self, message: BaseModel) -> bytes:
+        blobs: list[bytes] = []
+        structure = message.model_dump_json(context={BLOBS_CONTEXT_KEY: blobs}).encode()
+        parts = [_LENGTH.pack(len(structure)), structure]
+        for blob in blobs:
+            parts.append(_LENGTH.pack(len(blob)))
+            parts.append(blob)
+        return b"".join(parts)
+
+    def decode(self, body: bytes | memoryview, message_type: type[M]) -> M:
+        structure, blobs = self.split(body)
+        return message_type.model_validate_json(
+            bytes(structure), context={BLOBS_CONTEXT_KEY: [bytes(b) for b in blobs]}
+        )
+
+    @staticmethod
+    def split(body: bytes | memoryview) -> tuple[memoryview, list[memoryview]]:
+        """
+        Split a body into the JSON structure and the bytes fields, without copying them.
+        """
+        view = memoryview(body)
+        (structure_length,) = _LENGTH.unpack_from(view, 0)
+        offset = _LENGTH.size + structure_length
+        structure = view[_LENGTH.size : offset]
+        blobs: list[memoryview] = []
+        while offset < len(view):
+            (blob_length,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            blobs.append(view[offset : offset + blob_length])
+            offset += blob_length
+        return structure, blobs
+
+
+def encode_message(
+    message: BaseModel,
+    codec: Codec,
+    origin: bytes | None = None,
+    sequence: SequenceTag | None = None,
+    compression: CompressionConfig | None = None,
+) -> bytes:
+    """
+    Encode a message into a wire payload with the given codec, optionally tagged with the id of
+    the publishing process and a sequence number, and compressed if the body is large enough.
+
+    Without tags and compression, the JSON codec writes legacy payloads without a header byte so
+    that older nodes can still read them.
+    """
+    body = codec.encode(message)
+    header = codec.codec_id
+    if compression is not None and len(body) >= compression.min_size:
+        compressor = CompressorFactory.make(compression.algorithm)
+        body = bytes((compressor.compressor_id,)) + compressor.compress(
+            body, compression.level
+        )
+        header |= FLAG_COMPRESSED
+    elif origin is None and sequence is None and isinstance(codec, JSONCodec):
+        return body
+    return frame_payload(header, body, origin, sequence)
+
+
+def frame_payload(
+    header: int,
+    body: bytes | memoryview,
+    origin: bytes | None = None,
+    sequence: SequenceTag | None = None,
+) -> bytes:
+    """
+    @private
+    Prefix the body with the header byte and the tags.
+    """
+    tags = b""
+    if origin is not None:
+        if len(origin) != ORIGIN_SIZE:
+            raise ValueError(f"Origin must be {ORIGIN_SIZE} bytes, got {len(origin)}")
+        header |= FLAG_ORIGIN
+        tags += origin
+    if sequence is not None:
+        if len(sequence.producer) != ORIGIN_SIZE:
+            raise ValueError(
+                f"Producer must be {ORIGIN_SIZE} bytes, got {len(sequence.producer)}"
+            )
+        header |= FLAG_SEQUENCE
+        tags += sequence.producer + _SEQUENCE_NUMBER.pack(sequence.number)
+    return b"".join((bytes((header,)), tags, body))
+
+
+def body_offset(header: int) -> int:
+    """
+    @private
+    The offset of the body in a framed payload with the given header byte. Compressed bodies start with the id of
+    their compressor.
+    """
+    offset = 1
+    if header & FLAG_ORIGIN:
+        offset += ORIGIN_SIZE
+    if header & FLAG_SEQUENCE:
+        offset += SEQUENCE_SIZE
+    return offset
+
+
+def get_origin(payload: bytes | memoryview) -> bytes | None:
+    """
+    Get the id of the publishing process from a wire payload, if it is tagged.
+    """
+    if payload[0] != _LEGACY_JSON_PREFIX and payload[0] & FLAG_ORIGIN:
+        return bytes(payload[1 : 1 + ORIGIN_SIZE])
+    return None
+
+
+def get_sequence(payload: bytes | memoryview) -> SequenceTag | None:
+    """
+    Get the sequence number of a wire payload, if it is tagged.
+    """
+    header = payload[0]
+    if header == _LEGACY_JSON_PREFIX or not header & FLAG_SEQUENCE:
+        return None
+    offset = 1 + ORIGIN_SIZE if header & FLAG_ORIGIN else 1
+    (number,) = _SEQUENCE_NUMBER.unpack_from(payload, offset + ORIGIN_SIZE)
+    return SequenceTag(bytes(payload[offset : offset + ORIGIN_SIZE]), number)
+
+
+def decode_message(payload: bytes | memoryview, message_type: type[M]) -> M:
+    """
+    Decode a wire payload of any registered codec into a message of the given type.
+    """
+    header = payload[0]
+    if header == _LEGACY_JSON_PREFIX:
+        return message_type.model_validate_json(
+            payload if isinstance(payload, bytes) else bytes(payload)
+        )
+    codec = CodecFactory.from_id(header & CODEC_ID_MASK)
+    return codec.decode(get_body(payload), message_type)
+
+
+def get_body(payload: bytes | memoryview) -> bytes | memoryview:
+    """
+    @private
+    The body of a framed payload, decompressed if needed.
+    """
+    header = payload[0]
+    body = memoryview(payload)[body_offset(header) :]
+    if header & FLAG_COMPRESSED:
+        return CompressorFactory.from_id(body[0]).decompress(body[1:])
+    return body
+
+
+def retag_payload(
+    payload: bytes | memoryview,
+    origin: bytes | None,
+    sequence: SequenceTag | None = None,
+) -> bytes:
+    """
+    Replace the tags of a wire payload, without decoding it. With `origin=None` and `sequence=None`, the tags are
+    removed.
+    """
+    header = payload[0]
+    if header == _LEGACY_JSON_PREFIX:
+        if origin is None and sequence is None:
+            return bytes(payload)
+        header, body = JSONCodec.codec_id, memoryview(payload)
+    else:
+        header, body = header & ~_TAG_FLAGS, memoryview(payload)[body_offset(header) :]
+    if origin is None and sequence is None and header == JSONCodec.codec_id:
+        return bytes(body)
+    return frame_payload(header, body, origin, sequence)
+
+
+class RawMessage(Generic[M]):
+    """
+    A message kept as the payload it was received as. The payload is only decoded when the message is accessed, and
+    publishing a raw message sends its payload as is, whatever the codec of the output channel, without encoding it
+    again. Nodes receive raw messages instead of messages when `raw_input` is set.
+    """
+
+    def __init__(
+        self,
+        payload: bytes | memoryview | None,
+        message_type: type[M],
+        message: M | None = None,
+    ) -> None:
+        if payload is None and message is None:
+            raise ValueError("Either the payload or the message is required")
+        self._payload = payload
+        self.message_type = message_type
+        self._message = message
+
+    @property
+    def payload(self) -> bytes | memoryview:
+        """
+        The wire payload. Messages delivered through the local bus are encoded with the JSON codec on first access.
+        Payloads received through shared memory are views into the shared memory segment.
+        """
+        if self._payload is None:
+            self._payload = encode_message(self.message, CodecFactory.make("json"))
+        return self._payload
+
+    @property
+    def message(self) -> M:
+        """
+        The decoded message. The payload is decoded and validated on first access.
+        """
+        if self._message is None:
+            self._message = decode_message(self.payload, self.message_type)
+        return self._message
+
+    @property
+    def data(self) -> Any:
+        """
+        The data of the decoded message.
+        """
+        return getattr(self.message, "data")
+
+    @property
+    def trace(self) -> Any:
+        """
+        The trace context of the decoded message.
+        """
+        return getattr(self.message, "trace", None)
+
+    def json_body(self) -> bytes | None:
+        """
+        The JSON document of the message if it was sent with the JSON codec, without decoding it. `None` otherwise.
+        """
+        payload = self.payload
+        header = payload[0]
+        if header == _LEGACY_JSON_PREFIX:
+            return bytes(payload)
+        if header & ~(_TAG_FLAGS | FLAG_COMPRESSED) != JSONCodec.codec_id:
+            return None
+        return bytes(get_body(payload))
+
+    def blobs(self) -> list[memoryview]:
+        """
+        The bytes fields of a message sent with the binary codec, in the order of the fields, without decoding the
+        message or copying them (unless the message is compressed), e.g., to wrap an image with `numpy.frombuffer`.
+        """
+        payload = self.payload
+        header = payload[0]
+        if (
+            header == _LEGACY_JSON_PREFIX
+            or header & CODEC_ID_MASK != BinaryCodec.codec_id
+        ):
+            raise ValueError("Only messages sent with the binary codec have blobs")
+        return BinaryCodec.split(get_body(payload))[1]
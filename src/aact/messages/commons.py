@@ -1,16 +1,24 @@
 from datetime import datetime
-from typing import Any, Annotated, Generic, TypeVar
+from functools import cache
+import json
+from typing import Any, Annotated, Generic, Literal, TypeVar
 
 from .registry import DataModelFactory
-from .base import DataModel
+from .base import DataModel, Message, drop_empty_trace
+from .tracing import TraceContext
+from .codecs import BLOBS_CONTEXT_KEY, RawMessage
 from pydantic import (
     ConfigDict,
     Field,
     PlainValidator,
     PlainSerializer,
+    SerializationInfo,
+    ValidationInfo,
     WithJsonSchema,
     BaseModel,
+    SerializerFunctionWrapHandler,
     create_model,
+    model_serializer,
 )
 
 
@@ -34,20 +42,33 @@ class Float(DataModel):
     value: float
 
 
-def hex_bytes_validator(o: Any) -> bytes:
+def hex_bytes_validator(o: Any, info: ValidationInfo) -> bytes:
     if isinstance(o, bytes):
         return o
     elif isinstance(o, bytearray):
         return bytes(o)
     elif isinstance(o, str):
         return bytes.fromhex(o)
+    elif (
+        isinstance(o, int) and info.context and BLOBS_CONTEXT_KEY in info.context
+    ):  # out-of-band bytes field written by `aact.messages.codecs.BinaryCodec`
+        blob: bytes = info.context[BLOBS_CONTEXT_KEY][o]
+        return blob
     raise ValueError(f"Expected bytes, bytearray, or hex string, got {type(o)}")
 
 
+def hex_bytes_serializer(b: bytes, info: SerializationInfo) -> str | int:
+    if info.context and BLOBS_CONTEXT_KEY in info.context:
+        blobs: list[bytes] = info.context[BLOBS_CONTEXT_KEY]
+        blobs.append(b)
+        return len(blobs) - 1
+    return b.hex()
+
+
 HexBytes = Annotated[
     bytes,
     PlainValidator(hex_bytes_validator),
-    PlainSerializer(lambda b: b.hex()),
+    PlainSerializer(hex_bytes_serializer),
     WithJsonSchema({"type": "string"}),
 ]
 
@@ -67,6 +88,26 @@ class Audio(DataModel):
     audio: HexBytes
 
 
+@DataModelFactory.register("dead_letter")
+class DeadLetter(DataModel):
+    """
+    An input message which a node failed to decode or to handle, published on `deadletter:{node_name}`.
+    """
+
+    node_name: str
+    channel: str
+    """
+    The input channel of the message.
+    """
+    stage: Literal["decode", "handler"]
+    error: str
+    traceback: str
+    payload: HexBytes
+    """
+    The payload of the message as received. Publish it as a `aact.messages.RawMessage` to replay the message.
+    """
+
+
 T = TypeVar("T", bound=DataModel)
 
 
@@ -74,6 +115,42 @@ class DataEntry(BaseModel, Generic[T]):
     timestamp: datetime = Field(default_factory=datetime.now)
     channel: str
     data: T
+    trace: TraceContext | None = Field(default=None)
+
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler: SerializerFunctionWrapHandler) -> dict[str, Any]:
+        return drop_empty_trace(self.trace, handler(self))
+
+
+def dump_data_entry(
+    channel: str,
+    message: Message[T] | RawMessage[Any],
+    data_entry_type: type[DataEntry[T]],
+) -> str:
+    """
+    Dump the message received now on the channel as the JSON of a `DataEntry`. Raw messages sent with the JSON codec
+    are spliced into the entry without being validated, once checked to be a JSON object with `data`, so that a
+    malformed payload cannot corrupt a recording. Other messages are validated.
+    """
+    if isinstance(message, RawMessage):
+        body = message.json_body()
+        if body is not None and _is_message_json(body):
+            return (
+                f'{{"timestamp":"{datetime.now().isoformat()}",'
+                f'"channel":{json.dumps(channel)},{body[1:].decode()}'
+            )
+    return data_entry_type(
+        channel=channel, data=message.data, trace=message.trace
+    ).model_dump_json()
+
+
+def _is_message_json(body: bytes) -> bool:
+    # Parsing the JSON is much cheaper than validating the message.
+    try:
+        parsed = json.loads(body)
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and "data" in parsed
 
 
 @DataModelFactory.register("rest_request")
@@ -90,6 +167,7 @@ class RestResponse(DataModel):
     data: DataModel | None
 
 
+@cache
 def get_rest_request_class(data_model: type[T]) -> type[RestRequest]:
     new_class = create_model(
         f"RestRequest[{data_model.__name__}]",
@@ -99,6 +177,7 @@ def get_rest_request_class(data_model: type[T]) -> type[RestRequest]:
     return new_class
 
 
+@cache
 def get_rest_response_class(data_model: type[T]) -> type[RestResponse]:
     new_class = create_model(
         f"RestResponse[{data_model.__name__}]",
@@ -0,0 +1,163 @@
+"""
+Compression of message bodies. Channels with a `CompressionConfig` compress the encoded body of their messages with
+the configured compressor when the body has at least `min_size` bytes. Compressed payloads have `FLAG_COMPRESSED` set
+in their header byte and the id of the compressor in the byte before the body (see `aact.messages.codecs`), so
+receivers decompress them transparently, whatever their own compression settings.
+
+Built-in compressors:
+
+- `"zlib"`: from the standard library, with `level` from `0` (fastest) to `9` (smallest), default `6`.
+- `"lz4"`: much faster than zlib at a lower ratio, when the `lz4` package is installed.
+"""
+
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable, TypeVar
+
+from pydantic import BaseModel, Field
+
+try:
+    import lz4.frame  # type: ignore[import-not-found,import-untyped,unused-ignore]
+
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+C = TypeVar("C", bound="Compressor")
+
+
+class CompressionConfig(BaseModel):
+    algorithm: str = Field(default="zlib")
+    """
+    The name of a compressor registered with `CompressorFactory`.
+    """
+    level: int | None = Field(default=None)
+    """
+    The compression level. `None` uses the default level of the compressor.
+    """
+    min_size: int = Field(default=1024, ge=0)
+    """
+    The minimum size of an encoded message body to be compressed. Small bodies barely shrink.
+    """
+
+
+class Compressor(ABC):
+    """
+    The base class of all compressors.
+    """
+
+    compressor_id: int = 0
+    """
+    The id written before compressed bodies. It must be unique among the registered compressors and fit in a byte.
+    """
+    name: str = ""
+    """
+    The name used in the dataflow toml files. Set by `CompressorFactory.register`.
+    """
+
+    def check_available(self) -> None:
+        """
+        Raise an `ImportError` if the compressor cannot be used in this environment.
+        """
+
+    @abstractmethod
+    def compress(self, data: bytes | memoryview, level: int | None) -> bytes:
+        raise NotImplementedError("compress must be implemented in a subclass.")
+
+    @abstractmethod
+    def decompress(self, data: bytes | memoryview) -> bytes:
+        raise NotImplementedError("decompress must be implemented in a subclass.")
+
+
+class CompressorFactory:
+    """
+    To use a compressor in the dataflow, it needs to be registered with `@CompressorFactory.register`.
+
+    Example:
+    ```python
+    from aact.messages.compression import Compressor, CompressorFactory
+
+    @CompressorFactory.register("my_compressor")
+    class MyCompressor(Compressor):
+        compressor_id = 7
+        ...
+    ```
+    """
+
+    registry: dict[str, Compressor] = {}
+    """
+    @private
+    """
+    id_registry: dict[int, Compressor] = {}
+    """
+    @private
+    """
+
+    @classmethod
+    def register(cls, name: str) -> Callable[[type[C]], type[C]]:
+        def inner_wrapper(wrapped_class: type[C]) -> type[C]:
+            if not 0 < wrapped_class.compressor_id <= 0xFF:
+                raise ValueError(
+                    f"Compressor id of {name} must be in [1, 255], got {wrapped_class.compressor_id}"
+                )
+            if name in cls.registry:
+                logger.warning("Compressor %s already exists. Will replace it", name)
+            elif wrapped_class.compressor_id in cls.id_registry:
+                raise ValueError(
+                    f"Compressor id {wrapped_class.compressor_id} of {name} is already used by "
+                    f"{cls.id_registry[wrapped_class.compressor_id].name}"
+                )
+            wrapped_class.name = name
+            instance = wrapped_class()
+            cls.registry[name] = instance
+            cls.id_registry[wrapped_class.compressor_id] = instance
+            return wrapped_class
+
+        return inner_wrapper
+
+    @classmethod
+    def make(cls, name: str) -> Compressor:
+        if name not in cls.registry:
+            raise ValueError(f"Compressor {name} not found in registry")
+        return cls.registry[name]
+
+    @classmethod
+    def from_id(cls, compressor_id: int) -> Compressor:
+        if compressor_id not in cls.id_registry:
+            raise ValueError(f"Unknown compressor id {compressor_id}")
+        return cls.id_registry[compressor_id]
+
+
+@CompressorFactory.register("zlib")
+class ZlibCompressor(Compressor):
+    compressor_id = 1
+
+    def compress(self, data: bytes | memoryview, level: int | None) -> bytes:
+        return zlib.compress(data, 6 if level is None else level)
+
+    def decompress(self, data: bytes | memoryview) -> bytes:
+        return zlib.decompress(data)
+
+
+@CompressorFactory.register("lz4")
+class LZ4Compressor(Compressor):
+    compressor_id = 2
+
+    def check_available(self) -> None:
+        if not LZ4_AVAILABLE:
+            raise ImportError(
+                "lz4 is not available. Please install it with `pip install lz4` to use the lz4 compressor."
+            )
+
+    def compress(self, data: bytes | memoryview, level: int | None) -> bytes:
+        self.check_available()
+        compressed: bytes = lz4.frame.compress(data, compression_level=level or 0)
+        return compressed
+
+    def decompress(self, data: bytes | memoryview) -> bytes:
+        self.check_available()
+        decompressed: bytes = lz4.frame.decompress(data)
+        return decompressed
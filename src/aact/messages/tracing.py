@@ -0,0 +1,184 @@
+"""
+End-to-end tracing of messages through a dataflow.
+
+A message can carry a `TraceContext` in its `trace` field. The default event loop of a node propagates the trace of
+an input message to the output messages of its handler: each output is a new span of the same trace, whose parent is
+the span of the input message. Nodes with `tracing` enabled start a new trace for the messages they publish without
+one, e.g., the audio frames of a listener node.
+
+The `TraceCollector` reconstructs the traces from recordings of `aact.nodes.record.RecordNode` and breaks down their
+latency per hop:
+
+```python
+from aact.messages.tracing import TraceCollector
+
+collector = TraceCollector.from_jsonl("recording.jsonl")
+for trace_id, hops in collector.breakdowns().items():
+    print(trace_id, [(hop.producer, hop.channel, hop.latency) for hop in hops])
+```
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class TraceContext(BaseModel):
+    trace_id: str
+    span_id: str
+    """
+    The id of the span of this message.
+    """
+    parent_span_id: str | None = Field(default=None)
+    """
+    The span of the input message this message was produced from, `None` for the first message of a trace.
+    """
+    producer: str
+    """
+    The name of the node which published this message.
+    """
+    hop: int = Field(default=0)
+    """
+    The number of nodes the trace went through before this message.
+    """
+    started_at: float
+    """
+    The wall-clock time the trace started at, in seconds since the epoch.
+    """
+    sent_at: float
+    """
+    The wall-clock time this message was produced at, in seconds since the epoch.
+    """
+    sent_monotonic: float
+    """
+    `time.monotonic()` when this message was produced. Only comparable between nodes on the same host.
+    """
+
+    @classmethod
+    def start(cls, producer: str) -> "TraceContext":
+        """
+        Start a new trace.
+        """
+        now = time.time()
+        return cls(
+            trace_id=os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            producer=producer,
+            started_at=now,
+            sent_at=now,
+            sent_monotonic=time.monotonic(),
+        )
+
+    def child(self, producer: str) -> "TraceContext":
+        """
+        The trace context of a message produced from the message with this trace context.
+        """
+        return TraceContext(
+            trace_id=self.trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_span_id=self.span_id,
+            producer=producer,
+            hop=self.hop + 1,
+            started_at=self.started_at,
+            sent_at=time.time(),
+            sent_monotonic=time.monotonic(),
+        )
+
+
+class TracedEntry(BaseModel):
+    """
+    A line of a recording, without its data.
+    """
+
+    timestamp: datetime
+    channel: str
+    trace: TraceContext | None = Field(default=None)
+
+
+class Hop(BaseModel):
+    """
+    A message of a trace.
+    """
+
+    producer: str
+    channel: str
+    hop: int
+    sent_at: float
+    latency: float | None
+    """
+    The time from the parent message being sent to this message being sent, i.e., the transport and handling time of
+    the producer. `None` if the parent message was not recorded.
+    """
+    since_start: float
+    """
+    The time from the start of the trace to this message being sent.
+    """
+
+
+class TraceCollector:
+    """
+    Collects the traced messages of recordings and reconstructs the traces.
+    """
+
+    def __init__(self) -> None:
+        self.spans: dict[str, dict[str, TracedEntry]] = {}
+        """
+        The recorded messages by trace id and span id.
+        """
+
+    @classmethod
+    def from_jsonl(cls, *paths: str) -> "TraceCollector":
+        collector = cls()
+        for path in paths:
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        collector.add(TracedEntry.model_validate(json.loads(line)))
+        return collector
+
+    def add(self, entry: TracedEntry) -> None:
+        if entry.trace is not None:
+            self.spans.setdefault(entry.trace.trace_id, {})[entry.trace.span_id] = entry
+
+    def breakdown(self, trace_id: str) -> list[Hop]:
+        """
+        The recorded messages of a trace in the order they were sent.
+        """
+        spans = self.spans[trace_id]
+        hops: list[Hop] = []
+        for entry in spans.values():
+            assert entry.trace is not None
+            trace = entry.trace
+            parent = spans.get(trace.parent_span_id or "")
+            latency = None
+            if parent is not None:
+                assert parent.trace is not None
+                if parent.trace.producer == trace.producer or _same_host(parent, entry):
+                    latency = trace.sent_monotonic - parent.trace.sent_monotonic
+                else:
+                    latency = trace.sent_at - parent.trace.sent_at
+            hops.append(
+                Hop(
+                    producer=trace.producer,
+                    channel=entry.channel,
+                    hop=trace.hop,
+                    sent_at=trace.sent_at,
+                    latency=latency,
+                    since_start=trace.sent_at - trace.started_at,
+                )
+            )
+        return sorted(hops, key=lambda hop: (hop.sent_at, hop.hop))
+
+    def breakdowns(self) -> dict[str, list[Hop]]:
+        return {trace_id: self.breakdown(trace_id) for trace_id in self.spans}
+
+
+def _same_host(parent: TracedEntry, child: TracedEntry) -> bool:
+    # Monotonic clocks of one host agree with each other as much as their wall clocks do.
+    assert parent.trace is not None and child.trace is not None
+    wall = child.trace.sent_at - parent.trace.sent_at
+    monotonic = child.trace.sent_monotonic - parent.trace.sent_monotonic
+    return abs(wall - monotonic) < 0.01
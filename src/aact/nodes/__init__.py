@@ -6,19 +6,51 @@ A node specifies the input and output channels and types.
 All nodes must inherit from the `aact.Node` class.
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .base import Node
-from .tick import TickNode
-from .random import RandomNode
-from .record import RecordNode
-from .listener import ListenerNode
-from .speaker import SpeakerNode
-from .transcriber import TranscriberNode
-from .performance import PerformanceMeasureNode
-from .print import PrintNode
-from .tts import TTSNode
 from .registry import NodeFactory
-from .api import RestAPINode
-from .special_print import SpecialPrintNode
+
+if TYPE_CHECKING:
+    from .tick import TickNode
+    from .random import RandomNode
+    from .record import RecordNode
+    from .listener import ListenerNode
+    from .speaker import SpeakerNode
+    from .transcriber import TranscriberNode
+    from .performance import PerformanceMeasureNode
+    from .print import PrintNode
+    from .tts import TTSNode
+    from .api import RestAPINode
+    from .special_print import SpecialPrintNode
+
+# The built-in nodes by class name, with their registered name and module. Their modules (and their dependencies,
+# e.g., aiohttp or pyaudio) are only imported when a node is made or its class is accessed.
+_BUILTIN_NODES: dict[str, tuple[str, str]] = {
+    "TickNode": ("tick", "tick"),
+    "RandomNode": ("random", "random"),
+    "RecordNode": ("record", "record"),
+    "ListenerNode": ("listener", "listener"),
+    "SpeakerNode": ("speaker", "speaker"),
+    "TranscriberNode": ("transcriber", "transcriber"),
+    "PerformanceMeasureNode": ("performance", "performance"),
+    "PrintNode": ("print", "print"),
+    "TTSNode": ("tts", "tts"),
+    "RestAPINode": ("rest_api", "api"),
+    "SpecialPrintNode": ("special_print", "special_print"),
+}
+
+for _node_name, _module in _BUILTIN_NODES.values():
+    NodeFactory.register_lazy(_node_name, f"{__name__}.{_module}")
+
+
+def __getattr__(name: str) -> Any:
+    if name in _BUILTIN_NODES:
+        module = importlib.import_module(f"{__name__}.{_BUILTIN_NODES[name][1]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "Node",
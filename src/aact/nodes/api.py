@@ -132,9 +132,9 @@ class RestAPINode(Node[RestRequest, RestResponse]):
                 headers={"Content-Type": message.content_type},
             ) as response:
                 response_data = await _parse_response(response, self.response_class)
-        await self.r.publish(
+        await self.publish(
             self.output_channel,
-            Message[self.response_class](data=response_data).model_dump_json(),  # type: ignore[name-defined]
+            Message[self.response_class](data=response_data),  # type: ignore[name-defined]
         )
 
     async def event_handler(
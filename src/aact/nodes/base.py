@@ -1,20 +1,63 @@
 from asyncio import CancelledError
 import asyncio
 import logging
+import os
+import time
+import traceback
+from collections import defaultdict
 
 from ..utils import Self
-from typing import Any, AsyncIterator, Generic, Literal, Type, TypeVar
+from typing import Any, AsyncIterator, Coroutine, Generic, Literal, Type, TypeVar
 from pydantic import BaseModel, ConfigDict, ValidationError
 
 from abc import abstractmethod
-from ..messages import Message, Tick
-from redis.asyncio import Redis
+from ..messages import Message
+from redis.asyncio import ConnectionPool, Redis
 
 from ..messages.base import DataModel
+from ..messages.commons import DeadLetter
+from ..messages.compression import CompressionConfig, CompressorFactory
+from ..messages.tracing import TraceContext
+from ..messages.codecs import (
+    Codec,
+    CodecFactory,
+    RawMessage,
+    decode_message,
+    ORIGIN_SIZE,
+    SequenceTag,
+    encode_message,
+    get_origin,
+    get_sequence,
+    retag_payload,
+)
+from .claim_check import ClaimCheckStore, get_claim_check_key
+from .health import HEARTBEAT_INTERVAL, HealthRegistry, NodeStats
+from .metrics import NodeMetrics, serve_metrics
+from .offload import OffloadPools
+from .queues import InputQueueConfig, InputQueues
+from .replicas import Partitioner
+from .sequences import SequenceTracker
+from .transports import (
+    LocalBus,
+    PublishBatcher,
+    PubSubTransport,
+    ReceivedPayload,
+    SharedMemoryTransport,
+    StreamsTransport,
+    Transport,
+    TransportFactory,
+)
+from aiostream import stream
 
 InputType = TypeVar("InputType", covariant=True, bound=DataModel)
 OutputType = TypeVar("OutputType", covariant=True, bound=DataModel)
 
+Ordering = Literal["unordered", "ordered-per-channel", "ordered-global"]
+
+ErrorPolicy = Literal["raise", "skip", "dead_letter"]
+
+_Outputs = asyncio.Queue[tuple[str, Any] | None]
+
 
 class NodeExitSignal(CancelledError):
     """Node exit signal, which is raised in nodes' event handler. It is used to exit the node gracefully."""
@@ -75,17 +118,319 @@ class Node(BaseModel, Generic[InputType, OutputType]):
     ### Send messages on your own
 
     The default behavior of sending messages in the base Node class is handled in the `event_loop` method. If you want to
-    send messages on your own, you can directly use the Redis instance `r` to publish messages to the output channels.
+    send messages on your own, use the `publish` method, which encodes the message with the codec of the channel.
 
     ```python
 
     class YourNode(Node[InputType, OutputType]):
 
         async def func_where_you_send_messages(self):
-            await self.r.publish(your_output_channel, Message[OutputType](data=your_output_message).model_dump_json())
+            await self.publish(your_output_channel, Message[OutputType](data=your_output_message))
+
+    ```
+
+    ### Wire codecs
+
+    Messages are encoded as JSON by default. Channels carrying large bytes payloads (e.g., `aact.messages.Image` and
+    `aact.messages.Audio`) can use the `"binary"` codec, which sends bytes fields raw instead of hex encoded. Codecs are
+    set per dataflow with an optional per-channel override in the dataflow toml:
+
+    ```toml
+    codec = "json"
+
+    [channel_codecs]
+    "camera/image" = "binary"
+    ```
+
+    The codec only affects how a node sends messages. Every payload carries its codec in a header byte, so receivers
+    decode any registered codec regardless of their own settings. See `aact.messages.codecs` for details.
+
+    ### Compression
+
+    Channels carrying compressible messages (e.g., long texts or raw PCM audio) can compress the encoded messages above
+    a size threshold, per dataflow with an optional per-node override in the dataflow toml:
+
+    ```toml
+    [channel_compression]
+    "transcript" = { algorithm = "zlib", level = 1, min_size = 1024 }
+    "mic/audio" = { algorithm = "lz4" }  # requires the lz4 package
+    ```
+
+    Like codecs, compression only affects how a node sends messages; receivers decompress any registered compressor.
+    See `aact.messages.compression` for details.
+
+    ### Transports
+
+    Channels use Redis Pub/Sub by default. Channels whose messages must not be lost, or which are consumed by several
+    replicas of one node, can use Redis Streams with consumer groups instead. Both the publishers and the subscribers of
+    a channel need to use the same transport, so transports are usually set for the whole dataflow:
+
+    ```toml
+    [channel_transports]
+    "audio/transcript" = "streams"
+
+    [transport_options.streams]
+    max_len = 10000
+    ```
+
+    Replicas of one node share the messages of a streams channel when they are in the same consumer group, e.g. by
+    setting `transport_options.streams.consumer_group` on each of them. See `aact.nodes.transports` for details.
+
+    Nodes on the same host can move large payloads (e.g., camera frames) through shared memory with the `"shm"`
+    transport: the payload is written once into a ring buffer of the publisher and receivers read it in place. Use it
+    with the binary codec to avoid hex encoding the frames:
+
+    ```toml
+    [channel_transports]
+    "camera/image" = "shm"
+
+    [channel_codecs]
+    "camera/image" = "binary"
+
+    [transport_options.shm]
+    segment_size = 268435456  # room for about 40 full HD frames
+    ```
+
+    Nodes running in the same process (e.g., `async with node_a, node_b:`) exchange messages of Pub/Sub channels
+    through an in-process `aact.nodes.transports.LocalBus`: messages are handed over as Python objects without being
+    encoded, and are only published to Redis if there are subscribers in other processes. Messages received this way
+    are shared with the other local subscribers, so do not modify them. Set `use_local_bus` to `False` before entering
+    the node to opt out.
+
+    ### Publish batching
+
+    Published messages are queued and sent to Redis in pipelines, so that publishing many messages at once, e.g., a
+    handler yielding several outputs or several background tasks publishing together, costs a single round trip.
+    `publish_max_delay_ms` (default `0`) delays the flush to batch more messages at the cost of latency, and
+    `publish_max_batch_size` (default `64`) bounds the queue; set it to `1` to send each message on its own. Queued
+    messages are flushed when the node exits. Since `publish` returns before the message is sent, a failure to send it
+    is raised by a later `publish`.
+
+    ### Claim checks
+
+    Redis sends every Pub/Sub message to each subscriber, which makes large payloads fanned out to several nodes
+    expensive. With `claim_check_threshold` set, payloads of at least that many bytes are stored once in Redis under a
+    key expiring after `claim_check_ttl_ms` (default `60000`), and only a reference to the key is published. Receivers
+    fetch the payload transparently; messages whose key has expired are dropped with a warning.
+
+    ```toml
+    [[nodes]]
+    node_name = "camera"
+    node_class = "camera"
+    claim_check_threshold = 262144
+    ```
+
+    ### Input queues
+
+    By default, input messages are handled in the order they arrive, however far behind the node is. Nodes that would
+    rather skip messages than lag behind can buffer the messages of each input channel with a bounded queue and a
+    policy deciding what to drop when it is full (see `aact.nodes.queues`):
+
+    ```toml
+    [nodes.input_queues."camera/image"]
+    policy = "latest_only"
+
+    [nodes.input_queues."audio/frames"]
+    max_depth = 50
+    policy = "drop_oldest"
+    ```
+
+    Channels without a queue are still read one message at a time, as fast as the node handles them. The number of
+    dropped messages per channel is available as `dropped_messages`.
+
+    ### Concurrent event handlers
+
+    By default, a node handles one input message at a time: the next message is only read after the `event_handler` of
+    the previous one has finished. Nodes whose handlers mostly wait on I/O (e.g., REST or LLM calls) can handle up to
+    `max_concurrency` messages at once. `ordering` decides in which order the output messages are sent:
+
+    - `"ordered-global"` (default): outputs are sent in the order of the input messages. Outputs of a message that
+        finished early are held back until the outputs of all earlier messages are sent.
+    - `"ordered-per-channel"`: the same, but only among the messages of the same input channel.
+    - `"unordered"`: outputs are sent as soon as they are produced.
+
+    ```toml
+    [[nodes]]
+    node_name = "api_node"
+    node_class = "rest_api"
+    max_concurrency = 8
+    ordering = "ordered-per-channel"
+    ```
+
+    Handlers running concurrently share the node, so they must not rely on the state of the node staying the same
+    across `await`s. For messages of streams channels, the acknowledgement is sent when the message is dispatched to a
+    handler rather than when the handler finishes.
+
+    ### Blocking and CPU-bound handlers
+
+    A blocking call in the `event_handler` freezes the event loop of the node, including receiving messages and sending
+    heartbeats. Write such handlers as synchronous functions and decorate them with `aact.nodes.offload.offload` to run
+    them in a thread pool (for blocking I/O) or a process pool (for CPU-bound work) with `offload_workers` workers:
+
+    ```python
+    class YourNode(Node[Text, Text]):
+        @offload("thread")
+        def event_handler(
+            self, input_channel: str, input_message: Message[Text]
+        ) -> Iterator[tuple[str, Message[Text]]]:
+            yield "reply", Message[Text](data=Text(text=blocking_call(input_message.data.text)))
+    ```
+
+    Set `max_concurrency` to handle several messages in the pool at once.
+
+    ### Event loop
+
+    `aact run-dataflow` runs each node on the asyncio event loop by default. Message-heavy nodes spending their time in
+    the event loop itself run faster on [uvloop](https://github.com/MagicStack/uvloop), set per dataflow with an
+    optional per-node override in the dataflow toml:
+
+    ```toml
+    event_loop = "uvloop"
+
+    [[nodes]]
+    node_name = "print"
+    node_class = "print"
+    event_loop = "asyncio"
+    ```
+
+    Install uvloop with `pip install aact[uvloop]`: nodes set to run on uvloop fail to start when it is not installed.
+    Compare both with `examples/benchmarks/event_loop.py`.
+
+    ### Raw messages
+
+    Nodes which only forward or store messages (e.g., `aact.nodes.record.RecordNode`) do not need to validate them.
+    With `self.raw_input = True`, the `event_handler` receives `aact.messages.RawMessage`s, which keep the received
+    payload and only decode it when the message is accessed. Publishing a raw message sends its payload without
+    encoding it again:
+
+    ```python
+    class RelayNode(Node[Image, Image]):
+        def __init__(self, ...):
+            super().__init__(...)
+            self.raw_input = True
+
+        async def event_handler(
+            self, input_channel: str, input_message: Message[Image]
+        ) -> AsyncIterator[tuple[str, Message[Image]]]:
+            yield "relayed_image", input_message
+    ```
+
+    ### Micro-batching
+
+    Nodes doing vectorizable work (e.g., embedding or classifying with a model) can handle several input messages of a
+    channel in one call by overriding `batch_event_handler` and setting `max_batch_size`. A batch is handed to the
+    handler when it has `max_batch_size` messages, when `max_batch_wait_ms` (default `10`) have passed since its first
+    message, or when a message of another input channel arrives. The handler returns the outputs of each input message,
+    in the order of the input messages:
+
+    ```python
+    class EmbeddingNode(Node[Text, Embedding]):
+        async def batch_event_handler(
+            self, input_channel: str, input_messages: list[Message[Text]]
+        ) -> list[list[tuple[str, Message[Embedding]]]]:
+            vectors = self.model.encode([message.data.text for message in input_messages])
+            return [[("embedding", Message[Embedding](data=Embedding(vector=vector)))] for vector in vectors]
 
+        async def event_handler(
+            self, input_channel: str, input_message: Message[Text]
+        ) -> AsyncIterator[tuple[str, Message[Embedding]]]:
+            for output in (await self.batch_event_handler(input_channel, [input_message]))[0]:
+                yield output
     ```
 
+    ```toml
+    [[nodes]]
+    node_name = "embedding"
+    node_class = "embedding"
+    max_batch_size = 32
+    max_batch_wait_ms = 5
+    ```
+
+    Batching composes with `max_concurrency`: each batch is then handled as one unit. For messages of streams
+    channels, the acknowledgement is sent when the message is added to a batch.
+
+    ### Replicas
+
+    A CPU-bound node can run as several replicas, each in its own process, splitting the input messages among them
+    (see `aact.nodes.replicas`). Messages of channels with a `partition_key` go to the replica given by the hash of the
+    key; messages of other channels are spread evenly, by their sequence number or the checksum of their payload. All
+    replicas publish onto the same output channels:
+
+    ```toml
+    [[nodes]]
+    node_name = "transcriber"
+    node_class = "transcriber"
+    replicas = 4
+    partition_key = { "mic/audio" = "data.session_id" }
+    ```
+
+    The replicas are named `transcriber-0` to `transcriber-3`. Replica `i` serves its metrics on `metrics_port + i`, and
+    a `consumer_name` set in the `transport_options` becomes `{consumer_name}-{i}`.
+
+    ### Error handling
+
+    By default, an input message failing to decode (e.g., a malformed message from a buggy producer) or an exception
+    raised by the `event_handler` stops the node. Set `error_policy` to keep the node running instead: `"skip"` drops
+    the message, and `"dead_letter"` also publishes it as a `aact.messages.DeadLetter`, with the error and its traceback,
+    on the `deadletter:{node_name}` channel. Either way, the message is counted in `metrics.failed` and logged:
+
+    ```toml
+    [[nodes]]
+    node_name = "transcriber"
+    node_class = "transcriber"
+    error_policy = "dead_letter"
+    ```
+
+    Outputs published by the `event_handler` before it raised are not taken back. With a `batch_event_handler`, an
+    exception fails every message of the batch.
+
+    ### Metrics
+
+    Every node counts the messages it receives and publishes and records latency histograms (from receiving a message
+    to handling it, handler duration, and publish duration) per channel in `metrics` (see `aact.nodes.metrics`). Set
+    `metrics_port` to serve them to Prometheus, or `metrics_snapshots` to write them into the health registry with each
+    heartbeat:
+
+    ```toml
+    [[nodes]]
+    node_name = "transcriber"
+    node_class = "transcriber"
+    metrics_port = 9100
+    ```
+
+    ### Tracing
+
+    Input messages carrying a trace (see `aact.messages.tracing`) pass it on to the output messages of the default event
+    loop: each output message gets a new span of the trace, with the input message as its parent. Set `tracing` to
+    start a new trace for each message the node publishes without one, e.g., in the nodes at the start of a pipeline:
+
+    ```toml
+    [[nodes]]
+    node_name = "listener"
+    node_class = "listener"
+    tracing = true
+    ```
+
+    Record the traced channels with a `aact.nodes.record.RecordNode` and break down the latency of each trace with
+    `aact.messages.tracing.TraceCollector`. Raw messages are forwarded with the trace they were received with.
+
+    ### Sequence numbers
+
+    Redis Pub/Sub silently drops messages for subscribers which are too slow or reconnecting. With `sequence_numbers`
+    set, a node numbers the messages it publishes per output channel, and the receiving nodes count the messages lost,
+    duplicated or reordered on the way in their `metrics` (see `aact.nodes.sequences`). They log a warning about a
+    channel at most once per `sequence_warning_interval_ms` (default `10000`, `0` disables the warnings):
+
+    ```toml
+    [[nodes]]
+    node_name = "listener"
+    node_class = "listener"
+    sequence_numbers = true
+    ```
+
+    Tagged payloads have a header byte, so only enable it when the receivers run a version of `aact` that knows the
+    tag.
+
     ### Customize set up and tear down
 
     You can customize the set up and tear down of the node by overriding the `__aenter__` and `__aexit__` methods. For
@@ -219,7 +564,21 @@ class Node(BaseModel, Generic[InputType, OutputType]):
         """
         @private
         """
-        self.pubsub = self.r.pubsub()
+        # Parametrizing `Message` is a cache lookup in pydantic, but too slow to do for every message.
+        self._input_message_types: dict[str, type[Message[InputType]]] = {
+            channel: Message[message_type]  # type: ignore[valid-type]
+            for channel, message_type in self.input_channel_types.items()
+        }
+        pubsub_transport = PubSubTransport(self.r, node_name)
+        self.pubsub = pubsub_transport.pubsub
+        """
+        @private
+        """
+        self.transports: dict[str, Transport] = {"pubsub": pubsub_transport}
+        """
+        @private
+        """
+        self.channel_transports: dict[str, Transport] = {}
         """
         @private
         """
@@ -228,6 +587,269 @@ class Node(BaseModel, Generic[InputType, OutputType]):
         @private
         """
         self._background_tasks: list[asyncio.Task[None]] = []
+        self.codec: Codec = CodecFactory.make("json")
+        """
+        The codec used to encode output messages.
+        """
+        self.channel_codecs: dict[str, Codec] = {}
+        """
+        Per-channel overrides of `codec`.
+        """
+        self.channel_compression: dict[str, CompressionConfig] = {}
+        """
+        The compression settings of output channels. Messages of other channels are not compressed.
+        """
+        self.use_local_bus: bool = True
+        """
+        Whether to exchange messages with nodes in the same process through the `LocalBus`.
+        """
+        self.input_queues: dict[str, InputQueueConfig] = {}
+        """
+        The settings of the input queues. Without any, input messages are not buffered.
+        """
+        self._input_queues: InputQueues | None = None
+        self.publish_max_batch_size: int = 64
+        """
+        The maximum number of published messages sent in one pipeline. `1` disables batching.
+        """
+        self.publish_max_delay_ms: float = 0.0
+        """
+        How long published messages are held back to be batched with later ones.
+        """
+        self._batcher: PublishBatcher | None = None
+        self.max_concurrency: int = 1
+        """
+        The maximum number of input messages handled concurrently by the default `event_loop`.
+        """
+        self.ordering: Ordering = "ordered-global"
+        """
+        The order in which outputs of concurrently handled messages are sent.
+        """
+        self.max_batch_size: int = 1
+        """
+        The maximum number of input messages handled in one call of `batch_event_handler`. `1` disables batching.
+        """
+        self.max_batch_wait_ms: float = 10.0
+        """
+        How long to wait for more input messages after the first message of a batch.
+        """
+        self.claim_check_threshold: int = 0
+        """
+        Payloads of at least this many bytes are published as claim checks. `0` disables claim checks.
+        """
+        self.claim_check_ttl_ms: int = 60000
+        """
+        How long payloads published as claim checks are kept in Redis.
+        """
+        self._claim_checks = ClaimCheckStore(self.r)
+        self.messages_received: int = 0
+        """
+        The number of input messages handed to the event loop.
+        """
+        self.messages_published: int = 0
+        """
+        The number of messages published by the node.
+        """
+        self.metrics = NodeMetrics()
+        """
+        The per-channel counters and latency histograms of the node.
+        """
+        self.metrics_port: int | None = None
+        """
+        The port serving the metrics in the Prometheus text format. `None` disables the endpoint.
+        """
+        self.metrics_host: str = "127.0.0.1"
+        """
+        The host the metrics endpoint binds to.
+        """
+        self.metrics_snapshots: bool = False
+        """
+        Whether to write the metrics into the health registry with each heartbeat.
+        """
+        self.health_namespace: str | None = None
+        """
+        The namespace of the node in the health registry (see `aact.nodes.health`), set by the `NodeManager`.
+        """
+        self._metrics_server: asyncio.Server | None = None
+        self.tracing: bool = False
+        """
+        Whether to start a new trace for each published message without one.
+        """
+        self.sequence_numbers: bool = False
+        """
+        Whether to tag published messages with sequence numbers.
+        """
+        self.sequence_warning_interval_ms: float = 10000.0
+        """
+        The minimum time between two warnings about lost, duplicated or reordered input messages of a channel. `0`
+        disables the warnings.
+        """
+        self._producer_id = os.urandom(ORIGIN_SIZE)
+        self._next_sequence_numbers: defaultdict[str, int] = defaultdict(int)
+        self._sequences = SequenceTracker()
+        self._sequence_warned_at: dict[str, float] = {}
+        self._partitioner: Partitioner | None = None
+        self.offload_workers: int = 4
+        """
+        The number of workers of the thread and process pools running offloaded event handlers.
+        """
+        self._offload_pools = OffloadPools()
+        self.error_policy: ErrorPolicy = "raise"
+        """
+        What to do with input messages which fail to decode or to be handled: stop the node (`"raise"`), drop them
+        (`"skip"`), or publish them on the `dead_letter_channel` (`"dead_letter"`).
+        """
+        self.raw_input: bool = False
+        """
+        Whether the input messages are handed to the `event_handler` as `aact.messages.RawMessage`s.
+        """
+        self._local_bus: LocalBus | None = None
+        self._local_inbox: asyncio.Queue[ReceivedPayload] = asyncio.Queue()
+
+    def set_codecs(
+        self, codec: str, channel_codecs: dict[str, str] | None = None
+    ) -> None:
+        """
+        Set the codec of output messages by codec names, with optional per-channel overrides.
+        """
+        self.codec = CodecFactory.make(codec)
+        self.channel_codecs = {
+            channel: CodecFactory.make(channel_codec)
+            for channel, channel_codec in (channel_codecs or {}).items()
+        }
+
+    def set_compression(
+        self, channel_compression: dict[str, CompressionConfig]
+    ) -> None:
+        """
+        Set the compression settings of output channels, checking that their compressors can be used.
+        """
+        for compression in channel_compression.values():
+            CompressorFactory.make(compression.algorithm).check_available()
+        self.channel_compression = channel_compression
+
+    def set_connection_pool(self, connection_pool: ConnectionPool) -> None:
+        """
+        Connect to Redis through a connection pool shared with other nodes of the process, which is not closed when
+        the node exits. This must be called before `set_transports` and before entering the node.
+        """
+        if self.channel_transports:
+            raise ValueError("The connection pool must be set before the transports")
+        self.r = Redis(connection_pool=connection_pool)
+        pubsub_transport = PubSubTransport(self.r, self.node_name)
+        self.pubsub = pubsub_transport.pubsub
+        self.transports = {"pubsub": pubsub_transport}
+        self._claim_checks = ClaimCheckStore(self.r)
+
+    def set_transports(
+        self,
+        channel_transports: dict[str, str],
+        transport_options: dict[str, dict[str, Any]] | None = None,
+    ) -> None:
+        """
+        Set the transports of channels by transport names. Channels not in `channel_transports` use Redis Pub/Sub.
+        This must be called before entering the node.
+        """
+        transport_options = transport_options or {}
+        for channel, transport_name in channel_transports.items():
+            if transport_name not in self.transports:
+                self.transports[transport_name] = TransportFactory.make(
+                    transport_name,
+                    self.r,
+                    self.node_name,
+                    **transport_options.get(transport_name, {}),
+                )
+            self.channel_transports[channel] = self.transports[transport_name]
+
+    def set_replicas(
+        self,
+        replicas: int,
+        replica_index: int,
+        partition_keys: dict[str, str] | None = None,
+        consumer_group: str | None = None,
+    ) -> None:
+        """
+        Make the node one of `replicas` replicas splitting the input messages, with input channels partitioned by the
+        keys in `partition_keys`. Streams channels are read as one `consumer_group` if none of them is partitioned.
+        This must be called after `set_transports` and before entering the node.
+        """
+        partition_keys = partition_keys or {}
+        split_channels: set[str] = set()
+        streams_channels = {
+            channel
+            for channel, transport in self.channel_transports.items()
+            if isinstance(transport, StreamsTransport)
+        }
+        streams = self.transports.get("streams")
+        if (
+            consumer_group is not None
+            and isinstance(streams, StreamsTransport)
+            and streams.consumer_group == self.node_name
+            and not streams_channels & partition_keys.keys()
+        ):
+            streams.consumer_group = consumer_group
+            split_channels = streams_channels
+        self._partitioner = Partitioner(
+            replicas, replica_index, partition_keys, split_channels
+        )
+        # Each replica must see the same messages, whichever process published them.
+        self.use_local_bus = False
+
+    def _get_transport(self, channel: str) -> Transport:
+        return self.channel_transports.get(channel, self.transports["pubsub"])
+
+    async def publish(self, channel: str, message: Message[OutputType]) -> None:
+        """
+        Encode the message with the codec of the channel and publish it.
+        """
+        start = time.perf_counter()
+        try:
+            await self._publish(channel, message)
+        finally:
+            self.messages_published += 1
+            self.metrics.published[channel] += 1
+            self.metrics.publish_duration[channel].observe(time.perf_counter() - start)
+
+    async def _publish(self, channel: str, message: Message[OutputType]) -> None:
+        transport = self._get_transport(channel)
+        if (
+            self.tracing
+            and not isinstance(message, RawMessage)
+            and message.trace is None
+        ):
+            message = message.model_copy(
+                update={"trace": TraceContext.start(self.node_name)}
+            )
+        origin: bytes | None = None
+        if self._local_bus is not None and isinstance(transport, PubSubTransport):
+            if self._local_bus.deliver(channel, message):
+                if not await self._local_bus.has_remote_subscribers(self.r, channel):
+                    return
+                origin = self._local_bus.origin
+        sequence: SequenceTag | None = None
+        if self.sequence_numbers:
+            sequence = SequenceTag(
+                self._producer_id, self._next_sequence_numbers[channel]
+            )
+            self._next_sequence_numbers[channel] += 1
+        if isinstance(message, RawMessage):
+            payload = retag_payload(message.payload, origin, sequence)
+        else:
+            payload = encode_message(
+                message,
+                self.channel_codecs.get(channel, self.codec),
+                origin,
+                sequence,
+                self.channel_compression.get(channel),
+            )
+        if self.claim_check_threshold and len(payload) >= self.claim_check_threshold:
+            payload = await self._claim_checks.store(
+                payload, self.claim_check_ttl_ms, origin, sequence
+            )
+        if self._batcher is not None:
+            await self._batcher.publish(transport, channel, payload)
+        else:
+            await transport.publish(channel, payload)
 
     async def __aenter__(self) -> Self:
         try:
@@ -236,8 +858,26 @@ class Node(BaseModel, Generic[InputType, OutputType]):
             raise ValueError(
                 f"Could not connect to Redis with the provided url. {self.redis_url}"
             )
-        await self.pubsub.subscribe(*self.input_channel_types.keys())
+        channels_by_transport: dict[Transport, list[str]] = {}
+        for channel in self.input_channel_types:
+            channels_by_transport.setdefault(self._get_transport(channel), []).append(
+                channel
+            )
+        for transport, channels in channels_by_transport.items():
+            await transport.subscribe(channels)
+        if self.publish_max_batch_size > 1:
+            self._batcher = PublishBatcher(
+                self.r, self.publish_max_batch_size, self.publish_max_delay_ms
+            )
+        if self.use_local_bus:
+            self._local_bus = LocalBus.get(self.redis_url)
+            for channel in self.transports["pubsub"].channels:
+                self._local_bus.subscribe(channel, self._local_inbox)
         self._background_tasks.append(asyncio.create_task(self._send_heartbeat()))
+        if self.metrics_port is not None:
+            self._metrics_server = await serve_metrics(
+                self.render_metrics, self.metrics_host, self.metrics_port
+            )
         return self
 
     async def __aexit__(self, _: Any, __: Any, ___: Any) -> None:
@@ -247,35 +887,282 @@ class Node(BaseModel, Generic[InputType, OutputType]):
                 await task
             except asyncio.CancelledError:
                 pass
-        await self.pubsub.unsubscribe()
+        if self._metrics_server is not None:
+            self._metrics_server.close()
+            await self._metrics_server.wait_closed()
+            self._metrics_server = None
+        if self._batcher is not None:
+            try:
+                await self._batcher.close()
+            except Exception as e:
+                self.logger.error(f"Failed to flush published messages: {e}")
+            self._batcher = None
+        if self._local_bus is not None:
+            self._local_bus.unsubscribe(self._local_inbox)
+            self._local_bus.release()
+            self._local_bus = None
+        await asyncio.to_thread(self._offload_pools.shutdown)
+        for transport in self.transports.values():
+            await transport.close()
         await self.r.aclose()
 
+    def stats(self) -> NodeStats:
+        """
+        The stats reported to the health registry with each heartbeat.
+        """
+        queue_depth = self._local_inbox.qsize()
+        if self._input_queues is not None:
+            queue_depth += sum(self._input_queues.depths().values())
+        return NodeStats(
+            pid=os.getpid(),
+            messages_received=self.messages_received,
+            messages_published=self.messages_published,
+            messages_dropped=sum(self.dropped_messages.values()),
+            messages_lost=sum(self.metrics.lost.values()),
+            messages_failed=sum(self.metrics.failed.values()),
+            queue_depth=queue_depth,
+            metrics=self.metrics.snapshot() if self.metrics_snapshots else None,
+        )
+
+    def render_metrics(self) -> str:
+        """
+        The metrics of the node in the Prometheus text format.
+        """
+        stats = self.stats()
+        return self.metrics.to_prometheus(
+            self.node_name, self.dropped_messages, stats.queue_depth
+        )
+
     async def _send_heartbeat(self) -> None:
+        registry = HealthRegistry(self.r, namespace=self.health_namespace)
         while True:
-            await asyncio.sleep(1)
-            await self.r.publish(
-                f"heartbeat:{self.node_name}",
-                Message[Tick](data=Tick(tick=0)).model_dump_json(),
-            )
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await registry.beat(self.node_name, self.stats())
+
+    async def _receive_local(self) -> AsyncIterator[ReceivedPayload]:
+        while True:
+            yield await self._local_inbox.get()
+
+    async def _receive(self) -> AsyncIterator[ReceivedPayload]:
+        for transport in self.transports.values():
+            if isinstance(transport, SharedMemoryTransport):
+                # Only raw messages may keep views of the shared memory, other messages are decoded later.
+                transport.copy_payloads = not self.raw_input
+        sources = [
+            transport.listen()
+            for transport in self.transports.values()
+            if transport.channels
+        ]
+        if self._local_bus is not None and self.transports["pubsub"].channels:
+            sources.append(self._receive_local())
+        if len(sources) == 1:
+            async for received in sources[0]:
+                if await self._accept(received):
+                    yield received
+        elif sources:
+            async with stream.merge(*sources).stream() as streamer:
+                async for received in streamer:
+                    if await self._accept(received):
+                        yield received
+
+    async def _accept(self, received: ReceivedPayload) -> bool:
+        """
+        Check the sequence number of a received message and whether this replica handles it.
+        """
+        if received.message is None:
+            self._check_sequence(received)
+        if self._partitioner is not None and not self._partitioner.accepts(received):
+            await self._get_transport(received.channel).ack(received)
+            return False
+        return True
+
+    def _check_sequence(self, received: ReceivedPayload) -> None:
+        tag = get_sequence(received.payload)
+        if tag is None:
+            return
+        channel = received.channel
+        event, lost = self._sequences.observe(channel, tag)
+        if event in ("first", "in_order"):
+            return
+        if event == "lost":
+            self.metrics.lost[channel] += lost
+        elif event == "duplicated":
+            self.metrics.duplicated[channel] += 1
+        else:
+            # The message was counted as lost when its gap was seen.
+            self.metrics.lost[channel] -= 1
+            self.metrics.reordered[channel] += 1
+        if self.sequence_warning_interval_ms:
+            now = time.monotonic()
+            warned_at = self._sequence_warned_at.get(channel)
+            if (
+                warned_at is None
+                or now - warned_at >= self.sequence_warning_interval_ms / 1000
+            ):
+                self._sequence_warned_at[channel] = now
+                self.logger.warning(
+                    f"Input messages of {channel} so far: {self.metrics.lost[channel]} lost, "
+                    f"{self.metrics.duplicated[channel]} duplicated, {self.metrics.reordered[channel]} reordered"
+                )
+
+    async def _receive_queued(self) -> AsyncIterator[ReceivedPayload]:
+        queues = self._input_queues = InputQueues(self.input_queues)
+
+        async def read() -> None:
+            try:
+                async for received in self._receive():
+                    received = received._replace(received_at=time.perf_counter())
+                    dropped = await queues.put(received)
+                    if dropped is not None:
+                        await self._get_transport(dropped.channel).ack(dropped)
+            finally:
+                queues.close()
+
+        reader = asyncio.create_task(read())
+        try:
+            while (received := await queues.get()) is not None:
+                yield received
+            await reader  # raises the error which stopped the reader, if any
+        finally:
+            reader.cancel()
+
+    @property
+    def dropped_messages(self) -> dict[str, int]:
+        """
+        The number of input messages dropped by the input queues, per channel.
+        """
+        if self._input_queues is None:
+            return {}
+        return self._input_queues.dropped()
+
+    def _decode(self, received: ReceivedPayload) -> Message[InputType]:
+        message_type = self._input_message_types[received.channel]
+        if isinstance(received.message, RawMessage):
+            received = received._replace(payload=received.message.payload, message=None)
+        if received.message is not None:
+            message = received.message
+            if not isinstance(
+                message.data,  # type: ignore[attr-defined]
+                self.input_channel_types[received.channel],
+            ):
+                # Local publisher and subscriber disagree on the type: validate as if it came through Redis.
+                message = decode_message(
+                    encode_message(message, self.codec), message_type
+                )
+            if self.raw_input:
+                return RawMessage(None, message_type, message)  # type: ignore[return-value]
+            return message  # type: ignore[return-value]
+        if self.raw_input:
+            return RawMessage(received.payload, message_type)  # type: ignore[return-value]
+        return decode_message(received.payload, message_type)
 
     async def _wait_for_input(
         self,
     ) -> AsyncIterator[tuple[str, Message[InputType]]]:
-        async for message in self.pubsub.listen():
-            channel = message["channel"].decode("utf-8")
-            if message["type"] == "message" and channel in self.input_channel_types:
+        source = self._receive_queued() if self.input_queues else self._receive()
+        async for received in source:
+            received_at = received.received_at or time.perf_counter()
+            channel = received.channel
+            if channel in self.input_channel_types:
+                if (
+                    self._local_bus is not None
+                    and received.message is None
+                    and get_origin(received.payload) == self._local_bus.origin
+                ):
+                    continue  # already delivered through the local bus
+                if (
+                    received.message is None
+                    and (key := get_claim_check_key(received.payload)) is not None
+                ):
+                    payload = await self._claim_checks.fetch(key)
+                    if payload is None:
+                        self.logger.warning(
+                            f"Dropped a message from {channel}: its claim check {key!r} has expired"
+                        )
+                        await self._get_transport(channel).ack(received)
+                        continue
+                    received = received._replace(payload=payload)
                 try:
-                    data = Message[
-                        self.input_channel_types[channel]  # type: ignore[name-defined]
-                    ].model_validate_json(message["data"])
-                except ValidationError as e:
-                    self.logger.error(
-                        f"Failed to validate message from {channel}: {message['data']}. Error: {e}"
+                    data = self._decode(received)
+                    # A message without its partition key is as bad as one failing to validate.
+                    owned = self._partitioner is None or self._partitioner.owns(
+                        channel, data
+                    )
+                except Exception as e:
+                    if self.error_policy == "raise":
+                        self.logger.error(
+                            f"Failed to validate message from {channel}: {received.payload!r}. Error: {e}"
+                        )
+                        raise e
+                    await self._reject_input(
+                        "decode",
+                        channel,
+                        received.payload
+                        if received.message is None
+                        else self._encode_input(received.message),
+                        e,
                     )
-                    raise e
+                    await self._get_transport(channel).ack(received)
+                    continue
+                if not owned:
+                    await self._get_transport(channel).ack(received)
+                    continue
+                self.messages_received += 1
+                self.metrics.received[channel] += 1
+                self.metrics.receive_to_handler[channel].observe(
+                    time.perf_counter() - received_at
+                )
                 yield channel, data
+                # Resumed only after the consumer has handled the message.
+                await self._get_transport(channel).ack(received)
         raise Exception("Input channel closed unexpectedly")
 
+    async def _wait_for_batches(
+        self,
+    ) -> AsyncIterator[tuple[str, list[Message[InputType]]]]:
+        loop = asyncio.get_running_loop()
+        inputs = self._wait_for_input()
+        # The pending read of the next input message, carried over to the next batch when a batch times out.
+        pending: asyncio.Future[tuple[str, Message[InputType]]] | None = None
+        carried: tuple[str, Message[InputType]] | None = None
+        try:
+            while True:
+                if carried is None:
+                    if pending is None:
+                        pending = asyncio.ensure_future(anext(inputs))
+                    try:
+                        carried = await pending
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        pending = None
+                input_channel, first_message = carried
+                carried = None
+                batch = [first_message]
+                deadline = loop.time() + self.max_batch_wait_ms / 1000
+                while len(batch) < self.max_batch_size:
+                    if pending is None:
+                        pending = asyncio.ensure_future(anext(inputs))
+                    done, _ = await asyncio.wait(
+                        {pending}, timeout=max(0.0, deadline - loop.time())
+                    )
+                    if not done:
+                        break
+                    try:
+                        next_channel, next_message = pending.result()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        pending = None
+                    if next_channel != input_channel:
+                        carried = next_channel, next_message
+                        break
+                    batch.append(next_message)
+                yield input_channel, batch
+        finally:
+            if pending is not None:
+                pending.cancel()
+
     async def event_loop(
         self,
     ) -> None:
@@ -285,18 +1172,230 @@ class Node(BaseModel, Generic[InputType, OutputType]):
         `event_handler` method for each input message, and send each output message to the corresponding output channel.
         """
         try:
-            async for input_channel, input_message in self._wait_for_input():
-                async for output_channel, output_message in self.event_handler(
-                    input_channel, input_message
-                ):
-                    await self.r.publish(
-                        output_channel, output_message.model_dump_json()
-                    )
+            if self.max_concurrency > 1:
+                await self._concurrent_event_loop()
+            else:
+                async for _, outputs in self._wait_for_work():
+                    async for output_channel, output_message in outputs:
+                        await self.publish(output_channel, output_message)
         except NodeExitSignal as e:
             self.logger.info(f"Event loop cancelled: {e}. Exiting gracefully.")
         except Exception as e:
             raise e
 
+    async def _wait_for_work(
+        self,
+    ) -> AsyncIterator[tuple[str, AsyncIterator[tuple[str, Message[OutputType]]]]]:
+        """
+        Yields the input channel and the outputs of each unit of work, i.e., an input message or a batch of them.
+        """
+        if self.max_batch_size > 1:
+            async for input_channel, input_messages in self._wait_for_batches():
+                yield input_channel, self._process_batch(input_channel, input_messages)
+        else:
+            async for input_channel, input_message in self._wait_for_input():
+                yield input_channel, self._process(input_channel, input_message)
+
+    async def _process(
+        self, input_channel: str, input_message: Message[InputType]
+    ) -> AsyncIterator[tuple[str, Message[OutputType]]]:
+        # The time spent by the consumer of the outputs (e.g., publishing them) is not part of the handler duration.
+        start = time.perf_counter()
+        duration = 0.0
+        trace = self._get_trace(input_message)
+        try:
+            async for output in self.event_handler(input_channel, input_message):
+                duration += time.perf_counter() - start
+                yield self._trace_output(trace, output) if trace is not None else output
+                start = time.perf_counter()
+        except Exception as e:
+            if self.error_policy == "raise":
+                raise e
+            await self._reject_input(
+                "handler", input_channel, self._encode_input(input_message), e
+            )
+        duration += time.perf_counter() - start
+        self.metrics.handler_duration[input_channel].observe(duration)
+
+    async def _process_batch(
+        self, input_channel: str, input_messages: list[Message[InputType]]
+    ) -> AsyncIterator[tuple[str, Message[OutputType]]]:
+        start = time.perf_counter()
+        try:
+            outputs = await self.batch_event_handler(input_channel, input_messages)
+        except Exception as e:
+            if self.error_policy == "raise":
+                raise e
+            for input_message in input_messages:
+                await self._reject_input(
+                    "handler", input_channel, self._encode_input(input_message), e
+                )
+            return
+        if type(self).batch_event_handler is not Node.batch_event_handler:
+            # The default implementation records the duration of each message.
+            self.metrics.handler_duration[input_channel].observe(
+                time.perf_counter() - start
+            )
+        if len(outputs) != len(input_messages):
+            raise ValueError(
+                f"batch_event_handler returned outputs for {len(outputs)} messages, expected {len(input_messages)}"
+            )
+        for input_message, message_outputs in zip(input_messages, outputs):
+            trace = self._get_trace(input_message)
+            for output in message_outputs:
+                yield self._trace_output(trace, output) if trace is not None else output
+
+    @property
+    def dead_letter_channel(self) -> str:
+        """
+        The channel the input messages failing with the `"dead_letter"` error policy are published on.
+        """
+        return f"deadletter:{self.node_name}"
+
+    def _encode_input(self, input_message: Any) -> bytes | memoryview:
+        if isinstance(input_message, RawMessage):
+            return input_message.payload
+        return encode_message(input_message, self.codec)
+
+    async def _reject_input(
+        self,
+        stage: Literal["decode", "handler"],
+        channel: str,
+        payload: bytes | memoryview,
+        error: Exception,
+    ) -> None:
+        """
+        Count an input message which failed to decode or to be handled, and publish it on the `dead_letter_channel`
+        with the `"dead_letter"` error policy.
+        """
+        self.metrics.failed[channel] += 1
+        self.logger.error(
+            f"Failed to {'decode' if stage == 'decode' else 'handle'} a message from {channel}: {error!r}"
+        )
+        if self.error_policy != "dead_letter":
+            return
+        dead_letter = Message[DeadLetter](
+            data=DeadLetter(
+                node_name=self.node_name,
+                channel=channel,
+                stage=stage,
+                error=repr(error),
+                traceback="".join(traceback.format_exception(error)),
+                payload=bytes(payload),
+            )
+        )
+        try:
+            await self.transports["pubsub"].publish(
+                self.dead_letter_channel, encode_message(dead_letter, self.codec)
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Failed to publish a dead letter on {self.dead_letter_channel}: {e}"
+            )
+
+    def _get_trace(self, input_message: Message[InputType]) -> TraceContext | None:
+        # Raw messages are not decoded for their trace.
+        if isinstance(input_message, RawMessage):
+            return None
+        return input_message.trace
+
+    def _trace_output(
+        self, trace: TraceContext, output: tuple[str, Message[OutputType]]
+    ) -> tuple[str, Message[OutputType]]:
+        """
+        Make the output message a child span of the trace of its input message, unless it already has its own trace.
+        """
+        output_channel, output_message = output
+        if isinstance(output_message, RawMessage) or (
+            output_message.trace is not None and output_message.trace is not trace
+        ):
+            return output
+        return output_channel, output_message.model_copy(
+            update={"trace": trace.child(self.node_name)}
+        )
+
+    async def _concurrent_event_loop(self) -> None:
+        slots = asyncio.Semaphore(self.max_concurrency)
+        stopped = asyncio.Event()
+        errors: list[BaseException] = []
+        tasks: set[asyncio.Task[None]] = set()
+        # Each lane publishes the outputs of its messages in order, one output queue per message.
+        lanes: dict[str | None, asyncio.Queue[_Outputs]] = {}
+
+        def on_done(task: asyncio.Task[None]) -> None:
+            tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())  # type: ignore[arg-type]
+                stopped.set()
+
+        def spawn(coroutine: Coroutine[Any, Any, None]) -> None:
+            task = asyncio.create_task(coroutine)
+            tasks.add(task)
+            task.add_done_callback(on_done)
+
+        async def handle(
+            work: AsyncIterator[tuple[str, Message[OutputType]]],
+            outputs: _Outputs | None,
+        ) -> None:
+            try:
+                async for output in work:
+                    if outputs is None:
+                        await self.publish(*output)
+                    else:
+                        outputs.put_nowait(output)
+            except NodeExitSignal as e:
+                # NodeExitSignal is a CancelledError, which the task would swallow.
+                errors.append(e)
+                stopped.set()
+            finally:
+                if outputs is None:
+                    slots.release()
+                else:
+                    outputs.put_nowait(None)
+
+        async def drain(lane: asyncio.Queue[_Outputs]) -> None:
+            while True:
+                outputs = await lane.get()
+                while (output := await outputs.get()) is not None:
+                    await self.publish(*output)
+                slots.release()
+
+        async def dispatch() -> None:
+            exit_signal: NodeExitSignal | None = None
+            try:
+                async for input_channel, work in self._wait_for_work():
+                    await slots.acquire()
+                    outputs: _Outputs | None = None
+                    if self.ordering != "unordered":
+                        key = None
+                        if self.ordering == "ordered-per-channel":
+                            key = input_channel
+                        if key not in lanes:
+                            lanes[key] = asyncio.Queue()
+                            spawn(drain(lanes[key]))
+                        outputs = asyncio.Queue()
+                        lanes[key].put_nowait(outputs)
+                    spawn(handle(work, outputs))
+            except NodeExitSignal as e:
+                # NodeExitSignal is a CancelledError, which the task would swallow.
+                exit_signal = e
+            # Wait for the messages in flight before stopping.
+            for _ in range(self.max_concurrency):
+                await slots.acquire()
+            if exit_signal is not None:
+                errors.append(exit_signal)
+            stopped.set()
+
+        spawn(dispatch())
+        try:
+            await stopped.wait()
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if errors:
+            raise errors[0]
+
     @abstractmethod
     async def event_handler(
         self, _: str, __: Message[InputType]
@@ -306,3 +1405,18 @@ class Node(BaseModel, Generic[InputType, OutputType]):
         """
         raise NotImplementedError("event_handler must be implemented in a subclass.")
         yield "", self.output_type()  # unreachable: dummy return value
+
+    async def batch_event_handler(
+        self, input_channel: str, input_messages: list[Message[InputType]]
+    ) -> list[list[tuple[str, Message[OutputType]]]]:
+        """
+        Handle a batch of input messages of the same input channel. Returns the output messages of each input message.
+        Only called when `max_batch_size` is greater than `1`. The default implementation calls `event_handler` for
+        each input message.
+        """
+        outputs = []
+        for input_message in input_messages:
+            outputs.append(
+                [output async for output in self._process(input_channel, input_message)]
+            )
+        return outputs
@@ -0,0 +1,82 @@
+"""
+Claim checks for large payloads. Redis pushes every Pub/Sub message to each subscriber connection, so a large payload
+fanned out to several nodes fills the output buffers of Redis. With a claim check, the payload is stored once under a
+key expiring after `ttl_ms`, and only a reference to the key is published. Receivers fetch the payload when they
+handle the message.
+
+References are framed like payloads (see `aact.messages.codecs`): a header byte with `FLAG_CLAIM_CHECK`, the optional
+origin and sequence number, then the key.
+"""
+
+import logging
+import os
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+
+from ..messages.codecs import (
+    FLAG_CLAIM_CHECK,
+    FLAG_ORIGIN,
+    FLAG_SEQUENCE,
+    SequenceTag,
+    body_offset,
+    frame_payload,
+)
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = b"aact:claim_check:"
+"""
+@private
+"""
+
+
+def get_claim_check_key(payload: bytes | memoryview) -> bytes | None:
+    """
+    The key of the stored payload if the payload is a claim check reference.
+    """
+    header = payload[0]
+    if header & ~(FLAG_ORIGIN | FLAG_SEQUENCE) != FLAG_CLAIM_CHECK:
+        return None
+    return bytes(payload[body_offset(header) :])
+
+
+class ClaimCheckStore:
+    """
+    Stores payloads of a node under expiring keys and fetches the payloads of references, caching the last
+    `cache_size` fetched payloads (e.g., for messages of streams channels delivered again).
+    """
+
+    def __init__(self, r: Redis, cache_size: int = 16) -> None:
+        self.r = r
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, bytes] = OrderedDict()
+
+    async def store(
+        self,
+        payload: bytes,
+        ttl_ms: int,
+        origin: bytes | None = None,
+        sequence: SequenceTag | None = None,
+    ) -> bytes:
+        """
+        Store the payload and return the reference to publish instead.
+        """
+        key = KEY_PREFIX + os.urandom(16).hex().encode()
+        await self.r.set(key, payload, px=ttl_ms)
+        return frame_payload(FLAG_CLAIM_CHECK, key, origin, sequence)
+
+    async def fetch(self, key: bytes) -> bytes | None:
+        """
+        Fetch the payload stored under the key. Returns `None` if the key has expired.
+        """
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        payload: bytes | None = await self.r.get(key)  # type: ignore[assignment]
+        if payload is None:
+            return None
+        self._cache[key] = payload
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return payload
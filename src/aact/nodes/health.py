@@ -0,0 +1,166 @@
+"""
+The health registry. Every node writes its heartbeat and stats into two Redis keys shared by the nodes of its
+namespace, once per `HEARTBEAT_INTERVAL`, with a single pipelined write:
+
+- `HEARTBEATS_KEY`, a sorted set mapping node names to the time of their last heartbeat, and
+- `STATS_KEY`, a hash mapping node names to their `NodeStats` as JSON.
+
+The `aact.manager.NodeManager` runs its nodes in a namespace of its own (its id), so that dataflows with nodes of the
+same name do not overwrite each other's entries; the keys are then suffixed with `:{namespace}`. Both keys expire
+`REGISTRY_TTL` seconds after the last heartbeat of any node. Readers, e.g., the `NodeManager`, fetch the entries of all
+their nodes at once, consider nodes whose last heartbeat is older than `timeout` as not responding, and prune the
+entries of nodes silent for `REGISTRY_TTL` seconds.
+"""
+
+import time
+from typing import Any
+
+from pydantic import BaseModel, Field
+from redis.asyncio import Redis
+
+from .metrics import MetricsSnapshot
+
+HEARTBEATS_KEY = "aact:health:heartbeats"
+"""
+@private
+"""
+STATS_KEY = "aact:health:stats"
+"""
+@private
+"""
+HEARTBEAT_INTERVAL = 1.0
+"""
+@private
+"""
+REGISTRY_TTL = 60
+"""
+@private
+"""
+
+
+class NodeStats(BaseModel):
+    """
+    The stats a node reports with its heartbeat.
+    """
+
+    pid: int
+    """
+    The id of the process running the node.
+    """
+    messages_received: int = Field(default=0)
+    """
+    The number of input messages handed to the event loop.
+    """
+    messages_published: int = Field(default=0)
+    """
+    The number of messages published by the node.
+    """
+    messages_dropped: int = Field(default=0)
+    """
+    The number of input messages dropped by the input queues.
+    """
+    messages_lost: int = Field(default=0)
+    """
+    The number of input messages lost before reaching the node, as told by their sequence numbers.
+    """
+    messages_failed: int = Field(default=0)
+    """
+    The number of input messages which failed to decode or to be handled, without stopping the node.
+    """
+    queue_depth: int = Field(default=0)
+    """
+    The number of received input messages waiting to be handled.
+    """
+    metrics: MetricsSnapshot | None = Field(default=None)
+    """
+    The metrics of the node, if it writes metrics snapshots.
+    """
+
+
+class NodeHealth(BaseModel):
+    """
+    The health of a node as read from the registry.
+    """
+
+    last_heartbeat: float
+    """
+    The time of the last heartbeat, in seconds since the epoch.
+    """
+    stats: NodeStats | None
+    responding: bool
+    """
+    Whether the last heartbeat is at most `timeout` seconds old.
+    """
+
+
+class HealthRegistry:
+    """
+    Writes and reads the health registry of the nodes of a namespace, or of the nodes without one.
+    """
+
+    def __init__(
+        self, r: Redis, timeout: float = 10.0, namespace: str | None = None
+    ) -> None:
+        self.r = r
+        self.timeout = timeout
+        suffix = "" if namespace is None else f":{namespace}"
+        self.heartbeats_key = HEARTBEATS_KEY + suffix
+        self.stats_key = STATS_KEY + suffix
+
+    async def beat(self, node_name: str, stats: NodeStats) -> None:
+        """
+        Write the heartbeat and stats of a node.
+        """
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.heartbeats_key, {node_name: time.time()})
+            pipe.hset(self.stats_key, node_name, stats.model_dump_json())
+            pipe.expire(self.heartbeats_key, REGISTRY_TTL)
+            pipe.expire(self.stats_key, REGISTRY_TTL)
+            await pipe.execute()
+
+    async def read(self, node_names: list[str]) -> dict[str, NodeHealth]:
+        """
+        Read the health of the given nodes. Nodes which never sent a heartbeat are left out.
+        """
+        if not node_names:
+            return {}
+        now = time.time()
+        async with self.r.pipeline(transaction=False) as pipe:
+            pipe.zmscore(self.heartbeats_key, node_names)
+            pipe.hmget(self.stats_key, node_names)
+            pipe.zrangebyscore(self.heartbeats_key, "-inf", now - REGISTRY_TTL)
+            results: Any = await pipe.execute()
+        heartbeats, stats, stale = results
+        if stale:
+            await self.remove(
+                [
+                    node_name.decode() if isinstance(node_name, bytes) else node_name
+                    for node_name in stale
+                ]
+            )
+        health: dict[str, NodeHealth] = {}
+        for node_name, last_heartbeat, node_stats in zip(node_names, heartbeats, stats):
+            if last_heartbeat is None:
+                continue
+            health[node_name] = NodeHealth(
+                last_heartbeat=last_heartbeat,
+                stats=NodeStats.model_validate_json(node_stats) if node_stats else None,
+                responding=now - last_heartbeat <= self.timeout,
+            )
+        return health
+
+    async def remove(self, node_names: list[str]) -> None:
+        """
+        Remove the entries of the given nodes.
+        """
+        if node_names:
+            async with self.r.pipeline(transaction=False) as pipe:
+                pipe.zrem(self.heartbeats_key, *node_names)
+                pipe.hdel(self.stats_key, *node_names)
+                await pipe.execute()
+
+    async def clear(self) -> None:
+        """
+        Remove the entries of all nodes of the namespace, e.g., when their dataflow is shut down.
+        """
+        await self.r.delete(self.heartbeats_key, self.stats_key)
@@ -83,9 +83,9 @@ class ListenerNode(Node[Zero, Audio]):
     async def send_frames(self) -> None:
         while True:
             frames = await self.queue.get()
-            await self.r.publish(
+            await self.publish(
                 self.output_channel,
-                Message[Audio](data=Audio(audio=frames)).model_dump_json(),
+                Message[Audio](data=Audio(audio=frames)),
             )
 
     def callback(
@@ -0,0 +1,233 @@
+"""
+Per-node metrics. Every node counts its received and published messages and records latency histograms with fixed
+buckets, per channel:
+
+- `receive_to_handler`: from receiving a message to handing it to the event loop, i.e., decoding and waiting in the
+    input queues.
+- `handler_duration`: the time spent in the handler of a message (or of a batch with a `batch_event_handler`),
+    excluding the time spent publishing its outputs.
+- `publish_duration`: the time spent in `publish`.
+
+The counters also include the input messages lost, duplicated and reordered on their way to the node, per channel
+(see `aact.nodes.sequences`), and the input messages which failed to decode or to be handled, per input channel.
+Lost messages arriving late are moved from the lost to the reordered messages, so the number of lost messages can
+decrease.
+
+The metrics are served in the Prometheus text format on `http://<metrics_host>:<metrics_port>/metrics` when the node
+has a `metrics_port`, and written to the health registry (see `aact.nodes.health`) with each heartbeat when
+`metrics_snapshots` is set.
+"""
+
+import asyncio
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+"""
+The upper bounds of the histogram buckets, in seconds.
+"""
+
+
+class HistogramSnapshot(BaseModel):
+    """
+    The state of a `Histogram`, e.g., to be stored in Redis.
+    """
+
+    buckets: list[float]
+    counts: list[int]
+    """
+    The number of observations in each bucket, not cumulative. The last count is for values above the last bucket.
+    """
+    sum: float
+    count: int
+
+
+class Histogram:
+    """
+    A histogram with fixed buckets.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            buckets=list(self.buckets),
+            counts=list(self.counts),
+            sum=self.sum,
+            count=self.count,
+        )
+
+
+class MetricsSnapshot(BaseModel):
+    """
+    The state of the `NodeMetrics` of a node.
+    """
+
+    received: dict[str, int] = Field(default_factory=dict)
+    published: dict[str, int] = Field(default_factory=dict)
+    lost: dict[str, int] = Field(default_factory=dict)
+    duplicated: dict[str, int] = Field(default_factory=dict)
+    reordered: dict[str, int] = Field(default_factory=dict)
+    failed: dict[str, int] = Field(default_factory=dict)
+    histograms: dict[str, dict[str, HistogramSnapshot]] = Field(default_factory=dict)
+    """
+    The histograms by name and channel.
+    """
+
+
+class NodeMetrics:
+    """
+    The counters and histograms of a node, per channel.
+    """
+
+    def __init__(self) -> None:
+        self.received: defaultdict[str, int] = defaultdict(int)
+        self.published: defaultdict[str, int] = defaultdict(int)
+        self.lost: defaultdict[str, int] = defaultdict(int)
+        self.duplicated: defaultdict[str, int] = defaultdict(int)
+        self.reordered: defaultdict[str, int] = defaultdict(int)
+        self.failed: defaultdict[str, int] = defaultdict(int)
+        self.receive_to_handler: defaultdict[str, Histogram] = defaultdict(Histogram)
+        self.handler_duration: defaultdict[str, Histogram] = defaultdict(Histogram)
+        self.publish_duration: defaultdict[str, Histogram] = defaultdict(Histogram)
+
+    def histograms(self) -> dict[str, defaultdict[str, Histogram]]:
+        return {
+            "receive_to_handler": self.receive_to_handler,
+            "handler_duration": self.handler_duration,
+            "publish_duration": self.publish_duration,
+        }
+
+    def snapshot(self) -> MetricsSnapshot:
+        return MetricsSnapshot(
+            received=dict(self.received),
+            published=dict(self.published),
+            lost=dict(self.lost),
+            duplicated=dict(self.duplicated),
+            reordered=dict(self.reordered),
+            failed=dict(self.failed),
+            histograms={
+                name: {
+                    channel: histogram.snapshot()
+                    for channel, histogram in histograms.items()
+                }
+                for name, histograms in self.histograms().items()
+            },
+        )
+
+    def to_prometheus(
+        self,
+        node_name: str,
+        dropped: dict[str, int] | None = None,
+        queue_depth: int = 0,
+    ) -> str:
+        """
+        Render the metrics in the Prometheus text format.
+        """
+        node = _escape(node_name)
+        lines: list[str] = []
+        counters = {
+            "aact_messages_received_total": self.received,
+            "aact_messages_published_total": self.published,
+            "aact_messages_dropped_total": dropped or {},
+            "aact_messages_lost_total": self.lost,
+            "aact_messages_duplicated_total": self.duplicated,
+            "aact_messages_reordered_total": self.reordered,
+            "aact_messages_failed_total": self.failed,
+        }
+        for name, counts in counters.items():
+            lines.append(f"# TYPE {name} counter")
+            for channel, count in counts.items():
+                lines.append(
+                    f'{name}{{node="{node}",channel="{_escape(channel)}"}} {count}'
+                )
+        for histogram_name, histograms in self.histograms().items():
+            name = f"aact_{histogram_name}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for channel, histogram in histograms.items():
+                labels = f'node="{node}",channel="{_escape(channel)}"'
+                cumulative = 0
+                for bucket, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}'
+                    )
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        lines.append("# TYPE aact_queue_depth gauge")
+        lines.append(f'aact_queue_depth{{node="{node}"}} {queue_depth}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+async def serve_metrics(
+    render: Callable[[], str], host: str, port: int
+) -> asyncio.Server:
+    """
+    Serve the text returned by `render` on `GET /metrics`.
+    """
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # skip the headers
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1] == b"/metrics":
+                body = render().encode()
+                status = b"200 OK"
+            else:
+                body = b"Not Found\n"
+                status = b"404 Not Found"
+            writer.write(
+                b"HTTP/1.1 " + status + b"\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except ConnectionError as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
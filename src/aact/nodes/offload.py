@@ -0,0 +1,266 @@
+"""
+Synchronous event handlers, run off the event loop. A blocking call in an `event_handler` (e.g., writing to an audio
+device or a synchronous HTTP client) freezes the whole event loop of the node, including receiving messages and
+sending heartbeats. Decorate a synchronous handler with `offload` to run it in a pool of the node instead:
+
+- `offload("thread")`: the handler runs in a thread pool, with access to the node as `self`. This suits blocking I/O
+    and libraries releasing the GIL.
+- `offload("process")`: the handler runs in a process pool, for CPU-bound work holding the GIL. The handler does not
+    get the node, so it must not take `self`, and it must be defined at the top level of a module or class, so that
+    worker processes can import it. Only the encoded input message and outputs are sent between the processes.
+
+Handlers can return their outputs or yield them; outputs are published as soon as they are yielded.
+
+```python
+from aact.nodes.offload import offload
+
+
+class TranscriberNode(Node[Audio, Text]):
+    @offload("process")
+    def event_handler(
+        input_channel: str, input_message: Message[Audio]
+    ) -> Iterator[tuple[str, Message[Text]]]:
+        yield "transcript", Message[Text](data=Text(text=transcribe(input_message.data.audio)))
+```
+
+The pools of a node have `offload_workers` workers each, are started on first use and are shut down when the node
+exits.
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import wraps
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Literal,
+    TypeVar,
+    overload,
+)
+
+from ..messages import Message
+from ..messages.codecs import CodecFactory, decode_message, encode_message
+from ..messages.registry import DataModelFactory
+
+if TYPE_CHECKING:
+    from .base import Node
+
+N = TypeVar("N", bound="Node[Any, Any]")
+M = TypeVar("M")
+Output = TypeVar("Output")
+
+ThreadHandler = Callable[[N, str, M], Iterable[Output]]
+ProcessHandler = Callable[[str, M], Iterable[Output]]
+AsyncHandler = Callable[[N, str, M], AsyncIterator[Output]]
+
+_CODEC = CodecFactory.make("binary")
+
+_worker_outputs: "multiprocessing.Queue[tuple[int, str | None, bytes | None]] | None" = None
+
+
+@overload
+def offload(
+    executor: Literal["thread"],
+) -> Callable[[ThreadHandler[N, M, Output]], AsyncHandler[N, M, Output]]: ...
+
+
+@overload
+def offload(
+    executor: Literal["process"],
+) -> Callable[[ProcessHandler[M, Output]], AsyncHandler[N, M, Output]]: ...
+
+
+def offload(executor: Literal["thread", "process"]) -> Callable[[Any], Any]:
+    """
+    Run the decorated synchronous event handler in the thread or process pool of the node.
+    """
+
+    def decorator(
+        handler: Callable[..., Iterable[Output]],
+    ) -> AsyncHandler[N, M, Output]:
+        if executor == "thread":
+
+            @wraps(handler)
+            async def run_in_thread(
+                self: N, input_channel: str, input_message: M
+            ) -> AsyncIterator[Output]:
+                loop = asyncio.get_running_loop()
+                outputs: asyncio.Queue[Output | None] = asyncio.Queue()
+
+                def run() -> None:
+                    try:
+                        for output in handler(self, input_channel, input_message):
+                            loop.call_soon_threadsafe(outputs.put_nowait, output)
+                    finally:
+                        loop.call_soon_threadsafe(outputs.put_nowait, None)
+
+                future = loop.run_in_executor(
+                    self._offload_pools.thread(self.offload_workers), run
+                )
+                while (output := await outputs.get()) is not None:
+                    yield output
+                await future  # raises the error of the handler, if any
+
+            return run_in_thread
+
+        @wraps(handler)
+        async def run_in_process(
+            self: N, input_channel: str, input_message: M
+        ) -> AsyncIterator[Output]:
+            pools = self._offload_pools
+            message: Any = input_message
+            task_id, outputs = pools.open_task()
+            pending_output: asyncio.Future[tuple[str, bytes] | None] | None = None
+            try:
+                future = asyncio.get_running_loop().run_in_executor(
+                    pools.process(self.offload_workers),
+                    _run_in_worker,
+                    task_id,
+                    handler.__module__,
+                    handler.__qualname__,
+                    input_channel,
+                    message.data.data_type,
+                    encode_message(message, _CODEC),
+                )
+                pending_output = asyncio.ensure_future(outputs.get())
+                while True:
+                    if not future.done():
+                        waiting: set[asyncio.Future[Any]] = {pending_output, future}
+                        await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                    if not pending_output.done():
+                        # The worker is done: its last outputs are on their way, unless it failed (e.g., the handler
+                        # could not be found, or the pool broke) without sending the end of its outputs.
+                        future.result()
+                    output = await pending_output
+                    if output is None:
+                        break
+                    output_channel, payload = output
+                    output_type = self.output_channel_types[output_channel]
+                    yield (  # type: ignore[misc]
+                        output_channel,
+                        decode_message(payload, Message[output_type]),  # type: ignore[valid-type]
+                    )
+                    pending_output = asyncio.ensure_future(outputs.get())
+                await future  # raises the error of the handler, if any
+            finally:
+                if pending_output is not None:
+                    pending_output.cancel()
+                pools.close_task(task_id)
+
+        return run_in_process
+
+    return decorator
+
+
+def _init_worker(
+    outputs: "multiprocessing.Queue[tuple[int, str | None, bytes | None]]",
+) -> None:
+    global _worker_outputs
+    _worker_outputs = outputs
+
+
+def _run_in_worker(
+    task_id: int,
+    module: str,
+    qualname: str,
+    input_channel: str,
+    data_type: str,
+    payload: bytes,
+) -> None:
+    assert _worker_outputs is not None
+    try:
+        handler: Any = importlib.import_module(module)
+        for name in qualname.split("."):
+            handler = getattr(handler, name)
+        # The class attribute is the decorated handler.
+        handler = getattr(handler, "__wrapped__", handler)
+        input_type = DataModelFactory.registry[data_type]
+        input_message = decode_message(payload, Message[input_type])  # type: ignore[valid-type]
+        for output_channel, output_message in handler(input_channel, input_message):
+            _worker_outputs.put(
+                (task_id, output_channel, encode_message(output_message, _CODEC))
+            )
+    finally:
+        _worker_outputs.put((task_id, None, None))
+
+
+class OffloadPools:
+    """
+    The thread and process pools of a node, started on first use.
+    """
+
+    def __init__(self) -> None:
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._outputs: "multiprocessing.Queue[tuple[int, str | None, bytes | None]] | None" = None
+        self._reader: threading.Thread | None = None
+        self._tasks: dict[int, asyncio.Queue[tuple[str, bytes] | None]] = {}
+        self._next_task_id = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def thread(self, workers: int) -> Executor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(workers)
+        return self._thread_pool
+
+    def process(self, workers: int) -> Executor:
+        if self._process_pool is None:
+            self._loop = asyncio.get_running_loop()
+            self._outputs = multiprocessing.Queue()
+            self._process_pool = ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(self._outputs,)
+            )
+            self._reader = threading.Thread(target=self._read_outputs, daemon=True)
+            self._reader.start()
+        return self._process_pool
+
+    def open_task(self) -> tuple[int, asyncio.Queue[tuple[str, bytes] | None]]:
+        """
+        Register a task run in the process pool. Returns its id and the queue of its outputs, ending with `None`.
+        """
+        task_id = self._next_task_id
+        self._next_task_id += 1
+        self._tasks[task_id] = asyncio.Queue()
+        return task_id, self._tasks[task_id]
+
+    def close_task(self, task_id: int) -> None:
+        self._tasks.pop(task_id, None)
+
+    def _read_outputs(self) -> None:
+        # Forwards the outputs of the worker processes to the event loop.
+        assert self._outputs is not None and self._loop is not None
+        while (item := self._outputs.get()) is not None:
+            task_id, output_channel, payload = item
+            self._loop.call_soon_threadsafe(
+                self._forward, task_id, output_channel, payload
+            )
+
+    def _forward(
+        self, task_id: int, output_channel: str | None, payload: bytes | None
+    ) -> None:
+        if task_id in self._tasks:
+            self._tasks[task_id].put_nowait(
+                None
+                if output_channel is None or payload is None
+                else (output_channel, payload)
+            )
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+        if self._outputs is not None:
+            self._outputs.put(None)  # type: ignore[arg-type]
+            if self._reader is not None:
+                self._reader.join()
+            self._outputs.close()
+            self._outputs = None
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import AsyncIterator
 from .base import Node
 from .registry import NodeFactory
+from .transports import ReceivedPayload
 
 from ..messages import Message, Image, Tick
 import os
@@ -31,19 +32,12 @@ class PerformanceMeasureNode(Node[Tick | Image, Image]):
         self.message_size = message_size
         self.message_to_datetime: dict[bytes, datetime] = {}
 
-    async def _wait_for_input(self) -> AsyncIterator[tuple[str, Message[Tick | Image]]]:
-        async for message in self.pubsub.listen():
-            channel = message["channel"].decode("utf-8")
-            now = datetime.now()
-            if message["type"] == "message" and channel in self.input_channel_types:
-                data = Message[self.input_channel_types[channel]].model_validate_json(  # type: ignore
-                    message["data"]
-                )
-                decoded_time = datetime.now()
-                if channel == self.output_channel:
-                    print(f"Time to decode: {decoded_time - now}")
-                yield channel, data
-        raise Exception("Input channel closed unexpectedly")
+    def _decode(self, received: ReceivedPayload) -> Message[Tick | Image]:
+        now = datetime.now()
+        data = super()._decode(received)
+        if received.channel == self.output_channel:
+            print(f"Time to decode: {datetime.now() - now}")
+        return data
 
     async def event_loop(
         self,
@@ -52,11 +46,10 @@ class PerformanceMeasureNode(Node[Tick | Image, Image]):
             async for output_channel, output_message in self.event_handler(
                 input_channel, input_message
             ):
-                json_str = output_message.model_dump_json()
                 self.message_to_datetime[output_message.data.image[:16]] = (
                     datetime.now()
                 )
-                await self.r.publish(output_channel, json_str)
+                await self.publish(output_channel, output_message)
 
     async def event_handler(
         self, input_channel: str, input_message: Message[Tick | Image]
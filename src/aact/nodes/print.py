@@ -3,7 +3,7 @@ import asyncio
 from ..utils import Self
 from typing import Any, AsyncIterator
 
-from ..messages.commons import DataEntry
+from ..messages.commons import DataEntry, dump_data_entry
 
 from .base import Node
 from .registry import NodeFactory
@@ -34,8 +34,13 @@ class PrintNode(Node[DataModel, Zero]):
             node_name=node_name,
             redis_url=redis_url,
         )
+        self.raw_input = True
         self.output: AsyncTextIndirectIOWrapper | None = None
-        self.write_queue: asyncio.Queue[DataEntry[DataModel]] = asyncio.Queue()
+        self.write_queue: asyncio.Queue[str] = asyncio.Queue()
+        self.data_entry_types: dict[str, type[DataEntry[DataModel]]] = {
+            channel: DataEntry[channel_type]  # type: ignore[valid-type]
+            for channel, channel_type in input_channel_types
+        }
         self.write_task: asyncio.Task[None] | None = None
 
     async def __aenter__(self) -> Self:
@@ -49,8 +54,8 @@ class PrintNode(Node[DataModel, Zero]):
 
     async def write_to_screen(self) -> None:
         while self.output:
-            data_entry = await self.write_queue.get()
-            await self.output.write(data_entry.model_dump_json() + "\n")
+            line = await self.write_queue.get()
+            await self.output.write(line + "\n")
             await self.output.flush()
             self.write_queue.task_done()
 
@@ -59,8 +64,8 @@ class PrintNode(Node[DataModel, Zero]):
     ) -> AsyncIterator[tuple[str, Message[Zero]]]:
         if input_channel in self.input_channel_types:
             await self.write_queue.put(
-                DataEntry[self.input_channel_types[input_channel]](  # type: ignore[name-defined]
-                    channel=input_channel, data=input_message.data
+                dump_data_entry(
+                    input_channel, input_message, self.data_entry_types[input_channel]
                 )
             )
         else:
@@ -0,0 +1,147 @@
+"""
+Bounded input queues. When a node is configured with input queues, a background task reads the messages of all input
+channels as they arrive and buffers them per channel, so that the policy of each channel decides what happens when the
+node cannot keep up:
+
+- `"block"`: stop reading input messages until the node catches up. Messages pile up in Redis (streams) or in the
+    connection buffers (Pub/Sub).
+- `"drop_oldest"`: drop the oldest buffered message of the channel to make room.
+- `"drop_newest"`: drop the incoming message.
+- `"latest_only"`: only keep the newest message of the channel, i.e., conflate the buffered messages into the newest
+    one. This is what real-time nodes usually want, e.g., for camera frames.
+
+Messages are buffered before they are decoded, so dropped messages are never validated. Channels without a
+configuration get a `"block"` buffer of a single message, so that they are read as fast as the node handles them, as
+without input queues.
+"""
+
+import asyncio
+from collections import deque
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+from .transports import ReceivedPayload
+
+QueuePolicy = Literal["block", "drop_oldest", "drop_newest", "latest_only"]
+
+
+class InputQueueConfig(BaseModel):
+    max_depth: int = Field(default=0, ge=0)
+    """
+    The maximum number of buffered messages of the channel. `0` means unbounded, which only `"block"` allows. Ignored
+    by `"latest_only"`.
+    """
+    policy: QueuePolicy = Field(default="block")
+    """
+    What to do with incoming messages when the buffer is full.
+    """
+
+    @model_validator(mode="after")
+    def _check_drop_depth(self) -> "InputQueueConfig":
+        # An unbounded buffer is never full, so it would never drop anything.
+        if self.policy in ("drop_oldest", "drop_newest") and self.max_depth < 1:
+            raise ValueError(
+                f"The {self.policy} policy requires a max_depth of at least 1"
+            )
+        return self
+
+
+UNCONFIGURED_QUEUE = InputQueueConfig(max_depth=1, policy="block")
+"""
+@private
+The configuration of the channels without one.
+"""
+
+
+class InputQueue:
+    """
+    The buffer of one input channel.
+    """
+
+    def __init__(self, config: InputQueueConfig) -> None:
+        self.policy = config.policy
+        self.max_depth = 1 if config.policy == "latest_only" else config.max_depth
+        self.items: deque[ReceivedPayload] = deque()
+        self.dropped = 0
+        """
+        The number of messages dropped so far.
+        """
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    def full(self) -> bool:
+        return 0 < self.max_depth <= len(self.items)
+
+    async def put(
+        self, received: ReceivedPayload
+    ) -> tuple[bool, ReceivedPayload | None]:
+        """
+        Buffer a message according to the policy.
+        Returns whether the number of buffered messages grew, and the dropped message, if any.
+        """
+        while self.policy == "block" and self.full():
+            self._not_full.clear()
+            await self._not_full.wait()
+        if not self.full():
+            self.items.append(received)
+            return True, None
+        self.dropped += 1
+        if self.policy == "drop_newest":
+            return False, received
+        dropped = self.items.popleft()
+        self.items.append(received)
+        return False, dropped
+
+    def get(self) -> ReceivedPayload:
+        received = self.items.popleft()
+        self._not_full.set()
+        return received
+
+
+class InputQueues:
+    """
+    The buffers of all input channels of a node. Channels without a configuration get `UNCONFIGURED_QUEUE`.
+
+    Every buffered message has a token with its channel in `ready`, in the order of arrival, so that messages are
+    handed out in arrival order across channels.
+    """
+
+    def __init__(self, configs: dict[str, InputQueueConfig]) -> None:
+        self.configs = configs
+        self.queues: dict[str, InputQueue] = {}
+        self.ready: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def __getitem__(self, channel: str) -> InputQueue:
+        if channel not in self.queues:
+            self.queues[channel] = InputQueue(
+                self.configs.get(channel, UNCONFIGURED_QUEUE)
+            )
+        return self.queues[channel]
+
+    async def put(self, received: ReceivedPayload) -> ReceivedPayload | None:
+        """
+        Buffer a message. Returns the dropped message, if any.
+        """
+        added, dropped = await self[received.channel].put(received)
+        if added:
+            self.ready.put_nowait(received.channel)
+        return dropped
+
+    async def get(self) -> ReceivedPayload | None:
+        """
+        Get the next buffered message, or `None` once `close` has been called and the buffers are drained.
+        """
+        channel = await self.ready.get()
+        if channel is None:
+            return None
+        return self.queues[channel].get()
+
+    def close(self) -> None:
+        self.ready.put_nowait(None)
+
+    def depths(self) -> dict[str, int]:
+        return {channel: len(queue.items) for channel, queue in self.queues.items()}
+
+    def dropped(self) -> dict[str, int]:
+        return {channel: queue.dropped for channel, queue in self.queues.items()}
@@ -4,7 +4,7 @@ from datetime import datetime
 from ..utils import Self
 from typing import Any, AsyncIterator
 
-from ..messages.commons import DataEntry
+from ..messages.commons import DataEntry, dump_data_entry
 
 from .base import Node
 from .registry import NodeFactory
@@ -45,10 +45,15 @@ class RecordNode(Node[DataModel, Zero]):
             node_name=node_name,
             redis_url=redis_url,
         )
+        self.raw_input = True
         self.jsonl_file_path = jsonl_file_path
         self.aioContextManager: AiofilesContextManager[AsyncTextIOWrapper] | None = None
         self.json_file: AsyncTextIOWrapper | None = None
-        self.write_queue: asyncio.Queue[DataEntry[DataModel]] = asyncio.Queue()
+        self.write_queue: asyncio.Queue[str] = asyncio.Queue()
+        self.data_entry_types: dict[str, type[DataEntry[DataModel]]] = {
+            channel: DataEntry[channel_type]  # type: ignore[valid-type]
+            for channel, channel_type in input_channel_types
+        }
         self.write_task: asyncio.Task[None] | None = None
 
     async def __aenter__(self) -> Self:
@@ -65,8 +70,8 @@ class RecordNode(Node[DataModel, Zero]):
 
     async def write_to_file(self) -> None:
         while self.json_file:
-            data_entry = await self.write_queue.get()
-            await self.json_file.write(data_entry.model_dump_json() + "\n")
+            line = await self.write_queue.get()
+            await self.json_file.write(line + "\n")
             await self.json_file.flush()
             self.write_queue.task_done()
 
@@ -75,8 +80,8 @@ class RecordNode(Node[DataModel, Zero]):
     ) -> AsyncIterator[tuple[str, Message[Zero]]]:
         if input_channel in self.input_channel_types:
             await self.write_queue.put(
-                DataEntry[self.input_channel_types[input_channel]](  # type: ignore[name-defined]
-                    channel=input_channel, data=input_message.data
+                dump_data_entry(
+                    input_channel, input_message, self.data_entry_types[input_channel]
                 )
             )
         else:
@@ -1,3 +1,4 @@
+import importlib
 import logging
 from typing import Any, Callable, TypeVar
 
@@ -43,6 +44,11 @@ class NodeFactory:
     """
     @private
     """
+    lazy_registry: dict[str, str] = {}
+    """
+    @private
+    The modules defining the nodes registered with `register_lazy`, by node name.
+    """
 
     @classmethod
     def register(
@@ -64,11 +70,23 @@ class NodeFactory:
 
         return inner_wrapper
 
+    @classmethod
+    def register_lazy(cls, name: str, module: str) -> None:
+        """
+        @private
+        Register a node by the name of the module defining it. The module is only imported when the node is made, so
+        that processes pay for the imports of the nodes they run only.
+        """
+        cls.lazy_registry[name] = module
+
     @classmethod
     def make(cls, name: str, **kwargs: Any) -> Node[DataModel, DataModel]:
         """
         @private
         """
+        if name not in cls.registry and name in cls.lazy_registry:
+            # Importing the module registers the node.
+            importlib.import_module(cls.lazy_registry[name])
         if name not in cls.registry:
             raise ValueError(f"Executor {name} not found in registry")
         return cls.registry[name](**kwargs)
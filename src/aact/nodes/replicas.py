@@ -0,0 +1,85 @@
+"""
+Replicas split the input messages of a node among several processes. Every replica subscribes to the input channels
+of the node and keeps only its share of the messages, so each message is handled by exactly one replica, and all of
+them publish onto the same output channels:
+
+- Messages of channels with a partition key are partitioned by the hash of the key, so that messages with the same
+    key (e.g., the same session) always go to the same replica. The key is an attribute path into the message, e.g.,
+    `"data.session_id"`.
+- Messages of other channels are distributed round-robin by the sequence number of the message if it has one (see
+    `aact.nodes.sequences`), otherwise by the checksum of the payload. Either way, every replica takes the same
+    decision for a message, whenever it started and whichever messages it missed. Messages handed over in-process by
+    the `aact.nodes.transports.LocalBus` have no payload and are hashed by their JSON instead, so replicas should not
+    share a process group with the producers of their input channels. Channels of the streams transport are split by
+    Redis instead: the replicas read them as one consumer group, unless a streams channel is partitioned by key.
+
+Every replica still receives every message of Pub/Sub channels, so replicas scale the handling of messages, not their
+transport. Messages of partitioned channels are decoded before being dropped.
+"""
+
+import zlib
+from typing import Any
+
+from ..messages.codecs import get_sequence
+from .transports import ReceivedPayload
+
+
+def get_partition(message: Any, partition_key: str, replicas: int) -> int:
+    """
+    The replica handling the message, by the hash of the attribute of the message at the path `partition_key`.
+    """
+    value = message
+    for attribute in partition_key.split("."):
+        value = (
+            value[attribute] if isinstance(value, dict) else getattr(value, attribute)
+        )
+    # Unlike `hash`, the checksum does not depend on the process.
+    return zlib.crc32(str(value).encode()) % replicas
+
+
+class Partitioner:
+    """
+    Decides which input messages a replica handles.
+    """
+
+    def __init__(
+        self,
+        replicas: int,
+        replica_index: int,
+        partition_keys: dict[str, str],
+        split_channels: set[str],
+    ) -> None:
+        self.replicas = replicas
+        self.replica_index = replica_index
+        self.partition_keys = partition_keys
+        self.split_channels = split_channels
+        """
+        The channels whose transport already splits the messages among the replicas.
+        """
+
+    def accepts(self, received: ReceivedPayload) -> bool:
+        """
+        Whether the replica handles a received message of a round-robin channel. Messages of partitioned channels are
+        accepted, to be checked by `owns` once decoded.
+        """
+        channel = received.channel
+        if channel in self.partition_keys or channel in self.split_channels:
+            return True
+        if received.message is not None:
+            number = zlib.crc32(received.message.model_dump_json().encode())
+        elif (tag := get_sequence(received.payload)) is not None:
+            number = zlib.crc32(tag.producer) + tag.number
+        else:
+            number = zlib.crc32(received.payload)
+        return number % self.replicas == self.replica_index
+
+    def owns(self, channel: str, message: Any) -> bool:
+        """
+        Whether the replica handles a decoded message.
+        """
+        partition_key = self.partition_keys.get(channel)
+        if partition_key is None:
+            return True
+        return (
+            get_partition(message, partition_key, self.replicas) == self.replica_index
+        )
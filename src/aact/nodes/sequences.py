@@ -0,0 +1,59 @@
+"""
+Detection of lost, duplicated and reordered messages. Nodes with `sequence_numbers` set tag the payloads they publish
+with a `aact.messages.codecs.SequenceTag`: a random id of the node instance and a number counting up per output
+channel. Every node checks the tags of the payloads it receives, before they are buffered by the input queues, so
+that messages dropped by the input queues are not counted:
+
+- a number above the next expected one means that the messages in between were lost, e.g., dropped by Redis because
+    the subscriber was too slow or reconnecting,
+- a number at or below the last one is a duplicate (e.g., a message of a streams channel delivered again), unless it
+    is one of the recently lost messages arriving late, which is counted as reordered and no longer as lost.
+"""
+
+from typing import Literal
+
+from ..messages.codecs import SequenceTag
+
+SequenceEvent = Literal["first", "in_order", "lost", "duplicated", "reordered"]
+
+
+class SequenceTracker:
+    """
+    Tracks the sequence numbers received from each producer on each channel. Remembers the last `max_missing` missing
+    numbers of each producer and channel to tell reordered messages from duplicates.
+    """
+
+    def __init__(self, max_missing: int = 1024) -> None:
+        self.max_missing = max_missing
+        self._last: dict[tuple[bytes, str], int] = {}
+        self._missing: dict[tuple[bytes, str], dict[int, None]] = {}
+
+    def observe(self, channel: str, tag: SequenceTag) -> tuple[SequenceEvent, int]:
+        """
+        Check the sequence number of a received message. Returns what happened and, for `"lost"`, the number of lost
+        messages.
+        """
+        key = (tag.producer, channel)
+        last = self._last.get(key)
+        if last is None:
+            self._last[key] = tag.number
+            return "first", 0
+        if tag.number == last + 1:
+            self._last[key] = tag.number
+            return "in_order", 0
+        if tag.number > last:
+            self._last[key] = tag.number
+            missing = self._missing.setdefault(key, {})
+            # Only the most recent missing numbers can still arrive.
+            for number in range(
+                max(last + 1, tag.number - self.max_missing), tag.number
+            ):
+                missing[number] = None
+            while len(missing) > self.max_missing:
+                del missing[next(iter(missing))]
+            return "lost", tag.number - last - 1
+        missing = self._missing.get(key, {})
+        if tag.number in missing:
+            del missing[tag.number]
+            return "reordered", 0
+        return "duplicated", 0
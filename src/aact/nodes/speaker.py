@@ -1,7 +1,8 @@
-from typing import Any, AsyncIterator, Optional, TYPE_CHECKING
+from typing import Any, Iterator, Optional, TYPE_CHECKING
 
 from ..utils import Self
 from .base import Node
+from .offload import offload
 from .registry import NodeFactory
 from ..messages import Audio, Zero, Message
 
@@ -63,9 +64,11 @@ class SpeakerNode(Node[Audio, Zero]):
             self.audio.terminate()
         return await super().__aexit__(_, __, ___)
 
-    async def event_handler(
+    @offload("thread")
+    def event_handler(
         self, input_channel: str, message: Message[Audio]
-    ) -> AsyncIterator[tuple[str, Message[Zero]]]:
+    ) -> Iterator[tuple[str, Message[Zero]]]:
+        # Writing to the stream blocks until the audio device has played the previous audio.
         if input_channel == self.input_channel:
             if self.stream:
                 self.stream.write(message.data.audio)
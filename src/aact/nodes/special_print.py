@@ -10,8 +10,8 @@ class SpecialPrintNode(PrintNode):
             if count > 10:
                 await self.r.publish(f"shutdown:{self.node_name}", "shutdown")
                 break
-            data_entry = await self.write_queue.get()
-            await self.output.write(data_entry.model_dump_json() + "\n")
+            line = await self.write_queue.get()
+            await self.output.write(line + "\n")
             await self.output.flush()
             self.write_queue.task_done()
             count += 1
@@ -31,9 +31,7 @@ class TickNode(Node[Zero, Tick]):
         last: float | None = None
         last_sleep = interval
         while True:
-            await self.r.publish(
-                channel, Message[Tick](data=Tick(tick=tick_count)).model_dump_json()
-            )
+            await self.publish(channel, Message[Tick](data=Tick(tick=tick_count)))
             tick_count += 1
             now = time.time()
             if last is not None:
@@ -89,9 +89,9 @@ class TranscriberNode(Node[Audio, Text]):
                     continue
                 transcript = result.alternatives[0].transcript
                 if result.is_final:
-                    await self.r.publish(
+                    await self.publish(
                         self.output_channel,
-                        Message[Text](data=Text(text=transcript)).model_dump_json(),
+                        Message[Text](data=Text(text=transcript)),
                     )
         except exceptions.GoogleAPICallError as e:
             print(f"Error during transcription: {e}")
@@ -0,0 +1,603 @@
+"""
+Transports move encoded payloads between nodes. A node can use different transports for different
+channels, e.g. Redis Pub/Sub for ticks and Redis Streams for messages that must not be lost.
+
+- `PubSubTransport` (`"pubsub"`, the default): fire-and-forget Redis Pub/Sub. Subscribers that are slow or
+  restarting miss messages.
+- `StreamsTransport` (`"streams"`): Redis Streams with consumer groups. Each channel is a bounded stream and each
+  message is delivered to one consumer of every consumer group, and acknowledged after it is handled. Nodes sharing a
+  consumer group split the messages between them, which allows running several replicas of an expensive node.
+- `SharedMemoryTransport` (`"shm"`): Redis Pub/Sub for nodes on the same host, where large payloads are written to a
+  shared memory ring buffer and only a small descriptor is sent through Redis.
+
+In addition, nodes running in the same process share a `LocalBus`, which hands messages of Pub/Sub channels directly to
+the other nodes of the process without serialization, and each node coalesces its publishes with a `PublishBatcher`.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import sys
+import time
+from collections import defaultdict
+from abc import ABC, abstractmethod
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, AsyncIterator, Callable, NamedTuple, TypeVar
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline, PubSub
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+
+class ReceivedPayload(NamedTuple):
+    """
+    An encoded message received by a transport.
+    """
+
+    channel: str
+    payload: bytes | memoryview
+    message_id: bytes | None = None
+    """
+    Transport-specific id used to acknowledge the message, if the transport supports it.
+    """
+    message: BaseModel | None = None
+    """
+    The already decoded message, if it was delivered in-process by the `LocalBus`.
+    """
+    received_at: float | None = None
+    """
+    When the message was received (`time.perf_counter()`), if it was buffered before being handled.
+    """
+
+
+class Transport(ABC):
+    """
+    The base class of all transports.
+    """
+
+    def __init__(self, r: Redis, node_name: str) -> None:
+        self.r = r
+        self.node_name = node_name
+        self.channels: list[str] = []
+
+    @abstractmethod
+    async def subscribe(self, channels: list[str]) -> None:
+        raise NotImplementedError("subscribe must be implemented in a subclass.")
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: bytes) -> None:
+        raise NotImplementedError("publish must be implemented in a subclass.")
+
+    @abstractmethod
+    def queue_publish(self, pipe: Pipeline, channel: str, payload: bytes) -> None:
+        """
+        Queue the command publishing the payload in a pipeline.
+        """
+        raise NotImplementedError("queue_publish must be implemented in a subclass.")
+
+    @abstractmethod
+    def listen(self) -> AsyncIterator[ReceivedPayload]:
+        raise NotImplementedError("listen must be implemented in a subclass.")
+
+    async def ack(self, received: ReceivedPayload) -> None:
+        """
+        Acknowledge that a received message has been handled. No-op for transports without delivery guarantees.
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+T = TypeVar("T", bound=type[Transport])
+
+
+class TransportFactory:
+    """
+    Transports are registered with `@TransportFactory.register` so that they can be referred to by name in the
+    dataflow toml files.
+    """
+
+    registry: dict[str, type[Transport]] = {}
+    """
+    @private
+    """
+
+    @classmethod
+    def register(cls, name: str) -> Callable[[T], T]:
+        def inner_wrapper(wrapped_class: T) -> T:
+            if name in cls.registry:
+                logger.warning("Transport %s already exists. Will replace it", name)
+            cls.registry[name] = wrapped_class
+            return wrapped_class
+
+        return inner_wrapper
+
+    @classmethod
+    def make(cls, name: str, r: Redis, node_name: str, **kwargs: Any) -> Transport:
+        if name not in cls.registry:
+            raise ValueError(f"Transport {name} not found in registry")
+        return cls.registry[name](r, node_name, **kwargs)
+
+
+@TransportFactory.register("pubsub")
+class PubSubTransport(Transport):
+    def __init__(self, r: Redis, node_name: str) -> None:
+        super().__init__(r, node_name)
+        self.pubsub: PubSub = r.pubsub()
+
+    async def subscribe(self, channels: list[str]) -> None:
+        self.channels.extend(channels)
+        await self.pubsub.subscribe(*channels)
+
+    async def publish(self, channel: str, payload: bytes) -> None:
+        await self.r.publish(channel, payload)
+
+    def queue_publish(self, pipe: Pipeline, channel: str, payload: bytes) -> None:
+        pipe.publish(channel, payload)
+
+    async def listen(self) -> AsyncIterator[ReceivedPayload]:
+        async for message in self.pubsub.listen():
+            if message["type"] == "message":
+                yield ReceivedPayload(
+                    message["channel"].decode("utf-8"), message["data"]
+                )
+
+    async def close(self) -> None:
+        await self.pubsub.unsubscribe()
+
+
+@TransportFactory.register("streams")
+class StreamsTransport(Transport):
+    """
+    Redis Streams transport. The stream key of a channel is the channel name.
+
+    Args (set with `[transport_options.streams]` in the dataflow toml):
+
+    - `consumer_group`: the consumer group of the node, by default the node name. Nodes sharing a consumer group split
+        the messages.
+    - `consumer_name`: the name of this consumer in the group, by default the node name.
+    - `max_len`: the approximate maximum length of each stream (XADD MAXLEN ~).
+    - `claim_idle_ms`: messages pending for longer than this in the group, e.g., because the replica which read them
+        died, are claimed by this consumer.
+    - `block_ms`: how long a read blocks before checking for pending messages to claim.
+    - `batch_size`: the maximum number of messages read at once.
+    """
+
+    def __init__(
+        self,
+        r: Redis,
+        node_name: str,
+        consumer_group: str | None = None,
+        consumer_name: str | None = None,
+        max_len: int = 10000,
+        claim_idle_ms: int = 30000,
+        block_ms: int = 1000,
+        batch_size: int = 64,
+    ) -> None:
+        super().__init__(r, node_name)
+        self.consumer_group = consumer_group or node_name
+        self.consumer_name = consumer_name or node_name
+        self.max_len = max_len
+        self.claim_idle_ms = claim_idle_ms
+        self.block_ms = block_ms
+        self.batch_size = batch_size
+
+    async def subscribe(self, channels: list[str]) -> None:
+        for channel in channels:
+            try:
+                await self.r.xgroup_create(
+                    channel, self.consumer_group, id="$", mkstream=True
+                )
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise e
+        self.channels.extend(channels)
+
+    async def publish(self, channel: str, payload: bytes) -> None:
+        await self.r.xadd(
+            channel, {"data": payload}, maxlen=self.max_len, approximate=True
+        )
+
+    def queue_publish(self, pipe: Pipeline, channel: str, payload: bytes) -> None:
+        pipe.xadd(channel, {"data": payload}, maxlen=self.max_len, approximate=True)
+
+    async def listen(self) -> AsyncIterator[ReceivedPayload]:
+        # Messages read by this consumer before a restart but never acknowledged come first.
+        pending_ids: dict[str, str] = {channel: "0" for channel in self.channels}
+        while pending_ids:
+            response: Any = await self.r.xreadgroup(
+                self.consumer_group,
+                self.consumer_name,
+                pending_ids,  # type: ignore[arg-type]
+                count=self.batch_size,
+            )
+            if not response:
+                break
+            for stream_key, entries in response:
+                channel = stream_key.decode("utf-8")
+                if not entries:
+                    del pending_ids[channel]
+                for entry_id, fields in entries:
+                    pending_ids[channel] = entry_id
+                    if not fields:  # the entry was trimmed before it was handled
+                        await self.ack(ReceivedPayload(channel, b"", entry_id))
+                        continue
+                    yield ReceivedPayload(channel, fields[b"data"], entry_id)
+
+        last_claim = time.monotonic()
+        while True:
+            if time.monotonic() - last_claim > self.claim_idle_ms / 1000:
+                async for received in self._claim_idle():
+                    yield received
+                last_claim = time.monotonic()
+            response = await self.r.xreadgroup(
+                self.consumer_group,
+                self.consumer_name,
+                {channel: ">" for channel in self.channels},
+                count=self.batch_size,
+                block=self.block_ms,
+            )
+            for stream_key, entries in response or []:
+                channel = stream_key.decode("utf-8")
+                for entry_id, fields in entries:
+                    yield ReceivedPayload(channel, fields[b"data"], entry_id)
+
+    async def _claim_idle(self) -> AsyncIterator[ReceivedPayload]:
+        for channel in self.channels:
+            start_id = "0-0"
+            while True:
+                claimed: Any = await self.r.xautoclaim(
+                    channel,
+                    self.consumer_group,
+                    self.consumer_name,
+                    min_idle_time=self.claim_idle_ms,
+                    start_id=start_id,
+                    count=self.batch_size,
+                )
+                next_id, entries = claimed[0], claimed[1]
+                for entry_id, fields in entries:
+                    if fields:  # trimmed entries are claimed without fields
+                        yield ReceivedPayload(channel, fields[b"data"], entry_id)
+                if next_id in (b"0-0", "0-0"):
+                    break
+                start_id = next_id
+
+    async def ack(self, received: ReceivedPayload) -> None:
+        if received.message_id is not None:
+            await self.r.xack(
+                received.channel, self.consumer_group, received.message_id
+            )
+
+
+_SHM_DESCRIPTOR = 0x00
+"""
+The first byte of shared memory descriptors. Never the first byte of a payload, see `aact.messages.codecs`.
+"""
+_SHM_DESCRIPTOR_FIELDS = struct.Struct(">QQQ")
+_SHM_RECORD_HEADER = struct.Struct(">QQ")
+_created_segments: set[str] = set()
+
+
+class SharedMemoryRing:
+    """
+    A ring buffer in a shared memory segment, written by a single publisher. Each record is prefixed with its
+    generation and length, so that readers can tell whether it has been overwritten since it was published.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.segment = SharedMemory(
+            name=f"aact_{os.urandom(8).hex()}", create=True, size=size
+        )
+        self.name = self.segment.name.lstrip("/")
+        _created_segments.add(self.name)
+        self.buf: memoryview = self.segment.buf  # type: ignore[assignment]
+        self.size = size
+        self.offset = 0
+        self.generation = 0
+
+    def write(self, payload: bytes | memoryview) -> bytes | None:
+        """
+        Write a payload into the ring. Returns its descriptor, or `None` if the payload does not fit into the ring.
+        """
+        length = len(payload)
+        record_size = (_SHM_RECORD_HEADER.size + length + 7) & ~7
+        if record_size > self.size:
+            return None
+        if self.offset + record_size > self.size:
+            self.offset = 0
+        self.generation += 1
+        offset = self.offset + _SHM_RECORD_HEADER.size
+        _SHM_RECORD_HEADER.pack_into(self.buf, self.offset, self.generation, length)
+        self.buf[offset : offset + length] = payload
+        self.offset += record_size
+        return (
+            bytes((_SHM_DESCRIPTOR,))
+            + _SHM_DESCRIPTOR_FIELDS.pack(offset, length, self.generation)
+            + self.name.encode()
+        )
+
+    def close(self) -> None:
+        del self.buf
+        self.segment.unlink()
+        try:
+            self.segment.close()
+        except BufferError:
+            pass  # views of the segment are still alive, the mapping goes away with them
+
+
+@TransportFactory.register("shm")
+class SharedMemoryTransport(PubSubTransport):
+    """
+    Redis Pub/Sub transport for nodes on the same host, which moves large payloads (e.g., `aact.messages.Image`)
+    through shared memory instead of Redis.
+
+    A payload of at least `min_size` bytes is copied into a ring buffer in a shared memory segment owned by the
+    publishing node, and only its descriptor (segment, offset, length, generation) is published to Redis. Receivers
+    map the segment and copy the payload out of it as soon as it is received, as messages may wait in input queues or
+    batches before being decoded. Nodes with `raw_input` get a `memoryview` of the payload instead, without copying
+    it: with the binary codec, the bytes fields can then be used without a single copy, e.g.,
+    `numpy.frombuffer(message.blobs()[0])`.
+
+    Such a view stays valid until the publisher wraps around the ring and overwrites it, so the ring should hold the
+    payloads published during the time the slowest receiver takes to handle one. Payloads already overwritten when
+    they are received (or while they are copied) are dropped with a warning. Receivers on other hosts cannot map the
+    segment and drop the payloads too. The segments of publishers which stopped (e.g., restarted with a new segment)
+    are unmapped when a new segment shows up.
+
+    Args (set with `[transport_options.shm]` in the dataflow toml):
+
+    - `segment_size`: the size of the ring buffer of each publishing node, in bytes.
+    - `min_size`: payloads smaller than this are sent through Redis as usual.
+    """
+
+    def __init__(
+        self,
+        r: Redis,
+        node_name: str,
+        segment_size: int = 64 * 1024 * 1024,
+        min_size: int = 64 * 1024,
+    ) -> None:
+        super().__init__(r, node_name)
+        self.segment_size = segment_size
+        self.min_size = min_size
+        self._ring: SharedMemoryRing | None = None
+        self._segments: dict[str, SharedMemory] = {}
+        self.copy_payloads = True
+        """
+        Whether received payloads are copied out of the shared memory, or handed over as views of it.
+        """
+
+    def _to_descriptor(self, payload: bytes) -> bytes:
+        if len(payload) < self.min_size:
+            return payload
+        if self._ring is None:
+            self._ring = SharedMemoryRing(self.segment_size)
+        return self._ring.write(payload) or payload
+
+    def _from_descriptor(self, descriptor: bytes) -> bytes | memoryview | None:
+        offset, length, generation = _SHM_DESCRIPTOR_FIELDS.unpack_from(descriptor, 1)
+        name = descriptor[1 + _SHM_DESCRIPTOR_FIELDS.size :].decode()
+        if name not in self._segments:
+            self._evict_stopped_segments()
+            try:
+                self._segments[name] = _attach_shared_memory(name)
+            except FileNotFoundError:
+                logger.warning(
+                    "Shared memory segment %s not found. Is the publisher on another host?",
+                    name,
+                )
+                return None
+        buf: memoryview = self._segments[name].buf  # type: ignore[assignment]
+        header_offset = offset - _SHM_RECORD_HEADER.size
+        record_generation, _ = _SHM_RECORD_HEADER.unpack_from(buf, header_offset)
+        if record_generation != generation:
+            return None
+        if not self.copy_payloads:
+            return buf[offset : offset + length]
+        payload = bytes(buf[offset : offset + length])
+        # The publisher overwrites the header of a record before its payload, so the payload was copied whole if the
+        # header is still the same (as with a seqlock).
+        record_generation, _ = _SHM_RECORD_HEADER.unpack_from(buf, header_offset)
+        if record_generation != generation:
+            return None
+        return payload
+
+    def _evict_stopped_segments(self) -> None:
+        """
+        Unmap the segments unlinked by their publishers, e.g., when they stopped.
+        """
+        for name, segment in list(self._segments.items()):
+            try:
+                _attach_shared_memory(name).close()
+            except FileNotFoundError:
+                del self._segments[name]
+                try:
+                    segment.close()
+                except BufferError:
+                    pass  # views of the segment are still alive, the mapping goes away with them
+
+    async def publish(self, channel: str, payload: bytes) -> None:
+        await super().publish(channel, self._to_descriptor(payload))
+
+    def queue_publish(self, pipe: Pipeline, channel: str, payload: bytes) -> None:
+        super().queue_publish(pipe, channel, self._to_descriptor(payload))
+
+    async def listen(self) -> AsyncIterator[ReceivedPayload]:
+        async for received in super().listen():
+            if received.payload[0] != _SHM_DESCRIPTOR:
+                yield received
+                continue
+            payload = self._from_descriptor(bytes(received.payload))
+            if payload is None:
+                logger.warning(
+                    "Dropped a message of %s overwritten in shared memory before it was received. "
+                    "Consider a larger segment_size.",
+                    received.channel,
+                )
+                continue
+            yield received._replace(payload=payload)
+
+    async def close(self) -> None:
+        await super().close()
+        if self._ring is not None:
+            self._ring.close()
+        for segment in self._segments.values():
+            try:
+                segment.close()
+            except BufferError:
+                pass
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    segment = SharedMemory(name=name)
+    if name not in _created_segments:
+        # Before Python 3.13, attaching registers the segment with the resource tracker, which would unlink it when
+        # this process exits, under the feet of the publisher.
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore[attr-defined]
+    return segment
+
+
+class LocalBus:
+    """
+    An in-process bus for nodes running on the same event loop and connecting to the same Redis server.
+
+    Messages published to a Pub/Sub channel are put into the inboxes of the local subscribers as they are, without
+    being encoded. The message is mirrored to Redis only when there are subscribers outside of the process, tagged with
+    the `origin` of the bus so that local subscribers drop the copy coming back from Redis.
+
+    Whether there are remote subscribers is derived from `PUBSUB NUMSUB` minus the local subscriptions and cached for
+    `numsub_ttl` seconds. Messages are shared among local subscribers and must not be modified by them.
+
+    The bus of an event loop is dropped once the last node using it has released it.
+    """
+
+    _buses: dict[tuple[str, asyncio.AbstractEventLoop], "LocalBus"] = {}
+
+    def __init__(self, numsub_ttl: float = 1.0) -> None:
+        self.origin = os.urandom(8)
+        self.numsub_ttl = numsub_ttl
+        self.inboxes: dict[str, list[asyncio.Queue[ReceivedPayload]]] = defaultdict(
+            list
+        )
+        self._numsub: dict[str, tuple[float, int]] = {}
+        self._key: tuple[str, asyncio.AbstractEventLoop] | None = None
+        self._users = 0
+
+    @classmethod
+    def get(cls, redis_url: str) -> "LocalBus":
+        """
+        Get the bus of the running event loop for the given Redis server. Each call must be paired with a `release`.
+        """
+        key = (redis_url, asyncio.get_running_loop())
+        if key not in cls._buses:
+            cls._buses[key] = LocalBus()
+            cls._buses[key]._key = key
+        bus = cls._buses[key]
+        bus._users += 1
+        return bus
+
+    def release(self) -> None:
+        """
+        Stop using the bus.
+        """
+        self._users -= 1
+        if self._users == 0 and self._key is not None:
+            if LocalBus._buses.get(self._key) is self:
+                del LocalBus._buses[self._key]
+
+    def subscribe(self, channel: str, inbox: asyncio.Queue[ReceivedPayload]) -> None:
+        self.inboxes[channel].append(inbox)
+
+    def unsubscribe(self, inbox: asyncio.Queue[ReceivedPayload]) -> None:
+        for channel, inboxes in list(self.inboxes.items()):
+            if inbox in inboxes:
+                inboxes.remove(inbox)
+            if not inboxes:
+                del self.inboxes[channel]
+
+    def deliver(self, channel: str, message: BaseModel) -> int:
+        """
+        Deliver the message to the local subscribers of the channel. Returns the number of local subscribers.
+        """
+        inboxes = self.inboxes.get(channel, [])
+        for inbox in inboxes:
+            inbox.put_nowait(ReceivedPayload(channel, b"", message=message))
+        return len(inboxes)
+
+    async def has_remote_subscribers(self, r: Redis, channel: str) -> bool:
+        now = time.monotonic()
+        if (
+            channel not in self._numsub
+            or now - self._numsub[channel][0] > self.numsub_ttl
+        ):
+            numsub: Any = await r.pubsub_numsub(channel)
+            self._numsub[channel] = (now, numsub[0][1])
+        return self._numsub[channel][1] > len(self.inboxes.get(channel, []))
+
+
+class PublishBatcher:
+    """
+    Coalesces the publishes of a node into Redis pipelines, saving a round trip per message.
+
+    A publish returns as soon as the payload is queued. The queue is flushed in one pipeline `max_delay_ms` after the
+    first queued payload (with `0`, at the next iteration of the event loop, so only publishes issued at the same time
+    are batched), or right away once it holds `max_batch_size` payloads, in which case the publish waits for the
+    flush. Flushes run one after another, so messages are sent in the order they were published. An error of a
+    background flush is raised by the next publish.
+    """
+
+    def __init__(
+        self, r: Redis, max_batch_size: int = 64, max_delay_ms: float = 0.0
+    ) -> None:
+        self.r = r
+        self.max_batch_size = max_batch_size
+        self.max_delay_ms = max_delay_ms
+        self._pending: list[tuple[Transport, str, bytes]] = []
+        self._lock = asyncio.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+        self._error: Exception | None = None
+
+    async def publish(self, transport: Transport, channel: str, payload: bytes) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        self._pending.append((transport, channel, payload))
+        if len(self._pending) >= self.max_batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay_ms / 1000)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to publish a batch of messages: {e}")
+            self._error = e
+
+    async def flush(self) -> None:
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            pipe = self.r.pipeline(transaction=False)
+            for transport, channel, payload in batch:
+                transport.queue_publish(pipe, channel, payload)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        """
+        Send the queued payloads.
+        """
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
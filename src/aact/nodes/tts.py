@@ -71,11 +71,9 @@ class TTSNode(Node[Text, Audio]):
                         "audio_config": self.audio_config,
                     }
                 )
-                await self.r.publish(
+                await self.publish(
                     self.output_channel,
-                    Message[Audio](
-                        data=Audio(audio=response.audio_content)
-                    ).model_dump_json(),
+                    Message[Audio](data=Audio(audio=response.audio_content)),
                 )
             except exceptions.GoogleAPICallError as e:
                 print(f"Error during speech synthesis: {e}")
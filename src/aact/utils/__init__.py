@@ -1,4 +1,5 @@
 from .types import Self
 from .tomllib import tomllib
+from .event_loop import EventLoop, new_event_loop
 
-__all__ = ["Self", "tomllib"]
+__all__ = ["Self", "tomllib", "EventLoop", "new_event_loop"]
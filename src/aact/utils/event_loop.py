@@ -0,0 +1,28 @@
+import asyncio
+import importlib.util
+from typing import Literal
+
+UVLOOP_AVAILABLE = importlib.util.find_spec("uvloop") is not None
+
+EventLoop = Literal["asyncio", "uvloop"]
+
+
+def new_event_loop(event_loop: EventLoop = "asyncio") -> asyncio.AbstractEventLoop:
+    """
+    Create an event loop of the given implementation. uvloop is only imported when a `"uvloop"` event loop is created,
+    which raises an `ImportError` when uvloop is not installed.
+    """
+    if event_loop == "uvloop":
+        try:
+            import uvloop  # type: ignore[import-not-found,unused-ignore]
+        except ImportError as e:
+            raise ImportError(
+                "uvloop is not available. "
+                "Please install aact with `pip install aact[uvloop]` to use the uvloop event loop."
+            ) from e
+        loop: asyncio.AbstractEventLoop = uvloop.new_event_loop()
+        return loop
+    return asyncio.new_event_loop()
+
+
+__all__ = ["EventLoop", "new_event_loop"]
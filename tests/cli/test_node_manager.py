@@ -0,0 +1,198 @@
+import ast
+import asyncio
+import inspect
+import sys
+import textwrap
+from multiprocessing import forkserver, popen_forkserver
+from pathlib import Path
+from typing import Any
+
+import pytest
+from aact.cli.reader import RestartConfig
+from aact.manager import NodeManager
+from aact.manager.manager import DEDICATED_FORK_SERVERS, _ForkServerPopen
+
+PROBE_MODULE = """
+import os
+import sys
+
+from aact.nodes import NodeFactory
+from aact.nodes.print import PrintNode
+
+IMPORTED_BY = os.getpid()
+
+
+@NodeFactory.register("probe")
+class ProbeNode(PrintNode):
+    def __init__(self, output_dir: str, node_name: str, redis_url: str) -> None:
+        with open(os.path.join(output_dir, node_name), "w") as f:
+            print(os.getpid(), os.getpgid(0), IMPORTED_BY, file=f)
+            print(*sorted(name for name in sys.modules if name.endswith("_probe")), file=f)
+        raise SystemExit(0)
+
+
+@NodeFactory.register("flaky")
+class FlakyNode(PrintNode):
+    def __init__(self, output_dir: str, failures: int, node_name: str, redis_url: str) -> None:
+        starts = os.path.join(output_dir, node_name)
+        with open(starts, "a") as f:
+            print("start", file=f)
+        with open(starts) as f:
+            raise SystemExit(1 if len(f.readlines()) <= failures else 0)
+"""
+
+
+@pytest.mark.skipif(
+    not DEDICATED_FORK_SERVERS, reason="The managers share the fork server"
+)
+def test_fork_server(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # The fork servers import the extra modules from the PYTHONPATH.
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    dataflow_tomls = []
+    for dataflow in ["first", "second"]:
+        (tmp_path / f"{dataflow}_probe.py").write_text(PROBE_MODULE)
+        dataflow_toml = tmp_path / f"{dataflow}.toml"
+        dataflow_toml.write_text(
+            f"""
+redis_url = "redis://localhost:6379/0"
+extra_modules = ["{dataflow}_probe"]
+
+[[nodes]]
+node_name = "{dataflow}-a"
+node_class = "probe"
+node_args = {{ output_dir = "{output_dir}" }}
+
+[[nodes]]
+node_name = "{dataflow}-b"
+node_class = "probe"
+node_args = {{ output_dir = "{output_dir}" }}
+process_group = "g"
+"""
+        )
+        dataflow_tomls.append(str(dataflow_toml))
+
+    async def main() -> None:
+        async with NodeManager(dataflow_tomls[0], fork_server=True) as first:
+            async with NodeManager(dataflow_tomls[1], fork_server=True) as second:
+                # The probe nodes exit right away.
+                for manager in [first, second]:
+                    await asyncio.wait_for(manager.wait_until_shutdown(), 30)
+                    assert set(manager.node_health.values()) == {"Stopped"}
+                    assert not manager.shutdown_signal
+
+                fork_servers: dict[str, set[int]] = {}
+                for dataflow, manager in [("first", first), ("second", second)]:
+                    for node_name, process in manager.subprocesses.items():
+                        ids, modules = (output_dir / node_name).read_text().splitlines()
+                        pid, pgid, imported_by = map(int, ids.split())
+                        assert pid == process.pid
+                        # Each node process leads its own process group.
+                        assert pid == pgid
+                        # The fork server of the manager imported the module of its own dataflow only.
+                        assert imported_by != pid
+                        assert modules.split() == [f"{dataflow}_probe"]
+                        fork_servers.setdefault(dataflow, set()).add(imported_by)
+                assert len(fork_servers["first"] | fork_servers["second"]) == 2
+
+    asyncio.run(main())
+
+
+@pytest.mark.skipif(
+    not DEDICATED_FORK_SERVERS, reason="The managers share the fork server"
+)
+def test_fork_server_internals() -> None:
+    # `_ForkServerPopen._launch` is a copy of a private method of multiprocessing, which must not have changed.
+    def source(method: Any) -> str:
+        function = ast.parse(textwrap.dedent(inspect.getsource(method))).body[0]
+        assert isinstance(function, ast.FunctionDef)
+        for arg in function.args.args:
+            arg.annotation = None
+        function.returns = None
+        return ast.unparse(function)
+
+    expected = source(getattr(popen_forkserver.Popen, "_launch"))
+    for private, copied in [
+        ("process_obj._name", "process_obj.name"),
+        (
+            "forkserver.connect_to_new_process",
+            "self._fork_server.connect_to_new_process",
+        ),
+        ("util.close_fds", "_close_fds"),
+    ]:
+        expected = expected.replace(private, copied)
+    assert source(_ForkServerPopen._launch) == expected
+    assert callable(getattr(forkserver.ForkServer, "_stop", None))
+
+
+def test_restart_delay() -> None:
+    restart = RestartConfig(
+        policy="on-failure", max_restarts=3, backoff_initial_ms=100, jitter=0
+    )
+    assert [restart.delay(True, restarts) for restarts in range(4)] == [
+        0.1,
+        0.2,
+        0.4,
+        None,
+    ]
+    assert restart.delay(False, 0) is None
+    assert restart.model_copy(update={"policy": "always"}).delay(False, 0) == 0.1
+    assert restart.model_copy(update={"policy": "never"}).delay(True, 0) is None
+
+    restart = RestartConfig(
+        policy="always", max_restarts=0, backoff_max_ms=1000, jitter=0.5
+    )
+    for restarts in range(1000):
+        delay = restart.delay(True, restarts)
+        assert delay is not None and delay <= 1.5
+
+
+def test_restart(tmp_path: Path) -> None:
+    (tmp_path / "restart_probe.py").write_text(PROBE_MODULE)
+    sys.path.insert(0, str(tmp_path))
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    dataflow_toml = tmp_path / "dataflow.toml"
+    dataflow_toml.write_text(
+        f"""
+redis_url = "redis://localhost:6379/0"
+extra_modules = ["restart_probe"]
+
+[restart]
+policy = "on-failure"
+max_restarts = 2
+backoff_initial_ms = 10
+
+[[nodes]]
+node_name = "recovers"
+node_class = "flaky"
+node_args = {{ output_dir = "{output_dir}", failures = 2 }}
+
+[[nodes]]
+node_name = "gives-up"
+node_class = "flaky"
+node_args = {{ output_dir = "{output_dir}", failures = 5 }}
+
+[[nodes]]
+node_name = "never"
+node_class = "flaky"
+node_args = {{ output_dir = "{output_dir}", failures = 5 }}
+restart = {{ policy = "never" }}
+"""
+    )
+
+    async def main() -> None:
+        async with NodeManager(str(dataflow_toml), fork_server=True) as manager:
+            await asyncio.wait_for(manager.wait_until_shutdown(), 30)
+
+            assert set(manager.node_health.values()) == {"Stopped"}
+            assert manager.node_restarts == {"recovers": 2, "gives-up": 2, "never": 0}
+            for node_name, starts in [("recovers", 3), ("gives-up", 3), ("never", 1)]:
+                assert len((output_dir / node_name).read_text().split()) == starts
+
+    try:
+        asyncio.run(main())
+    finally:
+        sys.path.remove(str(tmp_path))
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Any
+
+import pytest
+from aact.cli.launch.launch import _run_process_group
+from aact.cli.reader import Config
+from aact.nodes import NodeFactory
+from aact.nodes.print import PrintNode
+from redis.asyncio import ConnectionPool
+
+
+def test_process_group_event_loops() -> None:
+    nodes: list[dict[str, Any]] = [
+        {"node_name": "a", "node_class": "print", "process_group": "g"},
+        {"node_name": "b", "node_class": "print", "process_group": "g"},
+        {"node_name": "c", "node_class": "print", "event_loop": "uvloop"},
+    ]
+    config = Config.model_validate(
+        {"redis_url": "redis://localhost:6379/0", "nodes": nodes}
+    )
+    assert [node.process_group for node in config.nodes] == ["g", "g", None]
+
+    nodes[1]["event_loop"] = "uvloop"
+    with pytest.raises(ValueError, match="process group g"):
+        Config.model_validate({"redis_url": "redis://localhost:6379/0", "nodes": nodes})
+
+    nodes[1]["event_loop"] = "asyncio"
+    nodes[1]["restart"] = {"policy": "always"}
+    with pytest.raises(ValueError, match="same restart policy"):
+        Config.model_validate({"redis_url": "redis://localhost:6379/0", "nodes": nodes})
+
+
+def test_shared_connection_pool() -> None:
+    connection_pool = ConnectionPool.from_url("redis://localhost:6379/0")
+    nodes = [
+        NodeFactory.make(
+            "print",
+            print_channel_types={"tick": "tick"},
+            node_name=name,
+            redis_url="redis://localhost:6379/0",  # not connected to
+        )
+        for name in ["a", "b"]
+    ]
+    for node in nodes:
+        node.set_connection_pool(connection_pool)
+        node.set_transports({"tick": "streams"})
+
+    for node in nodes:
+        assert node.r.connection_pool is connection_pool
+        assert node._get_transport("tick").r is node.r
+        assert node._get_transport("other").r is node.r
+        assert not node.r.auto_close_connection_pool
+
+    with pytest.raises(ValueError):
+        nodes[0].set_connection_pool(connection_pool)
+
+
+starts: dict[str, int] = {}
+
+
+@NodeFactory.register("failing")
+class FailingNode(PrintNode):
+    def __init__(self, node_name: str, redis_url: str) -> None:
+        starts[node_name] = starts.get(node_name, 0) + 1
+        raise ValueError("cannot start")
+
+
+def test_process_group_restarts_failed_nodes() -> None:
+    config = Config.model_validate(
+        {
+            "redis_url": "redis://localhost:6379/0",
+            "restart": {
+                "policy": "on-failure",
+                "max_restarts": 2,
+                "backoff_initial_ms": 1,
+            },
+            "nodes": [
+                {"node_name": name, "node_class": "failing", "process_group": "g"}
+                for name in ["a", "b"]
+            ],
+        }
+    )
+
+    with pytest.raises(Exception, match="cannot start"):
+        asyncio.run(_run_process_group(config.nodes, config.redis_url))
+
+    # Each node is restarted on its own, until it reaches max_restarts.
+    assert starts == {"a": 3, "b": 3}
@@ -0,0 +1,181 @@
+import pytest
+import json
+
+from aact.messages import (
+    Audio,
+    BinaryCodec,
+    CodecFactory,
+    CompressionConfig,
+    Image,
+    Message,
+    RawMessage,
+    Text,
+    Tick,
+    decode_message,
+    encode_message,
+)
+from aact.messages.codecs import SequenceTag, get_origin, get_sequence, retag_payload
+from aact.messages.commons import DataEntry, dump_data_entry
+
+
+def test_json_codec_is_backward_compatible() -> None:
+    message = Message[Image](data=Image(image=b"\x00\x01\xff"))
+    payload = encode_message(message, CodecFactory.make("json"))
+
+    assert payload == message.model_dump_json().encode()
+    assert decode_message(payload, Message[Image]) == message
+
+
+def test_binary_codec_round_trip() -> None:
+    audio = bytes(range(256)) * 16
+    message = Message[Audio](data=Audio(audio=audio))
+    payload = encode_message(message, CodecFactory.make("binary"))
+
+    assert payload[0] == BinaryCodec.codec_id
+    # raw bytes instead of hex: the payload is about the size of the audio, not twice as much
+    assert len(payload) < len(audio) + 64
+    decoded = decode_message(payload, Message[Audio])
+    assert decoded == message
+
+
+def test_binary_codec_without_bytes_fields() -> None:
+    message = Message[Tick | Text](data=Text(text="hello"))
+    payload = encode_message(message, CodecFactory.make("binary"))
+
+    decoded = decode_message(payload, Message[Tick | Text])
+    assert isinstance(decoded.data, Text)
+    assert decoded.data.text == "hello"
+
+
+def test_unknown_codec() -> None:
+    with pytest.raises(ValueError):
+        CodecFactory.make("unknown")
+    with pytest.raises(ValueError):
+        decode_message(b"\x0e", Message[Tick])
+
+
+def test_reserved_codec_id() -> None:
+    class BraceCodec(BinaryCodec):
+        codec_id = 0x0B
+
+    # with all tag flags and compression, the header byte would be `{`
+    with pytest.raises(ValueError, match="reserved"):
+        CodecFactory.register("brace")(BraceCodec)
+    assert "brace" not in CodecFactory.registry
+
+
+def test_origin_tag() -> None:
+    message = Message[Text](data=Text(text="hello"))
+    origin = b"\x01" * 8
+    for codec_name in ["json", "binary"]:
+        codec = CodecFactory.make(codec_name)
+        assert get_origin(encode_message(message, codec)) is None
+        payload = encode_message(message, codec, origin)
+        assert get_origin(payload) == origin
+        assert decode_message(payload, Message[Text]) == message
+
+
+@pytest.mark.parametrize("codec", ["json", "binary"])
+def test_retag_payload(codec: str) -> None:
+    message = Message[Tick](data=Tick(tick=1))
+    untagged = encode_message(message, CodecFactory.make(codec))
+    tagged = encode_message(message, CodecFactory.make(codec), b"12345678")
+
+    assert retag_payload(untagged, b"12345678") == tagged
+    assert retag_payload(tagged, None) == untagged
+    assert get_origin(retag_payload(tagged, b"87654321")) == b"87654321"
+
+
+@pytest.mark.parametrize("codec", ["json", "binary"])
+def test_sequence_tag(codec: str) -> None:
+    message = Message[Tick](data=Tick(tick=1))
+    sequence = SequenceTag(b"producer", 2**40)
+    payload = encode_message(message, CodecFactory.make(codec), b"12345678", sequence)
+
+    assert get_origin(payload) == b"12345678"
+    assert get_sequence(payload) == sequence
+    assert decode_message(payload, Message[Tick]) == message
+    retagged = retag_payload(payload, None, SequenceTag(b"forwards", 0))
+    assert get_origin(retagged) is None
+    assert get_sequence(retagged) == SequenceTag(b"forwards", 0)
+    assert retag_payload(retagged, None) == encode_message(
+        message, CodecFactory.make(codec)
+    )
+
+
+def test_raw_message() -> None:
+    message = Message[Image](data=Image(image=b"\x00\x01\xff"))
+    raw = RawMessage(
+        encode_message(message, CodecFactory.make("json"), b"12345678"), Message[Image]
+    )
+
+    assert raw.json_body() == message.model_dump_json().encode()
+    assert raw.data == message.data
+    assert RawMessage(None, Message[Image], message).payload == raw.json_body()
+    binary = RawMessage(
+        encode_message(message, CodecFactory.make("binary")), Message[Image]
+    )
+    assert binary.json_body() is None
+    assert binary.message == message
+
+
+@pytest.mark.parametrize("codec", ["json", "binary"])
+def test_dump_raw_data_entry(codec: str) -> None:
+    message = Message[Image](data=Image(image=b"\x00\x01\xff"))
+    raw = RawMessage(encode_message(message, CodecFactory.make(codec)), Message[Image])
+
+    entry = json.loads(dump_data_entry("camera", raw, DataEntry[Image]))
+    expected = json.loads(dump_data_entry("camera", message, DataEntry[Image]))
+
+    assert list(entry) == ["timestamp", "channel", "data"]
+    assert entry["channel"] == expected["channel"]
+    assert entry["data"] == expected["data"]
+
+
+@pytest.mark.parametrize(
+    "body", [b'{"data": {"image": "00"', b"{}", b'{"data": 1} trailing']
+)
+def test_dump_malformed_raw_data_entry(body: bytes) -> None:
+    # Malformed payloads are validated instead of being spliced into the recording.
+    raw = RawMessage(body, Message[Image])
+    with pytest.raises(ValueError):
+        dump_data_entry("camera", raw, DataEntry[Image])
+
+
+def test_raw_message_blobs() -> None:
+    image = bytes(range(256))
+    message = Message[Image](data=Image(image=image))
+    raw = RawMessage(
+        encode_message(message, CodecFactory.make("binary"), b"12345678"),
+        Message[Image],
+    )
+
+    assert raw.blobs() == [image]
+    with pytest.raises(ValueError):
+        RawMessage(None, Message[Image], message).blobs()
+
+
+@pytest.mark.parametrize("codec", ["json", "binary"])
+def test_compression(codec: str) -> None:
+    message = Message[Audio](data=Audio(audio=bytes(4096)))
+    compression = CompressionConfig(algorithm="zlib", level=1, min_size=1024)
+    payload = encode_message(message, CodecFactory.make(codec), compression=compression)
+
+    assert len(payload) < 200
+    assert decode_message(payload, Message[Audio]) == message
+    retagged = retag_payload(payload, b"12345678")
+    assert decode_message(retagged, Message[Audio]) == message
+    raw = RawMessage(retagged, Message[Audio])
+    if codec == "json":
+        assert json.loads(dump_data_entry("audio", raw, DataEntry[Audio]))["data"] == {
+            "data_type": "audio",
+            "audio": "00" * 4096,
+        }
+    else:
+        assert raw.blobs() == [bytes(4096)]
+
+    # Small messages are sent as they are.
+    small = Message[Text](data=Text(text="hello"))
+    assert encode_message(
+        small, CodecFactory.make("json"), compression=compression
+    ) == encode_message(small, CodecFactory.make("json"))
@@ -11,3 +11,8 @@ def test_get_rest_request_class() -> None:
 
     assert response_class.__name__ == "RestResponse[Text]"
     assert response_class.__annotations__["data"] == Text | None
+
+
+def test_rest_classes_are_cached() -> None:
+    assert get_rest_request_class(Text) is get_rest_request_class(Text)
+    assert get_rest_response_class(Text) is get_rest_response_class(Text)
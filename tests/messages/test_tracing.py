@@ -0,0 +1,88 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator
+
+from aact.messages import Message, RawMessage, Tick, TraceCollector, TraceContext
+from aact.messages.codecs import CodecFactory, encode_message
+from aact.messages.commons import DataEntry, dump_data_entry
+from aact.nodes import Node
+
+
+def test_untraced_messages_are_serialized_as_before() -> None:
+    message = Message[Tick](data=Tick(tick=1))
+    assert message.model_dump_json() == '{"data":{"data_type":"tick","tick":1}}'
+
+    traced = Message[Tick](data=Tick(tick=1), trace=TraceContext.start("clock"))
+    for codec in ["json", "binary"]:
+        payload = encode_message(traced, CodecFactory.make(codec))
+        assert RawMessage(payload, Message[Tick]).message == traced
+
+
+class ForwardNode(Node[Tick, Tick]):
+    def __init__(self, node_name: str, inputs: list[Message[Tick]]) -> None:
+        super().__init__(
+            input_channel_types=[("in", Tick)],
+            output_channel_types=[("out", Tick)],
+            node_name=node_name,
+        )
+        self.inputs = inputs
+        self.published: list[Message[Tick]] = []
+
+    async def _wait_for_input(self) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        for input_message in self.inputs:
+            yield "in", input_message
+
+    async def publish(self, channel: str, message: Message[Tick]) -> None:
+        self.published.append(message)
+
+    async def event_handler(
+        self, input_channel: str, input_message: Message[Tick]
+    ) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        yield "out", input_message
+        yield "out", Message[Tick](data=Tick(tick=input_message.data.tick + 1))
+
+
+def test_event_loop_propagates_traces(tmp_path: Path) -> None:
+    root = TraceContext.start("clock")
+    first = ForwardNode("first", [Message[Tick](data=Tick(tick=0), trace=root)])
+    asyncio.run(first.event_loop())
+    second = ForwardNode("second", first.published[:1])
+    asyncio.run(second.event_loop())
+
+    for output in first.published:
+        assert output.trace is not None
+        assert output.trace.trace_id == root.trace_id
+        assert output.trace.span_id != root.span_id
+        assert output.trace.parent_span_id == root.span_id
+        assert output.trace.producer == "first"
+        assert output.trace.hop == 1
+    assert second.published[0].trace is not None
+    assert second.published[0].trace.hop == 2
+
+    recording = tmp_path / "recording.jsonl"
+    entry_type = DataEntry[Tick]
+    with open(recording, "w") as f:
+        clock = Message[Tick](data=Tick(tick=0), trace=root)
+        f.write(dump_data_entry("clock", clock, entry_type) + "\n")
+        for message in first.published:
+            # Raw messages are spliced into the recording with their trace.
+            raw = RawMessage(
+                encode_message(message, CodecFactory.make("json")), Message[Tick]
+            )
+            f.write(dump_data_entry("first", raw, entry_type) + "\n")
+        f.write(dump_data_entry("second", second.published[0], entry_type) + "\n")
+        f.write(
+            dump_data_entry("untraced", Message[Tick](data=Tick(tick=0)), entry_type)
+            + "\n"
+        )
+
+    hops = TraceCollector.from_jsonl(str(recording)).breakdown(root.trace_id)
+
+    assert [(hop.producer, hop.hop) for hop in hops] == [
+        ("clock", 0),
+        ("first", 1),
+        ("first", 1),
+        ("second", 2),
+    ]
+    assert hops[0].latency is None
+    assert all(hop.latency is not None and hop.latency >= 0 for hop in hops[1:])
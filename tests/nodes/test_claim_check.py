@@ -0,0 +1,43 @@
+import asyncio
+
+from aact.messages import CodecFactory, Message, Tick, encode_message
+from aact.messages.codecs import get_origin
+from aact.nodes.claim_check import ClaimCheckStore, get_claim_check_key
+
+
+class DictRedis:
+    def __init__(self) -> None:
+        self.values: dict[bytes, bytes] = {}
+        self.gets = 0
+
+    async def set(self, key: bytes, value: bytes, px: int) -> None:
+        self.values[key] = value
+
+    async def get(self, key: bytes) -> bytes | None:
+        self.gets += 1
+        return self.values.get(key)
+
+
+def test_claim_check_store() -> None:
+    async def main() -> None:
+        r = DictRedis()
+        store = ClaimCheckStore(r)  # type: ignore[arg-type]
+        payload = encode_message(
+            Message[Tick](data=Tick(tick=1)), CodecFactory.make("json")
+        )
+
+        assert get_claim_check_key(payload) is None
+        reference = await store.store(payload, ttl_ms=1000, origin=b"12345678")
+        assert get_origin(reference) == b"12345678"
+        key = get_claim_check_key(reference)
+        assert key is not None
+
+        assert await store.fetch(key) == payload
+        assert await store.fetch(key) == payload
+        assert r.gets == 1
+
+        del r.values[key]
+        store._cache.clear()
+        assert await store.fetch(key) is None
+
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+from aact.messages import (
+    CodecFactory,
+    DeadLetter,
+    Message,
+    Tick,
+    decode_message,
+    encode_message,
+)
+from aact.nodes import Node
+from aact.nodes.base import ErrorPolicy, NodeExitSignal
+from aact.nodes.transports import ReceivedPayload
+from pydantic import ValidationError
+
+
+class RecordingTransport:
+    def __init__(self) -> None:
+        self.published: list[tuple[str, bytes]] = []
+        self.acked: list[ReceivedPayload] = []
+
+    async def publish(self, channel: str, payload: bytes) -> None:
+        self.published.append((channel, payload))
+
+    async def ack(self, received: ReceivedPayload) -> None:
+        self.acked.append(received)
+
+
+class FragileNode(Node[Tick, Tick]):
+    """Echoes ticks, failing on tick 2."""
+
+    def __init__(self, payloads: list[bytes], error_policy: ErrorPolicy) -> None:
+        super().__init__(
+            input_channel_types=[("in", Tick)],
+            output_channel_types=[("out", Tick)],
+            node_name="fragile",
+        )
+        self.payloads = payloads
+        self.error_policy = error_policy
+        self.transport = RecordingTransport()
+        self.transports["pubsub"] = self.transport  # type: ignore[assignment]
+        self.echoed: list[int] = []
+
+    async def _receive(self) -> AsyncIterator[ReceivedPayload]:
+        for payload in self.payloads:
+            yield ReceivedPayload("in", payload, None, None)
+        raise NodeExitSignal("no more input")
+
+    async def publish(self, channel: str, message: Message[Tick]) -> None:
+        self.echoed.append(message.data.tick)
+
+    async def event_handler(
+        self, input_channel: str, input_message: Message[Tick]
+    ) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        if input_message.data.tick == 2:
+            raise ValueError("tick 2 is unlucky")
+        yield "out", input_message
+
+
+def _tick(tick: int) -> bytes:
+    return encode_message(
+        Message[Tick](data=Tick(tick=tick)), CodecFactory.make("json")
+    )
+
+
+MALFORMED = b'{"data": {"data_type": "tick", "tick": "one"}}'
+
+
+@pytest.mark.parametrize("error_policy", ["skip", "dead_letter"])
+def test_error_policy_keeps_running(error_policy: ErrorPolicy) -> None:
+    node = FragileNode([_tick(1), MALFORMED, _tick(2), _tick(3)], error_policy)
+    asyncio.run(node.event_loop())
+
+    assert node.echoed == [1, 3]
+    assert node.metrics.failed == {"in": 2}
+    assert node.stats().messages_failed == 2
+    # Every message is acknowledged, including the failed ones.
+    assert len(node.transport.acked) == 4
+
+    if error_policy == "skip":
+        assert node.transport.published == []
+        return
+    letters = [
+        decode_message(payload, Message[DeadLetter]).data
+        for channel, payload in node.transport.published
+        if channel == "deadletter:fragile"
+    ]
+    assert [(letter.stage, letter.payload) for letter in letters] == [
+        ("decode", MALFORMED),
+        ("handler", _tick(2)),
+    ]
+    assert "unlucky" in letters[1].error
+    assert "event_handler" in letters[1].traceback
+    assert all(letter.node_name == "fragile" for letter in letters)
+
+
+def test_error_policy_raise() -> None:
+    with pytest.raises(ValidationError):
+        asyncio.run(FragileNode([_tick(1), MALFORMED], "raise").event_loop())
+    with pytest.raises(ValueError, match="unlucky"):
+        asyncio.run(FragileNode([_tick(2)], "raise").event_loop())
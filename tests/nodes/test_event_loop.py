@@ -0,0 +1,163 @@
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+from aact.messages import Message, Tick
+from aact.nodes import Node
+from aact.nodes.base import NodeExitSignal, Ordering
+
+
+class SleepyNode(Node[Tick, Tick]):
+    """Echoes ticks after sleeping for a duration that decreases with the tick."""
+
+    def __init__(self, ticks: list[tuple[str, int]], fail: bool = False) -> None:
+        super().__init__(
+            input_channel_types=[("a", Tick), ("b", Tick)],
+            output_channel_types=[("out", Tick)],
+            node_name="sleepy",
+        )
+        self.ticks = ticks
+        self.fail = fail
+        self.published: list[int] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def _wait_for_input(self) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        for channel, tick in self.ticks:
+            yield channel, Message[Tick](data=Tick(tick=tick))
+
+    async def publish(self, channel: str, message: Message[Tick]) -> None:
+        self.published.append(message.data.tick)
+
+    async def event_handler(
+        self, input_channel: str, input_message: Message[Tick]
+    ) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01 * (10 - input_message.data.tick))
+        self.running -= 1
+        if self.fail:
+            raise ValueError("bad tick")
+        yield "out", input_message
+
+
+@pytest.mark.parametrize(
+    "max_concurrency, ordering, expected",
+    [
+        (1, "ordered-global", [0, 1, 2, 3, 4, 5]),
+        (6, "ordered-global", [0, 1, 2, 3, 4, 5]),
+        (6, "ordered-per-channel", [1, 3, 5, 0, 2, 4]),
+        (6, "unordered", [5, 4, 3, 2, 1, 0]),
+    ],
+)
+def test_event_loop_ordering(
+    max_concurrency: int, ordering: Ordering, expected: list[int]
+) -> None:
+    node = SleepyNode([("a" if tick % 2 == 0 else "b", tick) for tick in range(6)])
+    node.max_concurrency = max_concurrency
+    node.ordering = ordering
+
+    asyncio.run(node.event_loop())
+
+    assert node.published == expected
+    assert node.max_running == max_concurrency
+
+
+class ExitingNode(SleepyNode):
+    """Signals the exit of the node after its ticks."""
+
+    def __init__(self, ticks: list[tuple[str, int]]) -> None:
+        super().__init__(ticks)
+
+    async def _wait_for_input(self) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        async for input in super()._wait_for_input():
+            yield input
+        raise NodeExitSignal("no more ticks")
+
+
+def test_concurrent_event_loop_exits_on_exit_signal() -> None:
+    node = ExitingNode([("a", 0), ("a", 1)])
+    node.max_concurrency = 2
+
+    asyncio.run(asyncio.wait_for(node.event_loop(), 10))
+
+    # The messages in flight are handled before exiting.
+    assert node.published == [0, 1]
+
+
+def test_concurrent_event_loop_raises_handler_errors() -> None:
+    node = SleepyNode([("a", 0), ("a", 1)], fail=True)
+    node.max_concurrency = 2
+
+    with pytest.raises(ValueError, match="bad tick"):
+        asyncio.run(node.event_loop())
+
+
+class BatchingNode(SleepyNode):
+    """Records the batches and outputs each tick twice."""
+
+    def __init__(self, ticks: list[tuple[str, int]]) -> None:
+        super().__init__(ticks)
+        self.batches: list[list[int]] = []
+
+    async def _wait_for_input(self) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        for channel, tick in self.ticks:
+            if tick < 0:
+                await asyncio.sleep(0.05)
+                continue
+            yield channel, Message[Tick](data=Tick(tick=tick))
+
+    async def batch_event_handler(
+        self, input_channel: str, input_messages: list[Message[Tick]]
+    ) -> list[list[tuple[str, Message[Tick]]]]:
+        self.batches.append([message.data.tick for message in input_messages])
+        return [
+            [
+                ("out", message),
+                ("out", Message[Tick](data=Tick(tick=message.data.tick))),
+            ]
+            for message in input_messages
+        ]
+
+
+def test_batch_event_handler() -> None:
+    # A negative tick is a pause longer than the batch wait.
+    node = BatchingNode(
+        [
+            ("a", 0),
+            ("a", 1),
+            ("a", 2),
+            ("a", 3),
+            ("b", 4),
+            ("b", 5),
+            ("b", -1),
+            ("b", 6),
+        ]
+    )
+    node.max_batch_size = 3
+
+    asyncio.run(node.event_loop())
+
+    assert node.batches == [[0, 1, 2], [3], [4, 5], [6]]
+    assert node.published == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6]
+
+
+def test_default_batch_event_handler() -> None:
+    node = SleepyNode([("a", tick) for tick in range(6)])
+    node.max_batch_size = 4
+    node.max_concurrency = 2
+
+    asyncio.run(node.event_loop())
+
+    assert node.published == [0, 1, 2, 3, 4, 5]
+
+
+def test_event_loop_metrics() -> None:
+    node = SleepyNode([("a", 8), ("b", 9), ("a", 9)])
+
+    asyncio.run(node.event_loop())
+
+    assert node.metrics.handler_duration["a"].count == 2
+    assert node.metrics.handler_duration["b"].count == 1
+    # a tick of 8 sleeps for 20 ms
+    assert node.metrics.handler_duration["a"].sum >= 0.02
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from typing import Any
+
+from aact.nodes.health import HEARTBEATS_KEY, STATS_KEY, HealthRegistry, NodeStats
+
+
+class HashRedis:
+    """Just enough of a Redis client for the health registry."""
+
+    def __init__(self) -> None:
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction: bool = True) -> "HashPipeline":
+        return HashPipeline(self)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.sorted_sets.pop(key, None)
+            self.hashes.pop(key, None)
+
+
+class HashPipeline:
+    def __init__(self, r: HashRedis) -> None:
+        self.r = r
+        self.results: list[Any] = []
+
+    async def __aenter__(self) -> "HashPipeline":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        pass
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.r.sorted_sets.setdefault(key, {}).update(mapping)
+        self.results.append(len(mapping))
+
+    def hset(self, key: str, field: str, value: str) -> None:
+        self.r.hashes.setdefault(key, {})[field] = value
+        self.results.append(1)
+
+    def expire(self, key: str, seconds: int) -> None:
+        self.results.append(True)
+
+    def zmscore(self, key: str, members: list[str]) -> None:
+        scores = self.r.sorted_sets.get(key, {})
+        self.results.append([scores.get(member) for member in members])
+
+    def hmget(self, key: str, fields: list[str]) -> None:
+        values = self.r.hashes.get(key, {})
+        self.results.append([values.get(field) for field in fields])
+
+    def zrangebyscore(self, key: str, min: str, max: float) -> None:
+        scores = self.r.sorted_sets.get(key, {})
+        self.results.append(
+            [member.encode() for member, score in scores.items() if score <= max]
+        )
+
+    def zrem(self, key: str, *members: str) -> None:
+        for member in members:
+            self.r.sorted_sets.get(key, {}).pop(member, None)
+        self.results.append(len(members))
+
+    def hdel(self, key: str, *fields: str) -> None:
+        for field in fields:
+            self.r.hashes.get(key, {}).pop(field, None)
+        self.results.append(len(fields))
+
+    async def execute(self) -> list[Any]:
+        self.r.round_trips += 1
+        return self.results
+
+
+def test_health_registry() -> None:
+    async def main() -> None:
+        r = HashRedis()
+        registry = HealthRegistry(r, timeout=10)  # type: ignore[arg-type]
+
+        await registry.beat("a", NodeStats(pid=1, messages_received=3, queue_depth=2))
+        await registry.beat("b", NodeStats(pid=2))
+        r.sorted_sets[HEARTBEATS_KEY]["b"] = time.time() - 30
+        assert r.round_trips == 2
+
+        health = await registry.read(["a", "b", "c"])
+        assert r.round_trips == 3
+        assert set(health) == {"a", "b"}
+        assert health["a"].responding
+        assert health["a"].stats == NodeStats(pid=1, messages_received=3, queue_depth=2)
+        assert not health["b"].responding
+
+    asyncio.run(main())
+
+
+def test_health_registry_namespaces() -> None:
+    async def main() -> None:
+        r = HashRedis()
+        first = HealthRegistry(r, namespace="first")  # type: ignore[arg-type]
+        second = HealthRegistry(r, namespace="second")  # type: ignore[arg-type]
+
+        # Nodes of the same name in two dataflows do not overwrite each other.
+        await first.beat("a", NodeStats(pid=1))
+        await second.beat("a", NodeStats(pid=2))
+        await second.beat("b", NodeStats(pid=3))
+        health = await first.read(["a"])
+        assert health["a"].stats == NodeStats(pid=1)
+
+        # Entries of nodes silent for too long are pruned.
+        r.sorted_sets[f"{HEARTBEATS_KEY}:second"]["b"] = time.time() - 3600
+        assert not (await second.read(["a", "b"]))["b"].responding
+        assert set(await second.read(["a", "b"])) == {"a"}
+        assert set(r.sorted_sets[f"{HEARTBEATS_KEY}:second"]) == {"a"}
+        assert set(r.hashes[f"{STATS_KEY}:second"]) == {"a"}
+
+        await first.clear()
+        assert await first.read(["a"]) == {}
+        assert set(await second.read(["a"])) == {"a"}
+
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+import asyncio
+
+from aact.nodes.metrics import Histogram, NodeMetrics, serve_metrics
+
+
+def test_histogram() -> None:
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.snapshot().sum == 2.65
+
+
+def test_prometheus_endpoint() -> None:
+    metrics = NodeMetrics()
+    metrics.received["camera/image"] += 3
+    metrics.handler_duration["camera/image"].observe(0.002)
+
+    async def main() -> bytes:
+        server = await serve_metrics(
+            lambda: metrics.to_prometheus("vision", {"camera/image": 1}, 2),
+            "127.0.0.1",
+            0,
+        )
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(main())
+
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    body = response.split(b"\r\n\r\n", 1)[1].decode()
+    assert (
+        'aact_messages_received_total{node="vision",channel="camera/image"} 3' in body
+    )
+    assert 'aact_messages_dropped_total{node="vision",channel="camera/image"} 1' in body
+    assert (
+        'aact_handler_duration_seconds_bucket{node="vision",channel="camera/image",le="0.001"} 0'
+        in body
+    )
+    assert (
+        'aact_handler_duration_seconds_bucket{node="vision",channel="camera/image",le="0.0025"} 1'
+        in body
+    )
+    assert 'aact_queue_depth{node="vision"} 2' in body
@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 import pytest
 from aact.messages.base import DataModel
 from aact.messages.registry import DataModelFactory
@@ -105,3 +108,20 @@ def test_node_with_registered_datamodel_types() -> None:
     # Verify that node creation succeeds
     node = MyNodeCorrect()
     assert isinstance(node, MyNodeCorrect)
+
+
+def test_builtin_nodes_are_imported_lazily() -> None:
+    """Test that importing aact does not import the built-in nodes and their dependencies until they are used."""
+    check = (
+        "import sys, aact.cli; "
+        "print(' '.join(m for m in sys.modules if m.startswith(('aact.nodes.api', 'aact.nodes.print', "
+        "'aiohttp', 'requests', 'rq')))); "
+        "from aact.nodes import NodeFactory; "
+        "NodeFactory.make('print', print_channel_types={}, node_name='print', redis_url='redis://localhost:6379/0'); "
+        "print('aact.nodes.print' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check], check=True, capture_output=True, text=True
+    )
+
+    assert result.stdout.split("\n")[:2] == ["", "True"]
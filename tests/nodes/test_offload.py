@@ -0,0 +1,120 @@
+import asyncio
+import os
+import threading
+import time
+from typing import AsyncIterator, Iterator
+
+import pytest
+from aact.messages import Message, Text, Tick
+from aact.nodes import Node
+from aact.nodes.offload import offload
+
+
+class OffloadNode(Node[Tick, Text]):
+    def __init__(self, ticks: list[int]) -> None:
+        super().__init__(
+            input_channel_types=[("tick", Tick)],
+            output_channel_types=[("thread", Text), ("process", Text)],
+            node_name="offload",
+        )
+        self.ticks = ticks
+        self.published: list[tuple[str, str]] = []
+
+    async def _wait_for_input(self) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        for tick in self.ticks:
+            yield "tick", Message[Tick](data=Tick(tick=tick))
+
+    async def publish(self, channel: str, message: Message[Text]) -> None:
+        self.published.append((channel, message.data.text))
+
+    @offload("thread")
+    def event_handler(
+        self, input_channel: str, input_message: Message[Tick]
+    ) -> Iterator[tuple[str, Message[Text]]]:
+        if input_message.data.tick < 0:
+            raise ValueError("bad tick")
+        time.sleep(0.05)  # blocking
+        for _ in range(2):
+            yield (
+                "thread",
+                Message[Text](data=Text(text=threading.current_thread().name)),
+            )
+
+
+class ProcessNode(OffloadNode):
+    def __init__(self, ticks: list[int]) -> None:
+        super().__init__(ticks)
+
+    @offload("process")
+    def event_handler(
+        input_channel: str, input_message: Message[Tick]
+    ) -> Iterator[tuple[str, Message[Text]]]:
+        yield "process", Message[Text](data=Text(text=str(os.getpid())))
+        yield "process", Message[Text](data=Text(text=str(input_message.data.tick)))
+
+
+def test_thread_handler_does_not_block_event_loop() -> None:
+    node = OffloadNode([1, 2])
+
+    async def main() -> int:
+        ticks = 0
+
+        async def count() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        counter = asyncio.create_task(count())
+        await node.event_loop()
+        counter.cancel()
+        await asyncio.to_thread(node._offload_pools.shutdown)
+        return ticks
+
+    assert asyncio.run(main()) >= 5
+    assert len(node.published) == 4
+    assert threading.current_thread().name not in [text for _, text in node.published]
+
+    with pytest.raises(ValueError, match="bad tick"):
+        asyncio.run(OffloadNode([-1]).event_loop())
+
+
+def test_process_handler() -> None:
+    node = ProcessNode([7])
+
+    async def main() -> None:
+        try:
+            await node.event_loop()
+        finally:
+            await asyncio.to_thread(node._offload_pools.shutdown)
+
+    asyncio.run(main())
+
+    assert [channel for channel, _ in node.published] == ["process", "process"]
+    assert node.published[0][1] != str(os.getpid())
+    assert node.published[1][1] == "7"
+
+
+def test_process_handler_not_found() -> None:
+    class LocalNode(OffloadNode):
+        def __init__(self, ticks: list[int]) -> None:
+            super().__init__(ticks)
+
+        # Worker processes cannot import a handler defined in a function.
+        @offload("process")
+        def event_handler(
+            input_channel: str, input_message: Message[Tick]
+        ) -> Iterator[tuple[str, Message[Text]]]:
+            yield "process", Message[Text](data=Text(text="unreachable"))
+
+    node = LocalNode([7])
+
+    async def main() -> None:
+        try:
+            await asyncio.wait_for(node.event_loop(), 30)
+        finally:
+            await asyncio.to_thread(node._offload_pools.shutdown)
+
+    with pytest.raises(AttributeError):
+        asyncio.run(main())
+    assert node.published == []
@@ -0,0 +1,48 @@
+import asyncio
+from typing import AsyncIterator
+
+from aact.messages import CodecFactory, Image, Message, Tick, encode_message
+from aact.nodes.performance import PerformanceMeasureNode
+from aact.nodes.transports import LocalBus, ReceivedPayload
+
+
+class LocalPerformanceNode(PerformanceMeasureNode):
+    """Receives a tick through the local bus, and its copy mirrored to Redis."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            input_channel="tick",
+            output_channel="image",
+            message_size=1,
+            node_name="performance",
+            redis_url="redis://localhost:6379/0",  # not connected to
+        )
+        self._local_bus = LocalBus()
+
+    async def _receive(self) -> AsyncIterator[ReceivedPayload]:
+        assert self._local_bus is not None
+        message = Message[Tick](data=Tick(tick=0))
+        yield ReceivedPayload("tick", b"", message=message)
+        yield ReceivedPayload(
+            "tick",
+            encode_message(message, CodecFactory.make("json"), self._local_bus.origin),
+        )
+
+
+def test_performance_node_local_bus() -> None:
+    async def main() -> list[tuple[str, Message[Tick | Image]]]:
+        node = LocalPerformanceNode()
+        received = []
+        try:
+            async for input in node._wait_for_input():
+                received.append(input)
+        except Exception as e:
+            assert str(e) == "Input channel closed unexpectedly"
+        return received
+
+    received = asyncio.run(main())
+
+    # The mirrored copy of the local message is dropped.
+    assert [(channel, message.data) for channel, message in received] == [
+        ("tick", Tick(tick=0))
+    ]
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from aact.nodes.queues import InputQueueConfig, InputQueues
+from aact.nodes.transports import ReceivedPayload
+
+
+def payload(channel: str, n: int) -> ReceivedPayload:
+    return ReceivedPayload(channel, str(n).encode(), None, None)
+
+
+async def drain(queues: InputQueues) -> list[tuple[str, bytes]]:
+    queues.close()
+    drained = []
+    while (received := await queues.get()) is not None:
+        drained.append((received.channel, bytes(received.payload)))
+    return drained
+
+
+def test_latest_only_keeps_arrival_order() -> None:
+    asyncio.run(_test_latest_only_keeps_arrival_order())
+
+
+async def _test_latest_only_keeps_arrival_order() -> None:
+    queues = InputQueues(
+        {"a": InputQueueConfig(policy="latest_only"), "b": InputQueueConfig()}
+    )
+    for n in range(3):
+        await queues.put(payload("a", n))
+        await queues.put(payload("b", n))
+    assert await drain(queues) == [
+        ("a", b"2"),
+        ("b", b"0"),
+        ("b", b"1"),
+        ("b", b"2"),
+    ]
+    assert queues.dropped() == {"a": 2, "b": 0}
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [("drop_oldest", [b"2", b"3"]), ("drop_newest", [b"0", b"1"])],
+)
+def test_drop_policies(policy: str, expected: list[bytes]) -> None:
+    asyncio.run(_test_drop_policies(policy, expected))
+
+
+async def _test_drop_policies(policy: str, expected: list[bytes]) -> None:
+    queues = InputQueues(
+        {"a": InputQueueConfig.model_validate({"max_depth": 2, "policy": policy})}
+    )
+    dropped = [await queues.put(payload("a", n)) for n in range(4)]
+    assert [d.payload for d in dropped if d is not None] == [
+        n for n in [b"0", b"1", b"2", b"3"] if n not in expected
+    ]
+    assert [p for _, p in await drain(queues)] == expected
+
+
+@pytest.mark.parametrize("policy", ["drop_oldest", "drop_newest"])
+def test_drop_policies_require_max_depth(policy: str) -> None:
+    with pytest.raises(ValueError, match="max_depth"):
+        InputQueueConfig.model_validate({"policy": policy})
+    with pytest.raises(ValueError, match="max_depth"):
+        InputQueueConfig.model_validate({"max_depth": 0, "policy": policy})
+
+
+def test_block_waits_for_room() -> None:
+    asyncio.run(_test_block_waits_for_room())
+
+
+async def _test_block_waits_for_room() -> None:
+    queues = InputQueues({"a": InputQueueConfig(max_depth=1)})
+    await queues.put(payload("a", 0))
+    put = asyncio.create_task(queues.put(payload("a", 1)))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+    received = await queues.get()
+    assert received is not None and received.payload == b"0"
+    assert await put is None
+    assert queues.depths() == {"a": 1}
+
+    # channels without a configuration are not buffered beyond one message
+    await queues.put(payload("b", 0))
+    put = asyncio.create_task(queues.put(payload("b", 1)))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+    put.cancel()
@@ -0,0 +1,88 @@
+from aact.cli.reader import Config
+from aact.messages import CodecFactory, Message, Text, Tick, encode_message
+from aact.messages.codecs import SequenceTag
+from aact.nodes import NodeFactory
+from aact.nodes.replicas import Partitioner
+from aact.nodes.transports import ReceivedPayload, StreamsTransport
+
+
+def test_replicas_split_messages() -> None:
+    partitioners = [
+        Partitioner(3, index, {"text": "data.text"}, set()) for index in range(3)
+    ]
+    for number in range(30):
+        tagged = encode_message(
+            Message[Tick](data=Tick(tick=number)),
+            CodecFactory.make("json"),
+            sequence=SequenceTag(b"producer", number),
+        )
+        untagged = encode_message(
+            Message[Tick](data=Tick(tick=number)), CodecFactory.make("json")
+        )
+        for payload in [tagged, untagged]:
+            received = ReceivedPayload("tick", payload, None, None)
+            accepted = [p.accepts(received) for p in partitioners]
+            assert sum(accepted) == 1
+            # A replica restarting, or missing messages, takes the same decisions.
+            restarted = Partitioner(3, accepted.index(True), {}, set())
+            assert restarted.accepts(received)
+
+    owners = [
+        [
+            p.owns("text", Message[Text](data=Text(text=f"session {n % 5}")))
+            for p in partitioners
+        ]
+        for n in range(20)
+    ]
+    assert all(sum(owned) == 1 for owned in owners)
+    # Messages with the same key go to the same replica.
+    assert owners[:5] == owners[5:10] == owners[10:15]
+
+
+def test_dataflow_replicas() -> None:
+    config = Config.model_validate(
+        {
+            "redis_url": "redis://localhost:6379/0",
+            "channel_transports": {"tick": "streams"},
+            "nodes": [
+                {
+                    "node_name": "printer",
+                    "node_class": "print",
+                    "node_args": {"print_channel_types": {"tick": "tick"}},
+                    "replicas": 2,
+                    "metrics_port": 9100,
+                    "transport_options": {"streams": {"consumer_name": "printer"}},
+                },
+                {"node_name": "other", "node_class": "print"},
+            ],
+        }
+    )
+
+    assert [node.node_name for node in config.nodes] == [
+        "printer-0",
+        "printer-1",
+        "other",
+    ]
+    replica = config.nodes[1]
+    assert (replica.replica_of, replica.replica_index) == ("printer", 1)
+    # Each replica has a metrics port and a Streams consumer of its own.
+    assert [node.metrics_port for node in config.nodes] == [9100, 9101, None]
+    assert [
+        node.transport_options.get("streams", {}).get("consumer_name")
+        for node in config.nodes
+    ] == ["printer-0", "printer-1", None]
+    # Validating the expanded configuration again keeps the replicas.
+    assert Config.model_validate(config.model_dump()).nodes == config.nodes
+
+    node = NodeFactory.make(
+        "print",
+        print_channel_types={"tick": "tick"},
+        node_name=replica.node_name,
+        redis_url=config.redis_url,
+    )
+    node.set_transports(replica.channel_transports, replica.transport_options)
+    node.set_replicas(2, 1, {}, "printer")
+    streams = node._get_transport("tick")
+    assert isinstance(streams, StreamsTransport)
+    assert streams.consumer_group == "printer"
+    assert streams.consumer_name == "printer-1"
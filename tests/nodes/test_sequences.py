@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+from aact.messages import CodecFactory, Message, Tick, encode_message
+from aact.messages.codecs import SequenceTag
+from aact.nodes import NodeFactory
+from aact.nodes.sequences import SequenceTracker
+from aact.nodes.transports import ReceivedPayload
+
+
+def test_sequence_tracker() -> None:
+    tracker = SequenceTracker(max_missing=2)
+    events = [
+        tracker.observe("a", SequenceTag(b"producer", number))
+        for number in [5, 6, 10, 8, 8, 7, 6]
+    ]
+    assert events == [
+        ("first", 0),
+        ("in_order", 0),
+        ("lost", 3),
+        ("reordered", 0),
+        ("duplicated", 0),
+        ("duplicated", 0),  # too old to be remembered as missing
+        ("duplicated", 0),
+    ]
+    # Producers and channels are tracked separately.
+    assert tracker.observe("b", SequenceTag(b"producer", 0)) == ("first", 0)
+    assert tracker.observe("a", SequenceTag(b"restarts", 0)) == ("first", 0)
+
+
+def test_node_counts_lost_messages(caplog: pytest.LogCaptureFixture) -> None:
+    node = NodeFactory.make(
+        "print",
+        print_channel_types={"tick": "tick"},
+        node_name="print",
+        redis_url="redis://localhost:6379/0",  # not connected to
+    )
+    node.sequence_warning_interval_ms = 60000
+    message = Message[Tick](data=Tick(tick=0))
+    with caplog.at_level(logging.WARNING):
+        for number in [0, 1, 4, 4, 2]:
+            payload = encode_message(
+                message,
+                CodecFactory.make("json"),
+                None,
+                SequenceTag(b"producer", number),
+            )
+            node._check_sequence(ReceivedPayload("tick", payload, None, None))
+
+    # 2 and 3 were missing, 2 arrived late.
+    assert node.metrics.lost == {"tick": 1}
+    assert node.metrics.duplicated == {"tick": 1}
+    assert node.metrics.reordered == {"tick": 1}
+    assert node.stats().messages_lost == 1
+    # Warnings are rate limited per channel.
+    assert len(caplog.records) == 1
+    assert "tick" in caplog.records[0].getMessage()
@@ -0,0 +1,429 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator
+
+import pytest
+from aact.cli.reader import Config
+from aact.messages import CodecFactory, Message, Text, Tick, encode_message
+from aact.nodes import Node, NodeFactory
+from aact.nodes.transports import (
+    LocalBus,
+    PublishBatcher,
+    PubSubTransport,
+    ReceivedPayload,
+    SharedMemoryTransport,
+    StreamsTransport,
+)
+
+
+def test_set_transports() -> None:
+    node = NodeFactory.make(
+        "random",
+        input_channel="tick/secs/1",
+        output_channel="random",
+        node_name="random",
+    )
+    node.set_transports(
+        {"random": "streams"},
+        {"streams": {"consumer_group": "random_replicas", "max_len": 100}},
+    )
+
+    assert isinstance(node._get_transport("tick/secs/1"), PubSubTransport)
+    streams_transport = node._get_transport("random")
+    assert isinstance(streams_transport, StreamsTransport)
+    assert streams_transport.consumer_group == "random_replicas"
+    assert streams_transport.consumer_name == "random"
+    assert streams_transport.max_len == 100
+
+    with pytest.raises(ValueError):
+        node.set_transports({"random": "unknown"})
+
+
+def test_dataflow_transport_settings() -> None:
+    config = Config.model_validate(
+        {
+            "redis_url": "redis://localhost:6379/0",
+            "channel_transports": {"a": "streams", "b": "streams"},
+            "transport_options": {"streams": {"max_len": 100}},
+            "nodes": [
+                {
+                    "node_name": "replica",
+                    "node_class": "print",
+                    "channel_transports": {"b": "pubsub"},
+                    "transport_options": {"streams": {"consumer_group": "g"}},
+                }
+            ],
+        }
+    )
+
+    node_config = config.nodes[0]
+    assert node_config.channel_transports == {"a": "streams", "b": "pubsub"}
+    assert node_config.transport_options == {
+        "streams": {"max_len": 100, "consumer_group": "g"}
+    }
+
+
+def test_local_bus_delivery() -> None:
+    async def main() -> None:
+        bus = LocalBus.get("redis://localhost:6379/0")
+        assert bus is LocalBus.get("redis://localhost:6379/0")
+        inbox: asyncio.Queue[ReceivedPayload] = asyncio.Queue()
+        bus.subscribe("text", inbox)
+
+        message = Message[Text](data=Text(text="hello"))
+        assert bus.deliver("text", message) == 1
+        assert bus.deliver("other", message) == 0
+        received = inbox.get_nowait()
+        assert received.channel == "text"
+        assert received.message is message
+
+        bus.unsubscribe(inbox)
+        assert bus.deliver("text", message) == 0
+
+        # The bus is dropped once every user has released it.
+        bus.release()
+        assert LocalBus.get("redis://localhost:6379/0") is bus
+        bus.release()
+        bus.release()
+        assert bus not in LocalBus._buses.values()
+        new_bus = LocalBus.get("redis://localhost:6379/0")
+        assert new_bus is not bus
+        new_bus.release()
+
+    asyncio.run(main())
+
+
+class RecordingPipeline:
+    def __init__(self, executed: list[list[tuple[str, bytes]]]) -> None:
+        self.executed = executed
+        self.commands: list[tuple[str, bytes]] = []
+
+    def publish(self, channel: str, payload: bytes) -> None:
+        self.commands.append((channel, payload))
+
+    async def execute(self) -> None:
+        self.executed.append(self.commands)
+
+
+class RecordingRedis:
+    def __init__(self) -> None:
+        self.executed: list[list[tuple[str, bytes]]] = []
+
+    def pipeline(self, transaction: bool = True) -> RecordingPipeline:
+        return RecordingPipeline(self.executed)
+
+    def pubsub(self) -> "RecordingPubSub":
+        return RecordingPubSub()
+
+
+class RecordingPubSub:
+    async def unsubscribe(self) -> None:
+        pass
+
+
+def test_publish_batcher() -> None:
+    async def main() -> None:
+        r = RecordingRedis()
+        transport = PubSubTransport(r, "node")  # type: ignore[arg-type]
+        batcher = PublishBatcher(r, max_batch_size=3)  # type: ignore[arg-type]
+
+        for i in range(2):
+            await batcher.publish(transport, "a", b"%d" % i)
+        assert r.executed == []
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert r.executed == [[("a", b"0"), ("a", b"1")]]
+
+        # a full batch is flushed right away, the rest on close
+        for i in range(4):
+            await batcher.publish(transport, "b", b"%d" % i)
+        assert r.executed[1] == [("b", b"0"), ("b", b"1"), ("b", b"2")]
+        await batcher.close()
+        assert r.executed[2] == [("b", b"3")]
+
+    asyncio.run(main())
+
+
+def test_shared_memory_transport() -> None:
+    async def main() -> None:
+        r = RecordingRedis()
+        publisher = SharedMemoryTransport(r, "pub", segment_size=1024, min_size=100)  # type: ignore[arg-type]
+        subscriber = SharedMemoryTransport(r, "sub")  # type: ignore[arg-type]
+        pipe = r.pipeline()
+
+        publisher.queue_publish(pipe, "image", b"small")  # type: ignore[arg-type]
+        publisher.queue_publish(pipe, "image", bytes(range(200)))  # type: ignore[arg-type]
+        publisher.queue_publish(pipe, "image", bytes(2000))  # type: ignore[arg-type]
+        small, large, too_large = (payload for _, payload in pipe.commands)
+        assert small == b"small"
+        assert too_large == bytes(2000)
+        assert len(large) < 100
+        copy = subscriber._from_descriptor(large)
+        assert isinstance(copy, bytes) and copy == bytes(range(200))
+        subscriber.copy_payloads = False
+        view = subscriber._from_descriptor(large)
+        assert isinstance(view, memoryview) and view == bytes(range(200))
+
+        # the ring wraps around and overwrites the first payload
+        for _ in range(5):
+            publisher.queue_publish(pipe, "image", bytes(200))  # type: ignore[arg-type]
+        assert subscriber._from_descriptor(large) is None
+
+        del view
+        # the segment of a stopped publisher is unmapped when a new one shows up
+        assert publisher._ring is not None
+        name = publisher._ring.name
+        await publisher.close()
+        restarted = SharedMemoryTransport(r, "pub", segment_size=1024, min_size=100)  # type: ignore[arg-type]
+        restarted.queue_publish(pipe, "image", bytes(range(200)))  # type: ignore[arg-type]
+        assert subscriber._from_descriptor(pipe.commands[-1][1]) == bytes(range(200))
+        assert name not in subscriber._segments and len(subscriber._segments) == 1
+
+        await restarted.close()
+        await subscriber.close()
+
+    asyncio.run(main())
+
+
+def entry_number(entry_id: str | bytes) -> int:
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    return int(entry_id.split("-")[0])
+
+
+class StreamsRedis:
+    """Just enough of a Redis client for the Streams transport, with one consumer group per stream."""
+
+    def __init__(self) -> None:
+        self.streams: dict[str, list[tuple[bytes, dict[bytes, bytes]]]] = {}
+        self.last_id = 0
+        self.xadds: list[tuple[str, int, bool]] = []
+        self.delivered: dict[str, int] = {}
+        """The number of the last entry delivered to the group, per stream."""
+        self.pending: dict[str, dict[bytes, tuple[str, float]]] = {}
+        """The consumer and the delivery time of the pending entries, per stream."""
+
+    async def xgroup_create(
+        self, name: str, groupname: str, id: str, mkstream: bool
+    ) -> None:
+        self.streams.setdefault(name, [])
+        self.delivered.setdefault(name, self.last_id)
+        self.pending.setdefault(name, {})
+
+    def add(
+        self, name: str, fields: dict[str, bytes], maxlen: int, approximate: bool
+    ) -> bytes:
+        self.xadds.append((name, maxlen, approximate))
+        self.last_id += 1
+        entry_id = f"{self.last_id}-0".encode()
+        stream = self.streams.setdefault(name, [])
+        stream.append(
+            (entry_id, {key.encode(): value for key, value in fields.items()})
+        )
+        del stream[:-maxlen]
+        return entry_id
+
+    async def xadd(
+        self, name: str, fields: dict[str, bytes], maxlen: int, approximate: bool
+    ) -> bytes:
+        return self.add(name, fields, maxlen, approximate)
+
+    def pipeline(self, transaction: bool = True) -> "StreamsPipeline":
+        return StreamsPipeline(self)
+
+    def fields(self, name: str, entry_id: bytes) -> dict[bytes, bytes]:
+        # Trimmed entries have no fields.
+        return dict(self.streams[name]).get(entry_id, {})
+
+    async def xreadgroup(
+        self,
+        groupname: str,
+        consumername: str,
+        streams: dict[str, str | bytes],
+        count: int,
+        block: int | None = None,
+    ) -> list[tuple[bytes, list[tuple[bytes, dict[bytes, bytes]]]]]:
+        response = []
+        for name, last_id in streams.items():
+            if last_id == ">":
+                entries = [
+                    entry
+                    for entry in self.streams[name]
+                    if entry_number(entry[0]) > self.delivered[name]
+                ][:count]
+                for entry_id, _ in entries:
+                    self.delivered[name] = entry_number(entry_id)
+                    self.pending[name][entry_id] = (consumername, time.monotonic())
+                if entries:
+                    response.append((name.encode(), entries))
+            else:
+                entries = [
+                    (entry_id, self.fields(name, entry_id))
+                    for entry_id, (consumer, _) in sorted(
+                        self.pending[name].items(),
+                        key=lambda item: entry_number(item[0]),
+                    )
+                    if consumer == consumername
+                    and entry_number(entry_id) > entry_number(last_id)
+                ][:count]
+                response.append((name.encode(), entries))
+        if not response and block is not None:
+            await asyncio.sleep(block / 1000)
+        return response
+
+    async def xautoclaim(
+        self,
+        name: str,
+        groupname: str,
+        consumername: str,
+        min_idle_time: int,
+        start_id: str,
+        count: int,
+    ) -> list[Any]:
+        now = time.monotonic()
+        claimed = [
+            (entry_id, self.fields(name, entry_id))
+            for entry_id, (_, delivered_at) in self.pending[name].items()
+            if now - delivered_at >= min_idle_time / 1000
+        ][:count]
+        for entry_id, _ in claimed:
+            self.pending[name][entry_id] = (consumername, now)
+        return [b"0-0", claimed, []]
+
+    async def xack(self, name: str, groupname: str, *ids: bytes) -> int:
+        return sum(
+            self.pending[name].pop(entry_id, None) is not None for entry_id in ids
+        )
+
+
+class StreamsPipeline:
+    def __init__(self, r: StreamsRedis) -> None:
+        self.r = r
+        self.commands: list[tuple[str, dict[str, bytes], int, bool]] = []
+
+    def xadd(
+        self, name: str, fields: dict[str, bytes], maxlen: int, approximate: bool
+    ) -> None:
+        self.commands.append((name, fields, maxlen, approximate))
+
+    async def execute(self) -> None:
+        for command in self.commands:
+            self.r.add(*command)
+
+
+def tick_payload(tick: int) -> bytes:
+    return encode_message(
+        Message[Tick](data=Tick(tick=tick)), CodecFactory.make("json")
+    )
+
+
+async def take(listen: AsyncIterator[ReceivedPayload], n: int) -> list[ReceivedPayload]:
+    async def read() -> list[ReceivedPayload]:
+        return [await listen.__anext__() for _ in range(n)]
+
+    return await asyncio.wait_for(read(), 5)
+
+
+def test_streams_max_len() -> None:
+    async def main() -> None:
+        r = StreamsRedis()
+        transport = StreamsTransport(r, "ticker", max_len=3)  # type: ignore[arg-type]
+        for tick in range(4):
+            await transport.publish("tick", tick_payload(tick))
+        pipe = r.pipeline()
+        transport.queue_publish(pipe, "tick", tick_payload(4))  # type: ignore[arg-type]
+        await pipe.execute()
+
+        assert r.xadds == [("tick", 3, True)] * 5
+        assert [fields[b"data"] for _, fields in r.streams["tick"]] == [
+            tick_payload(tick) for tick in [2, 3, 4]
+        ]
+
+    asyncio.run(main())
+
+
+def test_streams_replay_pending_entries() -> None:
+    async def main() -> None:
+        r = StreamsRedis()
+        transport = StreamsTransport(r, "printer", block_ms=1)  # type: ignore[arg-type]
+        await transport.subscribe(["tick"])
+        for tick in range(3):
+            await transport.publish("tick", tick_payload(tick))
+        received = await take(transport.listen(), 3)
+        await transport.ack(received[1])
+
+        # The restarted consumer gets the entries it read but never acknowledged first, then the new ones.
+        await transport.publish("tick", tick_payload(3))
+        restarted = StreamsTransport(r, "printer", block_ms=1)  # type: ignore[arg-type]
+        await restarted.subscribe(["tick"])
+        replayed = await take(restarted.listen(), 3)
+        assert [p.payload for p in replayed] == [
+            tick_payload(tick) for tick in [0, 2, 3]
+        ]
+
+    asyncio.run(main())
+
+
+def test_streams_claim_idle_entries() -> None:
+    async def main() -> None:
+        r = StreamsRedis()
+        options: dict[str, Any] = {"consumer_group": "printer", "block_ms": 1}
+        died = StreamsTransport(r, "printer-0", **options)  # type: ignore[arg-type]
+        await died.subscribe(["tick"])
+        await died.publish("tick", tick_payload(0))
+        [received] = await take(died.listen(), 1)
+
+        # Another consumer of the group claims the entry once it has been pending for claim_idle_ms.
+        await asyncio.sleep(0.01)
+        other = StreamsTransport(r, "printer-1", claim_idle_ms=5, **options)  # type: ignore[arg-type]
+        await other.subscribe(["tick"])
+        [claimed] = await take(other.listen(), 1)
+        assert claimed == received
+        assert r.pending["tick"][received.message_id][0] == "printer-1"  # type: ignore[index]
+
+    asyncio.run(main())
+
+
+class FailingTickNode(Node[Tick, Tick]):
+    """Fails to handle the tick 1."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            input_channel_types=[("tick", Tick)],
+            output_channel_types=[("out", Tick)],
+            node_name="failing",
+            redis_url="redis://localhost:6379/0",  # not connected to
+        )
+        self.handled: list[int] = []
+
+    async def publish(self, channel: str, message: Message[Tick]) -> None:
+        pass
+
+    async def event_handler(
+        self, input_channel: str, input_message: Message[Tick]
+    ) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        if input_message.data.tick == 1:
+            raise ValueError("bad tick")
+        self.handled.append(input_message.data.tick)
+        yield "out", input_message
+
+
+def test_streams_ack_after_handler() -> None:
+    async def main() -> None:
+        r = StreamsRedis()
+        node = FailingTickNode()
+        node.set_transports({"tick": "streams"}, {"streams": {"block_ms": 1}})
+        transport = node._get_transport("tick")
+        transport.r = r  # type: ignore[assignment]
+        await transport.subscribe(["tick"])
+        for tick in range(2):
+            await transport.publish("tick", tick_payload(tick))
+
+        with pytest.raises(ValueError, match="bad tick"):
+            await node.event_loop()
+
+        assert node.handled == [0]
+        # Only the message handled successfully is acknowledged.
+        assert list(r.pending["tick"]) == [b"2-0"]
+
+    asyncio.run(main())
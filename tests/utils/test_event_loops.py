@@ -0,0 +1,127 @@
+import asyncio
+import subprocess
+import sys
+from typing import Any, AsyncIterator
+
+import pytest
+from aact.cli.launch.launch import _sync_run_node
+from aact.cli.reader import Config, NodeConfig
+from aact.messages import Message, Tick
+from aact.nodes import Node, NodeFactory
+from aact.utils import EventLoop, new_event_loop
+from aact.utils.event_loop import UVLOOP_AVAILABLE
+
+
+def test_dataflow_event_loop_settings() -> None:
+    config = Config.model_validate(
+        {
+            "redis_url": "redis://localhost:6379/0",
+            "event_loop": "uvloop",
+            "nodes": [
+                {"node_name": "a", "node_class": "print"},
+                {"node_name": "b", "node_class": "print", "event_loop": "asyncio"},
+            ],
+        }
+    )
+
+    assert [node.event_loop for node in config.nodes] == ["uvloop", "asyncio"]
+    assert (
+        Config.model_validate(
+            {"redis_url": "redis://localhost:6379/0", "nodes": [config.nodes[0]]}
+        )
+        .nodes[0]
+        .event_loop
+        == "uvloop"
+    )
+
+    with pytest.raises(ValueError):
+        Config.model_validate(
+            {"redis_url": "redis://localhost:6379/0", "event_loop": "trio", "nodes": []}
+        )
+
+
+async def _add(a: int, b: int) -> int:
+    await asyncio.sleep(0)
+    return a + b
+
+
+def test_new_event_loop() -> None:
+    loop = new_event_loop("asyncio")
+    try:
+        assert loop.run_until_complete(_add(1, 2)) == 3
+    finally:
+        loop.close()
+
+    if UVLOOP_AVAILABLE:
+        loop = new_event_loop("uvloop")
+        try:
+            assert type(loop).__module__.startswith("uvloop")
+            assert loop.run_until_complete(_add(1, 2)) == 3
+        finally:
+            loop.close()
+    else:
+        with pytest.raises(ImportError, match=r"aact\[uvloop\]"):
+            new_event_loop("uvloop")
+
+
+def test_uvloop_imported_lazily() -> None:
+    imported = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, aact.utils.event_loop; print('uvloop' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert imported.stdout.strip() == "False"
+
+
+running_loops: list[str] = []
+
+
+@NodeFactory.register("loop_probe")
+class LoopProbeNode(Node[Tick, Tick]):
+    """Records the module of the event loop it runs on, without connecting to Redis."""
+
+    def __init__(self, node_name: str, redis_url: str) -> None:
+        super().__init__(
+            input_channel_types=[("tick", Tick)],
+            output_channel_types=[("out", Tick)],
+            node_name=node_name,
+            redis_url=redis_url,
+        )
+
+    async def __aenter__(self) -> "LoopProbeNode":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        pass
+
+    async def _wait_for_input(self) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        yield "tick", Message[Tick](data=Tick(tick=0))
+
+    async def publish(self, channel: str, message: Message[Tick]) -> None:
+        pass
+
+    async def event_handler(
+        self, input_channel: str, input_message: Message[Tick]
+    ) -> AsyncIterator[tuple[str, Message[Tick]]]:
+        running_loops.append(type(asyncio.get_running_loop()).__module__)
+        yield "out", input_message
+
+
+@pytest.mark.parametrize("event_loop", ["asyncio", "uvloop"])
+def test_node_runs_on_event_loop(event_loop: EventLoop) -> None:
+    if event_loop == "uvloop":
+        pytest.importorskip("uvloop")
+    running_loops.clear()
+
+    _sync_run_node(
+        NodeConfig(node_name="probe", node_class="loop_probe", event_loop=event_loop),
+        "redis://localhost:6379/0",  # not connected to
+    )
+
+    assert len(running_loops) == 1
+    assert running_loops[0].startswith(event_loop)